@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多路画面合成性能测试
+用模拟的图像流（每路每个刷新周期都有新帧）比较两种显示方式在同样显示面积下每个刷新周期的CPU耗时:
+    逐路显示  每路缩放到自己的控件尺寸、复制、cv2.putText 叠加文字、BGR转RGB（对应 rgbSwapped），
+              再复制一次（对应 QPixmap.fromImage），之后Qt对每个控件分别重绘
+    合成显示  TileCompositor 把每路缩放到同一块画布的格子中、叠加缓存的文字位图，
+              之后Qt绘制一次画布（这里按复制一次画布计算）；
+              分别测试在GUI线程缩放和订阅采集线程的帧预先缩放（GUI线程只复制）两种情况，
+              预先缩放时单独列出每路在采集线程中的耗时
+不需要Qt和摄像头，Qt重绘本身的开销不计入（逐路显示每路还有一次额外的控件重绘）
+
+用法:
+    python3 bench_compositor.py [--canvas 1440x480] [--views 1,3,6,9] [--frames 200]
+"""
+
+import sys
+import time
+import argparse
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from compositor import TileCompositor, TITLE_HEIGHT, grid_shape
+
+Frame = namedtuple("Frame", ["image", "seq", "capture_time"])
+
+# 模拟的图像流尺寸（USB摄像头、RealSense彩色和深度轮流）
+STREAM_SIZES = ((640, 480), (848, 480), (848, 480))
+
+
+def overlay_lines(fps):
+    return (f"FPS: {fps:.1f}", "Angle: 0.4321 rad  dt: +2.5 ms")
+
+
+def legacy_refresh(images, cell_width, cell_height, fps):
+    """逐路显示的一个刷新周期"""
+    for image in images:
+        image_height, image_width = image.shape[:2]
+        scale = min(cell_width / image_width, cell_height / image_height)
+        target = (max(1, int(image_width * scale)), max(1, int(image_height * scale)))
+        shown = cv2.resize(image, target, interpolation=cv2.INTER_AREA)
+        text_scale = max(scale, 0.5)
+        line_height = int(30 * text_scale)
+        for line, text in enumerate(overlay_lines(fps), 1):
+            cv2.putText(shown, text, (10, line_height * line), cv2.FONT_HERSHEY_SIMPLEX, 0.7 * text_scale,
+                        (0, 255, 0), 2)
+        rgb = cv2.cvtColor(shown, cv2.COLOR_BGR2RGB)
+        rgb.copy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多路画面合成性能测试")
+    parser.add_argument('--canvas', default="1440x480", help="画面显示区域尺寸")
+    parser.add_argument('--views', default="1,3,6,9", help="测试的画面路数，逗号分隔")
+    parser.add_argument('--frames', type=int, default=200, help="每种路数的刷新周期数")
+    args = parser.parse_args()
+
+    width, height = (int(x) for x in args.canvas.lower().split("x"))
+    rng = np.random.default_rng(0)
+    sources = [rng.integers(0, 255, (h, w, 3), dtype=np.uint8) for w, h in STREAM_SIZES]
+    print(f"显示区域 {width}x{height}，每个刷新周期每路都有新帧")
+    print(f"  {'路数':<4} {'逐路显示':>8} {'合成(GUI缩放)':>10} {'合成(预先缩放)':>9} {'相对单路':>6} {'采集线程每路':>8}")
+
+    baseline = None
+    for count in (int(x) for x in args.views.split(",")):
+        images = [sources[i % len(sources)] for i in range(count)]
+        rows, columns = grid_shape(count)
+        cell_width, cell_height = width // columns, height // rows - TITLE_HEIGHT
+
+        start = time.perf_counter()
+        for i in range(args.frames):
+            legacy_refresh(images, cell_width, cell_height, 30.0 - (i % 3) * 0.1)
+        legacy = (time.perf_counter() - start) / args.frames
+
+        compositor = TileCompositor(lambda w, h, text: np.zeros((h, w, 3), np.uint8))
+        for index in range(count):
+            compositor.add_view(index, str(index), "")
+        compositor.resize(width, height)
+        fps = [30.0]
+
+        def overlay(stream, frame, text):
+            for line, content in enumerate(overlay_lines(fps[0]), 1):
+                text(line, content)
+
+        results = []
+        for prescale in (False, True):
+            gui_time = capture_time = 0.0
+            for i in range(args.frames):
+                fps[0] = 30.0 - (i % 3) * 0.1
+                frames = [Frame(image, seq, 0.0) for seq, image in enumerate(images, args.frames * prescale + i)]
+                if prescale:
+                    # 实际在各设备的采集线程中并行进行
+                    start = time.perf_counter()
+                    for stream, frame in enumerate(frames):
+                        compositor.on_frame(stream, frame)
+                    capture_time += time.perf_counter() - start
+                start = time.perf_counter()
+                compositor.compose(frames.__getitem__, overlay, lambda stream: None)
+                compositor.canvas.copy()
+                gui_time += time.perf_counter() - start
+            results.append((gui_time / args.frames, capture_time / args.frames / count))
+        if baseline is None:
+            baseline = results[1][0]
+        print(f"  {count:<6} {legacy * 1000:8.2f} ms {results[0][0] * 1000:8.2f} ms {results[1][0] * 1000:8.2f} ms "
+              f"{results[1][0] / baseline:8.2f}x {results[1][1] * 1000:8.2f} ms")
+    print(f"文字位图命中 {compositor.sprites.hits}/{compositor.sprites.hits + compositor.sprites.misses}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
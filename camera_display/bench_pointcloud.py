@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+点云生成性能测试
+用模拟的z16深度图（起伏的曲面 + 噪声 + 10%无效像素）统计不同降采样设置下
+每帧生成点云的耗时（对比帧间隔）、点数，以及CPU预览的渲染耗时和PLY导出耗时
+
+用法:
+    python3 bench_pointcloud.py [--size 640x480] [--fps 30] [--frames 100]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from pointcloud import PointCloudGenerator, render_preview, write_ply
+
+# D405 在640x480下的典型深度内参
+D405_FOCAL_640 = 380.0
+DEPTH_SCALE = 0.0001
+
+SETTINGS = (
+    ("全分辨率", dict()),
+    ("全分辨率 + 彩色", dict(color=True)),
+    ("步长2 + 彩色", dict(stride=2, color=True)),
+    ("体素2mm + 彩色", dict(voxel=0.002, color=True)),
+    ("步长2 + 体素4mm", dict(stride=2, voxel=0.004)),
+)
+
+
+def synthetic_frame(width, height, rng):
+    """模拟深度（约0.2米处的起伏曲面）和彩色画面"""
+    v, u = np.mgrid[0:height, 0:width]
+    depth = 2000 + 300 * np.sin(u / 40.0) * np.cos(v / 60.0) + rng.normal(0, 3, (height, width))
+    raw = depth.astype(np.uint16)
+    raw[rng.random(raw.shape) < 0.1] = 0
+    color = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    return raw, color
+
+
+def main():
+    parser = argparse.ArgumentParser(description="点云生成性能测试")
+    parser.add_argument('--size', default="640x480", help="深度图尺寸")
+    parser.add_argument('--fps', type=float, default=30.0, help="采集帧率（用于对比帧间隔）")
+    parser.add_argument('--frames', type=int, default=100, help="每种设置的测试帧数")
+    args = parser.parse_args()
+
+    width, height = (int(x) for x in args.size.lower().split("x"))
+    focal = D405_FOCAL_640 * width / 640
+    intrinsics = {"width": width, "height": height, "fx": focal, "fy": focal,
+                  "ppx": width / 2, "ppy": height / 2, "coeffs": [0.0] * 5}
+    rng = np.random.default_rng(0)
+    frames = [synthetic_frame(width, height, rng) for _ in range(4)]
+    print(f"深度图 {width}x{height}，帧间隔 {1000 / args.fps:.1f} ms")
+
+    cloud = None
+    for name, setting in SETTINGS:
+        generator = PointCloudGenerator(setting.get("stride", 1), setting.get("voxel"))
+        times = []
+        for i in range(args.frames + 1):
+            raw, color = frames[i % len(frames)]
+            start = time.perf_counter()
+            cloud = generator.generate(raw, intrinsics, DEPTH_SCALE, color if setting.get("color") else None)
+            if i > 0:
+                # 第一帧包括建立视线方向表的耗时，不计入
+                times.append(time.perf_counter() - start)
+        times.sort()
+        print(f"  {name:<16} {len(cloud.points):>7} 个点  平均 {np.mean(times) * 1000:6.2f} ms  "
+              f"P99 {times[int(len(times) * 0.99) - 1] * 1000:6.2f} ms")
+
+    preview_cloud = PointCloudGenerator(2).generate(frames[0][0], intrinsics, DEPTH_SCALE, frames[0][1])
+    start = time.perf_counter()
+    for i in range(20):
+        render_preview(preview_cloud, 800, 600, yaw=i * 0.05, pitch=0.2, point_size=2)
+    print(f"预览渲染（步长2，800x600）: {(time.perf_counter() - start) / 20 * 1000:.2f} ms")
+
+    full = PointCloudGenerator().generate(frames[0][0], intrinsics, DEPTH_SCALE, frames[0][1])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cloud.ply")
+        start = time.perf_counter()
+        write_ply(path, full)
+        print(f"PLY导出（{len(full.points)} 个点，{os.path.getsize(path) / 1e6:.1f} MB）: "
+              f"{(time.perf_counter() - start) * 1000:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多路视频录制测试
+模拟三个图像流的采集线程按固定帧率发布画面（RealSense图像流的画面引用外部缓冲区，
+与驱动帧缓冲区一样需要复制），先不录制运行一轮，再录制运行一轮，比较:
+- 采集帧率和帧发布的延误（相对于计划时刻，P99）
+- 录像写入/丢弃的帧数、编码速度和文件大小
+
+用法:
+    python3 bench_recorder.py [--fps 30] [--usb-size 1280x720] [--duration 10] [--fourcc MJPG]
+    python3 bench_recorder.py --real        # 使用已连接的摄像头
+"""
+
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from video_recorder import VideoRecorder, DEFAULT_FOURCC, DROP_NEWEST, DROP_OLDEST
+
+# 与 camera_manager.CameraFrame 字段相同
+SyntheticFrame = namedtuple('SyntheticFrame', ['image', 'timestamp', 'seq', 'capture_time', 'raw'],
+                            defaults=(None,))
+
+
+class SyntheticCameras:
+    """模拟 CameraManager 的采集线程和帧订阅接口
+
+    参数:
+        fps (float): 帧率
+        sizes (dict): 各图像流的画面尺寸 {stream: (宽, 高)}
+        borrowed (tuple): 画面引用外部缓冲区的图像流
+        track_lateness (bool): 是否记录帧发布的延误（由take_stats取走；长时间运行且不取统计时应关闭）
+    """
+
+    def __init__(self, fps, sizes, borrowed=(), track_lateness=True):
+        self.fps_target = fps
+        self.sizes = sizes
+        self.borrowed = set(borrowed)
+        self.track_lateness = track_lateness
+        self.frames = {stream: None for stream in sizes}
+        self.fps = {stream: fps for stream in sizes}
+        self.frame_seq = {stream: 0 for stream in sizes}
+        self.rs_serial = "synthetic"
+        self.frame_listeners = ()
+        self.lateness = {stream: [] for stream in sizes}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.threads = [threading.Thread(target=self._capture_loop, args=(stream,), daemon=True) for stream in sizes]
+        for thread in self.threads:
+            thread.start()
+
+    def get_frame(self, stream):
+        return self.frames[stream]
+
+    def add_frame_listener(self, listener):
+        self.frame_listeners = self.frame_listeners + (listener,)
+
+    def remove_frame_listener(self, listener):
+        self.frame_listeners = tuple(l for l in self.frame_listeners if l != listener)
+
+    def _capture_loop(self, stream):
+        width, height = self.sizes[stream]
+        rng = np.random.default_rng()
+        base = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (15, 15), 0)
+        # 模拟驱动的帧池：画面直接引用池中的缓冲区
+        pool = [bytearray(base.tobytes()) for _ in range(4)]
+        period = 1.0 / self.fps_target
+        next_time = time.perf_counter()
+        while not self.stop_event.is_set():
+            next_time += period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.perf_counter()
+            seq = self.frame_seq[stream] + 1
+            if stream in self.borrowed:
+                image = np.frombuffer(pool[seq % len(pool)], np.uint8).reshape(height, width, 3)
+            else:
+                image = np.roll(base, seq % width, axis=1)
+                cv2.putText(image, str(seq), (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+            self.frame_seq[stream] = seq
+            frame = SyntheticFrame(image, time.time(), seq, time.monotonic())
+            self.frames[stream] = frame
+            for listener in self.frame_listeners:
+                listener(stream, frame)
+            if self.track_lateness:
+                with self.lock:
+                    self.lateness[stream].append(now - next_time)
+
+    def take_stats(self, elapsed):
+        """返回并清空统计: (每个图像流的帧率, 所有图像流发布延误的P99毫秒)"""
+        with self.lock:
+            lateness = self.lateness
+            self.lateness = {stream: [] for stream in self.sizes}
+        fps = {stream: len(values) / elapsed for stream, values in lateness.items()}
+        values = sorted(v for stream_values in lateness.values() for v in stream_values)
+        p99 = values[int(len(values) * 0.99)] * 1000 if values else 0.0
+        return fps, p99
+
+    def shutdown(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+
+
+class RealCameraStats:
+    """统计真实摄像头的采集帧率（按帧序号计算）"""
+
+    def __init__(self, cameras):
+        self.cameras = cameras
+        self.start_seq = dict(cameras.frame_seq)
+
+    def take_stats(self, elapsed):
+        seq = dict(self.cameras.frame_seq)
+        fps = {stream: (seq[stream] - self.start_seq[stream]) / elapsed for stream in seq}
+        self.start_seq = seq
+        return fps, 0.0
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def run_phase(source, duration):
+    source.take_stats(1.0)
+    start = time.perf_counter()
+    time.sleep(duration)
+    return source.take_stats(time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多路视频录制测试")
+    parser.add_argument('--fps', type=float, default=30.0, help="模拟采集帧率")
+    parser.add_argument('--usb-size', default="1280x720", help="模拟USB摄像头画面尺寸")
+    parser.add_argument('--rs-size', default="640x480", help="模拟RealSense画面尺寸")
+    parser.add_argument('--duration', type=float, default=10.0, help="每轮时长（秒）")
+    parser.add_argument('--fourcc', default=DEFAULT_FOURCC, help="编码格式")
+    parser.add_argument('--drop-policy', choices=(DROP_NEWEST, DROP_OLDEST), default=DROP_NEWEST)
+    parser.add_argument('--segment-seconds', type=float, default=5.0, help="分段时长（秒）")
+    parser.add_argument('--out', help="录制目录（默认使用临时目录，测试后删除）")
+    parser.add_argument('--real', action='store_true', help="使用已连接的摄像头")
+    args = parser.parse_args()
+
+    if args.real:
+        import camera_manager
+        cameras = camera_manager.CameraManager(lambda device, state, message: print(f"[{device}] {message}"))
+        cameras.open_all()
+        time.sleep(3.0)
+        source = RealCameraStats(cameras)
+    else:
+        rs_size = parse_size(args.rs_size)
+        cameras = SyntheticCameras(args.fps, {"usb_color": parse_size(args.usb_size), "rs_color": rs_size,
+                                              "rs_depth": rs_size}, borrowed=("rs_color", "rs_depth"))
+        source = cameras
+    streams = [stream for stream in cameras.frames if cameras.get_frame(stream) is not None] or list(cameras.frames)
+    root = args.out or tempfile.mkdtemp(prefix="bench_recorder_")
+
+    try:
+        fps, p99 = run_phase(source, args.duration)
+        print("不录制: " + "，".join(f"{s} {v:.2f} fps" for s, v in fps.items()) + f"，发布延误P99 {p99:.2f} ms")
+
+        recorder = VideoRecorder(cameras, streams, root, args.fourcc, args.drop_policy, args.segment_seconds)
+        path = recorder.start()
+        cpu_start = time.process_time()
+        fps, p99 = run_phase(source, args.duration)
+        cpu = (time.process_time() - cpu_start) / args.duration * 100
+        meta = recorder.stop()
+        print("录制中: " + "，".join(f"{s} {v:.2f} fps" for s, v in fps.items()) +
+              f"，发布延误P99 {p99:.2f} ms，进程CPU {cpu:.0f}%")
+        for stream, stats in meta["streams"].items():
+            size = sum(segment.get("bytes", 0) for segment in stats["segments"])
+            print(f"  {stream}: 收到 {stats['received']}，写入 {stats['written']}，丢弃 {stats['dropped']}，"
+                  f"复制 {stats['copied']}，队列最大深度 {stats['max_queue_depth']}，"
+                  f"{len(stats['segments'])} 个分段共 {size / 1e6:.1f} MB")
+        print(f"录制目录: {path}")
+    finally:
+        cameras.shutdown()
+        if args.out is None:
+            shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+RealSense配置和深度滤波测试
+按 camera_profiles.json 中的每个配置打开RealSense（或回放录制的 .bag 文件），
+依次测试不同的滤波组合，统计:
+- 每个滤波和着色的平均耗时，以及采集线程每帧的总处理耗时（对比帧间隔）
+- 实际帧率
+- 深度有效率（非零像素比例）
+- 时间噪声：静止场景下每个像素深度在连续帧间的标准差（所有像素的中位数，毫米）
+
+测试时摄像头应对准静止场景
+
+用法:
+    python3 bench_rs_filters.py [--profiles default fast] [--frames 150]
+    python3 bench_rs_filters.py --bag scene.bag       # 回放录制文件（不需要连接设备）
+"""
+
+import sys
+import time
+import argparse
+
+import numpy as np
+import pyrealsense2 as rs
+
+from rs_processing import load_profiles, format_profile, DepthFilterChain, FILTER_ORDER, FILTER_TEXT
+
+# 开始统计前丢弃的帧数（自动曝光和时间滤波需要稳定）
+WARMUP_FRAMES = 30
+
+
+def filter_combinations(config):
+    """要测试的滤波组合: 不滤波、每个滤波单独开启、配置中开启的全部滤波"""
+    combos = [("不滤波", ())]
+    combos += [(FILTER_TEXT[name], (name,)) for name in FILTER_ORDER]
+    enabled = tuple(name for name in FILTER_ORDER if config.filters.get(name, {}).get("enabled"))
+    if len(enabled) > 1:
+        combos.append(("配置: " + "+".join(FILTER_TEXT[name] for name in enabled), enabled))
+    return combos
+
+
+def measure(pipeline, chain, colorizer, frames):
+    """处理指定帧数，返回统计结果"""
+    for _ in range(WARMUP_FRAMES):
+        chain.process(pipeline.wait_for_frames().get_depth_frame())
+    chain.timings.clear()
+    depths = []
+    fill = []
+    total = []
+    start = time.perf_counter()
+    for _ in range(frames):
+        depth_frame = pipeline.wait_for_frames().get_depth_frame()
+        t0 = time.perf_counter()
+        depth_frame = chain.process(depth_frame)
+        t1 = time.perf_counter()
+        np.asanyarray(colorizer.colorize(depth_frame).get_data())
+        t2 = time.perf_counter()
+        chain.record("colorize", t2 - t1)
+        total.append(t2 - t0)
+        raw = np.asanyarray(depth_frame.get_data())
+        fill.append(np.count_nonzero(raw) / raw.size)
+        depths.append(raw.astype(np.float32))
+    elapsed = time.perf_counter() - start
+    stack = np.stack(depths)
+    valid = np.all(stack > 0, axis=0)
+    noise = float(np.median(stack[:, valid].std(axis=0))) if valid.any() else float("nan")
+    return {
+        "fps": frames / elapsed,
+        "total_ms": float(np.mean(total)) * 1000,
+        "steps": chain.timing_summary(),
+        "fill": float(np.mean(fill)),
+        "noise": noise,
+        "size": (stack.shape[2], stack.shape[1]),
+    }
+
+
+def run_profile(config, frames, bag=None):
+    pipeline = rs.pipeline()
+    rs_config = rs.config()
+    if bag:
+        rs_config.enable_device_from_file(bag, repeat_playback=True)
+    rs_config.enable_stream(rs.stream.depth, config.depth.width, config.depth.height,
+                            getattr(rs.format, config.depth.format), config.depth.fps)
+    profile = pipeline.start(rs_config)
+    scale_mm = profile.get_device().first_depth_sensor().get_depth_scale() * 1000
+    colorizer = rs.colorizer()
+    print(f"\n配置 {config.name}: 深度 {format_profile(config.depth)}，帧间隔 {1000 / config.depth.fps:.1f} ms")
+    try:
+        for text, names in filter_combinations(config):
+            filters = {name: dict(config.filters.get(name, {}), enabled=name in names) for name in FILTER_ORDER}
+            result = measure(pipeline, DepthFilterChain(filters), colorizer, frames)
+            steps = "，".join(f"{name} {stats['mean_ms']:.2f}" for name, stats in result["steps"].items())
+            print(f"  {text:<24} {result['size'][0]}x{result['size'][1]}  {result['fps']:5.1f} fps  "
+                  f"处理 {result['total_ms']:6.2f} ms/帧  有效率 {result['fill'] * 100:5.1f}%  "
+                  f"噪声 {result['noise'] * scale_mm:5.2f} mm  ({steps})")
+    finally:
+        pipeline.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RealSense配置和深度滤波测试")
+    parser.add_argument('--profiles', nargs='*', help="要测试的配置名称（默认全部）")
+    parser.add_argument('--config', help="配置文件（默认 camera_profiles.json）")
+    parser.add_argument('--frames', type=int, default=150, help="每个组合统计的帧数")
+    parser.add_argument('--bag', help="回放录制的 .bag 文件")
+    args = parser.parse_args()
+
+    profiles, _ = load_profiles(args.config)
+    names = args.profiles or list(profiles)
+    unknown = [name for name in names if name not in profiles]
+    if unknown:
+        print(f"配置文件中没有: {', '.join(unknown)}")
+        return 1
+    for name in names:
+        try:
+            run_profile(profiles[name], args.frames, args.bag)
+        except RuntimeError as e:
+            print(f"配置 {name} 测试失败: {e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
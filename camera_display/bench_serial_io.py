@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+串口读取方式对比测试
+用伪终端(pty)模拟N个夹爪串口，每个串口按固定频率发送AS5047数据，
+分别测试"每个串口一个读取线程"和"共享I/O事件循环"两种方式下：
+- 读取端CPU占用（占单核百分比，已扣除模拟发送线程自身的CPU时间）
+- 数据延迟（从写入pty到回调收到数据）的中位数和P99
+
+用法:
+    python3 bench_serial_io.py [--ports 1 4 16 64] [--rate 100] [--duration 5]
+"""
+
+import os
+import sys
+import time
+import json
+import tty
+import argparse
+import threading
+import statistics
+
+from gripper_control import GripperController
+from serial_io import SerialIoLoop
+
+
+def open_pty():
+    """创建一个伪终端，返回(主端fd, 从端设备路径)"""
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(slave_fd)
+    path = os.ttyname(slave_fd)
+    return master_fd, slave_fd, path
+
+
+def run(num_ports, rate, duration, use_loop):
+    """运行一次测试
+
+    返回:
+        dict: cpu（读取端占单核百分比）、p50/p99（延迟毫秒）、received/sent（收发数量）
+    """
+    ptys = [open_pty() for _ in range(num_ports)]
+    send_times = [dict() for _ in range(num_ports)]
+    latencies = []
+    latencies_lock = threading.Lock()
+    io_loop = SerialIoLoop() if use_loop else None
+
+    controllers = []
+    for index, (_, _, path) in enumerate(ptys):
+        def callback(angle, distance, timestamp, index=index):
+            now = time.perf_counter()
+            sent = send_times[index].pop(int(distance), None)
+            if sent is not None:
+                with latencies_lock:
+                    latencies.append(now - sent)
+        controller = GripperController(io_loop=io_loop)
+        if not controller.connect(path):
+            raise RuntimeError(f"无法打开 {path}")
+        controller.start_data_reception(callback)
+        controllers.append(controller)
+
+    # 模拟发送：一个线程按频率轮流向所有串口写数据，distance字段携带序号
+    stop = threading.Event()
+    writer_cpu = [0.0]
+    sent_count = [0]
+
+    def writer():
+        start_cpu = time.thread_time()
+        period = 1.0 / rate
+        next_time = time.perf_counter()
+        seq = 0
+        while not stop.is_set():
+            seq += 1
+            for index, (master_fd, _, _) in enumerate(ptys):
+                payload = json.dumps({"AS5047": {"rad": 1.7, "distance": seq}}) + "\r\n"
+                send_times[index][seq] = time.perf_counter()
+                os.write(master_fd, payload.encode('utf-8'))
+                sent_count[0] += 1
+            next_time += period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        writer_cpu[0] = time.thread_time() - start_cpu
+
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    writer_thread.start()
+    time.sleep(duration)
+    stop.set()
+    writer_thread.join()
+    time.sleep(0.2)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start - writer_cpu[0]
+
+    for controller in controllers:
+        controller.stop_data_reception()
+        controller.disconnect()
+    if io_loop is not None:
+        io_loop.stop()
+    for master_fd, slave_fd, _ in ptys:
+        os.close(master_fd)
+        os.close(slave_fd)
+
+    with latencies_lock:
+        values = sorted(latencies)
+    return {
+        'cpu': cpu / wall * 100.0,
+        'p50': statistics.median(values) * 1000 if values else float('nan'),
+        'p99': values[int(len(values) * 0.99) - 1] * 1000 if values else float('nan'),
+        'received': len(values),
+        'sent': sent_count[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="串口读取方式对比测试")
+    parser.add_argument('--ports', type=int, nargs='+', default=[1, 4, 16, 64], help="模拟串口数量")
+    parser.add_argument('--rate', type=float, default=100.0, help="每个串口的发送频率(Hz)")
+    parser.add_argument('--duration', type=float, default=5.0, help="每次测试时长（秒）")
+    args = parser.parse_args()
+
+    print(f"{'串口数':<8}{'方式':<10}{'CPU(%)':>10}{'P50(ms)':>10}{'P99(ms)':>10}{'收到/发送':>16}")
+    for num_ports in args.ports:
+        for use_loop in (False, True):
+            result = run(num_ports, args.rate, args.duration, use_loop)
+            mode = "事件循环" if use_loop else "线程"
+            print(f"{num_ports:<8}{mode:<10}{result['cpu']:>10.1f}{result['p50']:>10.2f}"
+                  f"{result['p99']:>10.2f}{result['received']:>8}/{result['sent']:<8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
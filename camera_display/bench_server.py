@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+远程查看服务负载测试
+模拟采集线程按固定帧率发布画面（或使用真实摄像头），分别在 0/10/20... 个MJPEG客户端
+（另加同样数量的WebSocket数据客户端，数据来自100Hz的模拟夹爪）连接时统计:
+- 采集帧率和帧发布的延误（相对于计划时刻，P99），用于确认客户端数量不影响本地采集
+- 每个客户端实际收到的帧率，以及JPEG编码次数（所有客户端共享同一次编码）
+
+客户端在独立进程中运行，不与服务端争抢GIL
+
+用法:
+    python3 bench_server.py [--viewers 0 10 20] [--fps 30] [--client-fps 30] [--duration 10]
+    python3 bench_server.py --real          # 使用已连接的摄像头
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+import subprocess
+import statistics
+
+from gripper_control import GripperSample
+from station_server import StationServer, ws_read_frame, MJPEG_BOUNDARY
+
+SYNTHETIC_STREAMS = ("usb_color", "rs_color", "rs_depth")
+
+
+class SyntheticFrame:
+    """与 camera_manager.CameraFrame 字段相同的模拟帧"""
+
+    __slots__ = ("image", "timestamp", "seq", "capture_time")
+
+    def __init__(self, image, timestamp, seq, capture_time):
+        self.image = image
+        self.timestamp = timestamp
+        self.seq = seq
+        self.capture_time = capture_time
+
+
+class SyntheticCameras:
+    """模拟 CameraManager 的采集线程：每个图像流一个线程，按固定帧率生成画面
+
+    参数:
+        fps (float): 帧率
+        width, height (int): 画面尺寸
+    """
+
+    def __init__(self, fps, width=640, height=480):
+        import numpy as np
+        import cv2
+        self.np = np
+        self.cv2 = cv2
+        self.fps_target = fps
+        self.width = width
+        self.height = height
+        self.frames = {stream: None for stream in SYNTHETIC_STREAMS}
+        self.fps = {stream: 0.0 for stream in SYNTHETIC_STREAMS}
+        self.frame_seq = {stream: 0 for stream in SYNTHETIC_STREAMS}
+        self.states = {"synthetic": "ready"}
+        # 每个图像流的发布延误（秒）
+        self.lateness = {stream: [] for stream in SYNTHETIC_STREAMS}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.threads = [threading.Thread(target=self._capture_loop, args=(stream,), daemon=True)
+                        for stream in SYNTHETIC_STREAMS]
+        for thread in self.threads:
+            thread.start()
+
+    def get_frame(self, stream):
+        return self.frames[stream]
+
+    def _capture_loop(self, stream):
+        np, cv2 = self.np, self.cv2
+        rng = np.random.default_rng()
+        base = rng.integers(0, 255, (self.height, self.width, 3), dtype=np.uint8)
+        base = cv2.GaussianBlur(base, (15, 15), 0)
+        period = 1.0 / self.fps_target
+        next_time = time.perf_counter()
+        while not self.stop_event.is_set():
+            next_time += period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.perf_counter()
+            # 与真实采集线程相当的每帧工作量：拷贝画面并绘制文字
+            seq = self.frame_seq[stream] + 1
+            image = np.roll(base, seq % self.width, axis=1)
+            cv2.putText(image, str(seq), (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+            self.frame_seq[stream] = seq
+            self.frames[stream] = SyntheticFrame(image, time.time(), seq, time.monotonic())
+            with self.lock:
+                self.lateness[stream].append(now - next_time)
+
+    def take_stats(self, elapsed):
+        """返回并清空统计: (每个图像流的帧率, 所有图像流发布延误的P99毫秒)"""
+        with self.lock:
+            lateness = self.lateness
+            self.lateness = {stream: [] for stream in SYNTHETIC_STREAMS}
+        fps = {stream: len(values) / elapsed for stream, values in lateness.items()}
+        values = sorted(v for stream_values in lateness.values() for v in stream_values)
+        p99 = values[int(len(values) * 0.99)] * 1000 if values else 0.0
+        return fps, p99
+
+    def shutdown(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+
+
+class SyntheticGripper:
+    """模拟夹爪：按固定频率更新数据快照，只提供远程服务读取的接口
+
+    参数:
+        rate (float): 数据频率
+    """
+
+    def __init__(self, rate=100.0):
+        self.port = "synthetic"
+        self.enabled = False
+        self.info_seq = 0
+        self.latest_sample = GripperSample(0.0, 0.0, 0, 0, 0.0)
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(rate,), daemon=True)
+        self.thread.start()
+
+    def _run(self, rate):
+        seq = 0
+        while not self.stop_event.wait(1.0 / rate):
+            seq += 1
+            self.latest_sample = GripperSample(1.7 + (seq % 10) * 0.001, 0.0, time.time(), seq, time.monotonic())
+
+    def is_connected(self):
+        return True
+
+    def get_latest_sample(self):
+        return self.latest_sample
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class RealCameraStats:
+    """统计真实摄像头在测试期间的采集帧率（按帧序号计算）"""
+
+    def __init__(self, cameras):
+        self.cameras = cameras
+        self.start_seq = dict(cameras.frame_seq)
+
+    def take_stats(self, elapsed):
+        seq = dict(self.cameras.frame_seq)
+        fps = {stream: (seq[stream] - self.start_seq[stream]) / elapsed for stream in seq}
+        self.start_seq = seq
+        return fps, 0.0
+
+
+# ---- 客户端（独立进程） ----
+
+async def mjpeg_client(host, port, stream, fps, deadline, counts):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /stream/{stream}.mjpg?fps={fps} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await reader.readuntil(b"\r\n\r\n")
+    try:
+        while time.monotonic() < deadline:
+            await reader.readuntil(b"--" + MJPEG_BOUNDARY + b"\r\n")
+            headers = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+            length = int(headers.lower().split("content-length:")[1].split("\r\n")[0])
+            await reader.readexactly(length + 2)
+            counts["frames"] += 1
+            counts["bytes"] += length
+    finally:
+        writer.close()
+
+
+async def ws_client(host, port, deadline, counts):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /ws/telemetry?hz=30 HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\n"
+                 "Connection: Upgrade\r\nSec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n"
+                 "Sec-WebSocket-Version: 13\r\n\r\n".encode())
+    await reader.readuntil(b"\r\n\r\n")
+    try:
+        while True:
+            await asyncio.wait_for(ws_read_frame(reader), max(0.01, deadline - time.monotonic()))
+            counts["messages"] += 1
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        writer.close()
+
+
+async def run_clients(host, port, streams, viewers, fps, duration):
+    deadline = time.monotonic() + duration
+    counts = [{"frames": 0, "bytes": 0} for _ in range(viewers)]
+    ws_counts = {"messages": 0}
+    tasks = [mjpeg_client(host, port, streams[i % len(streams)], fps, deadline, counts[i]) for i in range(viewers)]
+    tasks += [ws_client(host, port, deadline, ws_counts) for _ in range(viewers)]
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {"viewer_fps": [c["frames"] / duration for c in counts],
+            "mbytes": sum(c["bytes"] for c in counts) / 1e6,
+            "ws_messages": ws_counts["messages"]}
+
+
+def client_main(args):
+    result = asyncio.run(run_clients(args.host, args.port, args.streams.split(","), args.clients,
+                                     args.client_fps, args.duration))
+    print(json.dumps(result))
+    return 0
+
+
+# ---- 测试主流程 ----
+
+def measure(server, source, streams, viewers, args):
+    """在指定客户端数量下测试一轮"""
+    client = None
+    if viewers > 0:
+        client = subprocess.Popen(
+            [sys.executable, __file__, "--client", "--host", server.host, "--port", str(server.port),
+             "--streams", ",".join(streams), "--clients", str(viewers),
+             "--client-fps", str(args.client_fps), "--duration", str(args.duration)],
+            stdout=subprocess.PIPE, text=True)
+    # 客户端连接需要一点时间，丢弃开头的统计
+    time.sleep(1.0)
+    encodes = server.encoder.encodes
+    source.take_stats(1.0)
+    start = time.perf_counter()
+    time.sleep(args.duration - 1.5 if viewers > 0 else args.duration)
+    elapsed = time.perf_counter() - start
+    fps, p99 = source.take_stats(elapsed)
+    encodes = (server.encoder.encodes - encodes) / elapsed
+    result = {"viewers": viewers, "capture_fps": fps, "lateness_p99_ms": p99, "encodes_per_s": encodes}
+    if client is not None:
+        output, _ = client.communicate(timeout=args.duration + 10)
+        result.update(json.loads(output.strip().splitlines()[-1]))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="远程查看服务负载测试")
+    parser.add_argument('--viewers', type=int, nargs='+', default=[0, 10, 20], help="MJPEG客户端数量")
+    parser.add_argument('--fps', type=float, default=30.0, help="模拟采集帧率")
+    parser.add_argument('--client-fps', type=float, default=30.0, help="每个客户端请求的预览帧率")
+    parser.add_argument('--duration', type=float, default=10.0, help="每轮测试时长（秒）")
+    parser.add_argument('--real', action='store_true', help="使用已连接的摄像头")
+    # 以下参数用于客户端进程
+    parser.add_argument('--client', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--host', default="127.0.0.1", help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument('--streams', default="", help=argparse.SUPPRESS)
+    parser.add_argument('--clients', type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.client:
+        return client_main(args)
+
+    if args.real:
+        import camera_manager
+        cameras = camera_manager.CameraManager(lambda device, state, message: print(f"[{device}] {message}"))
+        cameras.open_all()
+        time.sleep(3.0)
+        source = RealCameraStats(cameras)
+    else:
+        cameras = SyntheticCameras(args.fps)
+        source = cameras
+    streams = [stream for stream in cameras.frames if cameras.get_frame(stream) is not None] or list(cameras.frames)
+
+    gripper = SyntheticGripper()
+    server = StationServer(cameras, grippers={"sense": gripper}, port=0)
+    if not server.start():
+        gripper.stop()
+        cameras.shutdown()
+        return 1
+
+    results = []
+    try:
+        for viewers in args.viewers:
+            result = measure(server, source, streams, viewers, args)
+            results.append(result)
+            capture = statistics.mean(result["capture_fps"].values())
+            line = (f"客户端 {viewers:3d}: 采集帧率 {capture:6.2f}，发布延误P99 {result['lateness_p99_ms']:6.2f} ms，"
+                    f"编码 {result['encodes_per_s']:6.1f} 次/秒")
+            if viewers > 0:
+                line += (f"，客户端帧率 {statistics.mean(result['viewer_fps']):5.1f}"
+                         f"（最低 {min(result['viewer_fps']):5.1f}），"
+                         f"{result['mbytes'] / args.duration:5.1f} MB/s，WebSocket 消息 {result['ws_messages']}")
+            print(line, flush=True)
+    finally:
+        server.stop()
+        gripper.stop()
+        cameras.shutdown()
+
+    baseline = statistics.mean(results[0]["capture_fps"].values())
+    worst = min(statistics.mean(result["capture_fps"].values()) for result in results)
+    print(f"采集帧率: 无客户端 {baseline:.2f}，最低 {worst:.2f}（{(worst - baseline) / baseline * 100:+.1f}%）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
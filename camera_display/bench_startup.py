@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+启动耗时测试
+多次以测试模式启动 camera_display.py，分别统计：
+- 模块导入耗时（PyQt5及本地模块、NumPy/OpenCV/pyrealsense2）
+- 界面构建耗时
+- 窗口显示时间
+- 第一帧画面显示时间（time-to-first-frame）
+
+用法:
+    python3 bench_startup.py [运行次数]
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+import statistics
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "camera_display.py")
+
+
+def run_once():
+    """以测试模式启动一次程序，返回启动耗时记录"""
+    env = dict(os.environ, PIKA_STARTUP_BENCH="1")
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, SCRIPT], env=env, capture_output=True,
+                          text=True, timeout=60)
+    wall = time.perf_counter() - start
+    for line in proc.stdout.splitlines():
+        if line.startswith("STARTUP_BENCH "):
+            result = json.loads(line[len("STARTUP_BENCH "):])
+            result['process_wall'] = wall
+            return result
+    print(proc.stdout)
+    print(proc.stderr)
+    raise RuntimeError("程序未输出启动耗时")
+
+
+def summarize(results):
+    """汇总多次运行结果（中位数，单位毫秒）"""
+    def median_ms(values):
+        values = [v for v in values if v is not None]
+        if not values:
+            return "-"
+        return f"{statistics.median(values) * 1000:.1f} ms"
+
+    rows = [
+        ("模块导入（PyQt5及本地模块）", [r.get('imports') for r in results]),
+        ("  NumPy", [r['heavy_imports'].get('numpy') for r in results]),
+        ("  OpenCV", [r['heavy_imports'].get('cv2') for r in results]),
+        ("  pyrealsense2", [r['heavy_imports'].get('pyrealsense2') for r in results]),
+        ("界面构建", [r['ui_built'] - r['ui_build_start'] for r in results]),
+        ("窗口显示", [r.get('window_shown') for r in results]),
+        ("重型模块加载完成", [r.get('modules_loaded') for r in results]),
+        ("设备枚举完成", [r.get('devices_enumerated') for r in results]),
+        ("第一帧画面", [r.get('first_frame') for r in results]),
+    ]
+    for name, values in rows:
+        print(f"{name:<24}{median_ms(values):>12}")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    results = []
+    for i in range(runs):
+        result = run_once()
+        print(f"第 {i + 1}/{runs} 次: 窗口显示 {result.get('window_shown', 0) * 1000:.1f} ms")
+        results.append(result)
+    print(f"\n{runs} 次启动耗时中位数（从进程开始导入 camera_display 计时）:")
+    summarize(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,81 +11,249 @@ Qt摄像头显示程序
 """
 
 import sys
-import cv2
-import numpy as np
-import pyrealsense2 as rs
 import time
+_STARTUP_T0 = time.perf_counter()
 import os
+import glob
 import json
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QImage, QPixmap, QFont
+import importlib
+import threading
+from PyQt5.QtCore import Qt, QTimer, QObject, pyqtSignal
+from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QLabel, 
                             QPushButton, QVBoxLayout, QHBoxLayout, QGridLayout,
-                            QMessageBox, QFrame, QSlider, QComboBox, QGroupBox,
-                            QLineEdit)
+                            QMessageBox, QSlider, QComboBox, QGroupBox,
+                            QLineEdit, QSpinBox, QCheckBox)
 from gripper_control import GripperController, list_serial_ports
+from serial_io import get_default_loop
+from station_log import setup_logging, shutdown_logging
+from sense_panel import (SensePanelViewModel, STATUS_CONNECTED, STATUS_STALE)
+from sn_provision import write_and_verify_sn
+from rules_engine import RulesEngine, InRangeRule, DEFAULT_RULES_PATH
+from time_sync import TimeSync
+from stream_health import StreamHealthMonitor, HEALTH_OK, HEALTH_UNKNOWN
+from results_db import (ResultsDB, KIND_GRIPPER, KIND_SENSE, KIND_REALSENSE,
+                        TEST_ANGLE, TEST_SN_WRITE, VERDICT_PASS, VERDICT_FAIL)
+from station_server import StationServer, parse_address
+from render_scheduler import display_fps_limit
+from compositor_widget import CompositorWidget
+from station_profile import StationProfile, ROLE_GRIPPER, ROLE_SENSE
+_IMPORT_DONE = time.perf_counter()
+
+# 重型模块（NumPy、OpenCV、pyrealsense2）在窗口显示之后由后台线程加载
+np = None
+cv2 = None
+rs = None
+camera_manager = None
+telemetry_recorder = None
+
+# 画面上叠加夹爪角度时，夹爪样本与帧采集时刻的最大时间差（秒），超过则不显示
+SYNC_OVERLAY_MAX_GAP = 0.1
+
+# 设置该环境变量后程序会自动打开摄像头，输出启动耗时并在第一帧显示后退出
+STARTUP_BENCH = os.environ.get("PIKA_STARTUP_BENCH") == "1"
+
+def load_heavy_modules():
+    """加载重型模块
+    
+    返回:
+        dict: 各模块的导入耗时（秒）
+    """
+    global np, cv2, rs, camera_manager, telemetry_recorder
+    modules = {}
+    timings = {}
+    for name in ("numpy", "cv2", "pyrealsense2", "camera_manager", "telemetry_recorder"):
+        start = time.perf_counter()
+        modules[name] = importlib.import_module(name)
+        timings[name] = time.perf_counter() - start
+    np = modules["numpy"]
+    cv2 = modules["cv2"]
+    rs = modules["pyrealsense2"]
+    camera_manager = modules["camera_manager"]
+    telemetry_recorder = modules["telemetry_recorder"]
+    return timings
+
+def enumerate_camera_devices():
+    """枚举相机设备（只查询设备列表，不打开设备）
+    
+    返回:
+        dict: {'realsense': [序列号, ...], 'video': [/dev/videoX, ...]}
+    """
+    devices = {'realsense': [], 'video': []}
+    try:
+        for device in rs.context().query_devices():
+            devices['realsense'].append(device.get_info(rs.camera_info.serial_number))
+    except Exception as e:
+        print(f"枚举RealSense设备失败: {e}")
+    devices['video'] = sorted(glob.glob('/dev/video*'))
+    return devices
+
+class GripperDataSignal(QObject):
+    """夹爪数据通知信号
+    
+    由数据接收线程调用 notify()，以排队信号的方式投递到GUI线程。
+    GUI线程取走数据之前的多次通知会被合并为一次。
+    """
+    data_ready = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pending = False
+
+    def notify(self):
+        """通知有新数据（数据接收线程调用）"""
+        if not self._pending:
+            self._pending = True
+            self.data_ready.emit()
+
+    def consume(self):
+        """标记数据已被GUI线程取走（GUI线程调用）"""
+        self._pending = False
+
+class StartupSignals(QObject):
+    """后台启动线程向GUI线程汇报进度的信号"""
+    progress = pyqtSignal(str)
+    modules_loaded = pyqtSignal(object)
+    modules_failed = pyqtSignal(str)
+    devices_enumerated = pyqtSignal(object)
+
+class CameraSignals(QObject):
+    """摄像头工作线程向GUI线程汇报状态的信号"""
+    device_status = pyqtSignal(str, str, str)
+    open_finished = pyqtSignal(object)
+
+class SnWriteSignals(QObject):
+    """SN码写入校验线程向GUI线程汇报结果的信号"""
+    finished = pyqtSignal(str, str, bool, str)  # 设备名称, SN码, 是否成功, 错误信息
+
+class SnapshotSignals(QObject):
+    """快照/连拍写入线程向GUI线程汇报完成的信号"""
+    finished = pyqtSignal(object)  # CaptureJob
+
+class ServerSignals(QObject):
+    """远程服务线程向GUI线程转发请求的信号"""
+    test_restart = pyqtSignal()
+
+class StationSignals(QObject):
+    """已知夹爪自动连接线程向GUI线程汇报结果的信号"""
+    gripper_opened = pyqtSignal(str, str, bool)  # 角色, 串口, 是否成功
 
 class CameraDisplayApp(QMainWindow):
     def __init__(self):
         super().__init__()
         
+        # 启动耗时记录（相对于进程开始导入本模块的时间，单位秒）
+        self.startup_marks = {'imports': _IMPORT_DONE - _STARTUP_T0}
+        self.heavy_import_timings = {}
+        self.mark_startup('ui_build_start')
+        self.modules_ready = False
+        self.detected_devices = {'realsense': [], 'video': []}
+        
         # 设置窗口标题和大小
         self.setWindowTitle("pika 质检软件")
         self.setMinimumSize(1920, 900)  # 增加高度以容纳夹爪控制和数据显示区域
         
-        # 初始化变量
-        self.rs_pipeline = None
-        self.rs_depth_frame_available = False
-        self.rs_color_frame_available = False
-        self.usb_cam_available = False
-        self.usb_cam = None
-        self.colorizer = None
+        # 摄像头管理器（重型模块加载完成后创建），设备在其工作线程中打开和释放
+        self.cameras = None
+        self.camera_signals = CameraSignals(self)
+        self.camera_signals.device_status.connect(self.on_camera_status)
+        self.camera_signals.open_finished.connect(self.on_cameras_opened)
         
-        # 初始化夹爪控制器
-        self.gripper = GripperController()
+        # 初始化夹爪控制器（所有串口共用一个I/O事件循环线程）
+        self.gripper = GripperController(io_loop=get_default_loop(), name="gripper")
         self.gripper_enabled = False
         
         # 初始化夹爪数据接收器
-        self.sense_gripper = GripperController()
+        self.sense_gripper = GripperController(io_loop=get_default_loop(), name="sense")
         self.sense_data_receiving = False
         
-        # 窗口尺寸
+        # Sense夹爪数据判定规则（每个样本在数据接收线程中增量判定）
+        self.rules = self.load_rules()
+        
+        # Sense夹爪数据录制器（依赖NumPy，开始录制时创建）
+        self.telemetry_recorder = None
+        
+        # 质检结果数据库（后台线程批量写入），当前Sense测试的编号
+        self.results_db = ResultsDB()
+        self.sense_session = None
+        
+        # 摄像头帧与Sense夹爪样本的时间对齐，用于在画面上叠加同一时刻的夹爪角度
+        self.time_sync = TimeSync()
+        self.sense_gripper.add_sample_listener(self.time_sync.on_gripper_sample)
+        
+        # SN码写入在后台线程中进行，完成后回读校验
+        self.sn_write_signals = SnWriteSignals(self)
+        self.sn_write_signals.finished.connect(self.on_sn_write_finished)
+        
+        # 远程查看和控制服务（设置环境变量 PIKA_SERVER 时在摄像头管理器创建后启动）
+        self.station_server = None
+        self.server_signals = ServerSignals(self)
+        self.server_signals.test_restart.connect(self.restart_sense_test)
+        
+        # 画面显示区域的最小尺寸（实际尺寸随窗口变化）
         self.window_width = 640
         self.window_height = 480
         
-        # 初始化FPS计算变量
-        self.usb_fps_start_time = time.time()
-        self.rs_color_fps_start_time = time.time()
-        self.rs_depth_fps_start_time = time.time()
-        self.usb_frame_count = 0
-        self.rs_color_frame_count = 0
-        self.rs_depth_frame_count = 0
-        self.usb_fps = 0
-        self.rs_color_fps = 0
-        self.rs_depth_fps = 0
-        
-        # 创建占位图像
-        self.usb_placeholder = self.create_placeholder_image(self.window_width, self.window_height, "The USB camera is not connected")
-        self.rs_color_placeholder = self.create_placeholder_image(self.window_width, self.window_height, "The RealSense color camera is not connected")
-        self.rs_depth_placeholder = self.create_placeholder_image(self.window_width, self.window_height, "The RealSense depth camera is not connected")
+        # 快照/连拍保存器（依赖OpenCV，在重型模块加载完成后创建），编码和写盘在后台线程进行
+        self.snapshot_writer = None
+        self.snapshot_signals = SnapshotSignals(self)
+        self.snapshot_signals.finished.connect(self.on_snapshot_finished)
+        
+        # 多路视频录制器（依赖OpenCV，开始录像时创建），每个图像流一个编码线程
+        self.video_recorder = None
+        
+        # 点云预览窗口（第一次打开时创建）
+        self.pointcloud_window = None
+        
+        # RealSense配置 {名称: RealSenseConfig}（依赖pyrealsense2，在重型模块加载完成后读取）
+        self.rs_profiles = {}
+        self.filter_timing_timer = QTimer()
+        self.filter_timing_timer.timeout.connect(self.update_filter_timing)
+        
+        # 工位配置：记住的夹爪串口、摄像头和RealSense配置，启动时和设备插入时自动连接
+        self.station_profile = StationProfile.load()
+        print(f"工位配置: {self.station_profile.path}（{self.station_profile.describe()}）")
+        self.station_signals = StationSignals(self)
+        self.station_signals.gripper_opened.connect(self.on_station_gripper_opened)
+        # 正在自动连接的角色；暂不自动连接的 {角色: 串口}（手动断开或自动连接失败，设备拔出后清除）
+        self.station_connecting = set()
+        self.station_hold = {}
+        # 上一次刷新时的串口列表
+        self.serial_ports = None
         
         # 初始化UI
         self.init_ui()
+        self.mark_startup('ui_built')
+        
+        # 后台启动线程的进度信号
+        self.startup_signals = StartupSignals(self)
+        self.startup_signals.progress.connect(self.show_startup_progress)
+        self.startup_signals.modules_loaded.connect(self.on_modules_loaded)
+        self.startup_signals.modules_failed.connect(self.on_modules_failed)
+        self.startup_signals.devices_enumerated.connect(self.on_devices_enumerated)
         
-        # 创建定时器用于更新摄像头画面
+        # 创建定时器用于更新摄像头画面（重型模块加载完成后启动）
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frames)
-        self.timer.start(30)  # 约33FPS
         
         # 创建定时器用于定期刷新串口列表
         self.port_timer = QTimer()
         self.port_timer.timeout.connect(self.refresh_serial_ports)
-        self.port_timer.start(2000)  # 每2秒刷新一次
-        
-        # 创建定时器用于更新夹爪数据显示
+        self.port_timer.start(500)  # 每0.5秒刷新一次（只列出设备，串口列表变化时才更新下拉框）
+        
+        # 夹爪数据通过排队信号推送到GUI线程，刷新频率不超过屏幕刷新率
+        self.sense_data_signal = GripperDataSignal(self)
+        self.sense_data_signal.data_ready.connect(self.on_sense_data_ready, Qt.QueuedConnection)
+        self.data_display_interval = self.get_display_frame_interval()
+        self.last_data_display_time = 0
+        self.data_display_timer = QTimer()
+        self.data_display_timer.setSingleShot(True)
+        self.data_display_timer.timeout.connect(self.update_gripper_data_display)
+        
+        # 创建定时器用于检测夹爪数据是否中断（数据本身不再轮询）
         self.data_timer = QTimer()
-        self.data_timer.timeout.connect(self.update_gripper_data_display)
-        self.data_timer.start(100)  # 每100ms更新一次
+        self.data_timer.timeout.connect(self.check_gripper_data_timeout)
+        self.data_timer.start(250)  # 每250ms检查一次
     
     def init_ui(self):
         # 创建中央部件
@@ -95,55 +263,9 @@ class CameraDisplayApp(QMainWindow):
         # 创建主布局
         main_layout = QVBoxLayout(central_widget)
         
-        # 创建摄像头显示区域
-        camera_layout = QHBoxLayout()
-        
-        # USB摄像头显示区域
-        usb_frame = QFrame()
-        usb_frame.setFrameShape(QFrame.Box)
-        usb_frame.setLineWidth(2)
-        usb_layout = QVBoxLayout(usb_frame)
-        usb_title = QLabel("鱼眼图像")
-        usb_title.setAlignment(Qt.AlignCenter)
-        usb_title.setStyleSheet("font-weight: bold; font-size: 14px;")
-        self.usb_label = QLabel()
-        self.usb_label.setFixedSize(self.window_width, self.window_height)
-        self.usb_label.setAlignment(Qt.AlignCenter)
-        usb_layout.addWidget(usb_title)
-        usb_layout.addWidget(self.usb_label)
-        
-        # RealSense彩色摄像头显示区域
-        rs_color_frame = QFrame()
-        rs_color_frame.setFrameShape(QFrame.Box)
-        rs_color_frame.setLineWidth(2)
-        rs_color_layout = QVBoxLayout(rs_color_frame)
-        rs_color_title = QLabel("RGB 图像")
-        rs_color_title.setAlignment(Qt.AlignCenter)
-        rs_color_title.setStyleSheet("font-weight: bold; font-size: 14px;")
-        self.rs_color_label = QLabel()
-        self.rs_color_label.setFixedSize(self.window_width, self.window_height)
-        self.rs_color_label.setAlignment(Qt.AlignCenter)
-        rs_color_layout.addWidget(rs_color_title)
-        rs_color_layout.addWidget(self.rs_color_label)
-        
-        # RealSense深度摄像头显示区域
-        rs_depth_frame = QFrame()
-        rs_depth_frame.setFrameShape(QFrame.Box)
-        rs_depth_frame.setLineWidth(2)
-        rs_depth_layout = QVBoxLayout(rs_depth_frame)
-        rs_depth_title = QLabel("深度图像")
-        rs_depth_title.setAlignment(Qt.AlignCenter)
-        rs_depth_title.setStyleSheet("font-weight: bold; font-size: 14px;")
-        self.rs_depth_label = QLabel()
-        self.rs_depth_label.setFixedSize(self.window_width, self.window_height)
-        self.rs_depth_label.setAlignment(Qt.AlignCenter)
-        rs_depth_layout.addWidget(rs_depth_title)
-        rs_depth_layout.addWidget(self.rs_depth_label)
-        
-        # 添加三个摄像头显示区域到水平布局
-        camera_layout.addWidget(usb_frame)
-        camera_layout.addWidget(rs_color_frame)
-        camera_layout.addWidget(rs_depth_frame)
+        # 摄像头显示区域：所有图像流合成到同一个控件上（鱼眼图像、RGB图像、深度图像各占一格）
+        self.camera_view = CompositorWidget("正在加载...")
+        self.camera_view.setMinimumSize(self.window_width // 2 * 3, self.window_height // 2)
         
         # 创建夹爪控制区域
         gripper_group = QGroupBox("Gripper夹爪开合测试")
@@ -249,20 +371,16 @@ class CameraDisplayApp(QMainWindow):
         self.angle_display.setReadOnly(True)
         self.angle_display.setAlignment(Qt.AlignCenter)
         self.angle_display.setFont(QFont("Arial", 16))
-        self.angle_display.setStyleSheet("""
-            QLineEdit {
-                background-color: white;
-                color: black;
-                border: 1px solid #A0A0A0;
-                border-radius: 5px;
-                padding: 5px;
-                min-height: 30px;
-            }
-        """)
         
         # 数据接收状态
         self.data_status_label = QLabel("数据状态: 未连接")
-        self.data_status_label.setStyleSheet("color: red;")
+        
+        # 规则判定结果
+        self.verdict_label = QLabel()
+        
+        # 数据面板视图模型，样式只在状态切换时更新
+        self.sense_panel = SensePanelViewModel(self.angle_display, self.data_status_label,
+                                               self.verdict_label)
         
         # 添加控件到夹爪数据显示布局
         sense_layout.addWidget(sense_port_label, 0, 0)
@@ -271,7 +389,8 @@ class CameraDisplayApp(QMainWindow):
         sense_layout.addWidget(self.sense_connect_button, 0, 3)
         sense_layout.addWidget(angle_label, 1, 0)
         sense_layout.addWidget(self.angle_display, 1, 1, 1, 3)
-        sense_layout.addWidget(self.data_status_label, 2, 0, 1, 4)
+        sense_layout.addWidget(self.data_status_label, 2, 0, 1, 1)
+        sense_layout.addWidget(self.verdict_label, 2, 1, 1, 3)
 
         # Sense夹爪固件版本显示
         self.sense_gripper_version_label = QLabel("Sense固件版本: 未查询到")
@@ -290,6 +409,16 @@ class CameraDisplayApp(QMainWindow):
         # sense_layout.addWidget(QLabel("SN码:"), 4, 0)
         sense_layout.addWidget(self.sense_sn_input, 4, 1, 1, 2)
         sense_layout.addWidget(self.sense_sn_btn, 4, 3)
+        
+        # 数据录制（写入二进制文件，可导出CSV离线分析）
+        self.record_button = QPushButton("开始录制")
+        self.record_button.setCheckable(True)
+        self.record_button.setEnabled(False)
+        self.record_button.toggled.connect(self.toggle_telemetry_recording)
+        self.record_status_label = QLabel("")
+        self.record_status_label.setStyleSheet("font-size: 13px; color: gray;")
+        sense_layout.addWidget(self.record_button, 5, 0)
+        sense_layout.addWidget(self.record_status_label, 5, 1, 1, 3)
 
         # 创建摄像头控制按钮区域
         button_layout = QHBoxLayout()
@@ -303,28 +432,223 @@ class CameraDisplayApp(QMainWindow):
         self.close_camera_button.setStyleSheet("font-weight: bold; font-size: 14px;")
         self.close_camera_button.clicked.connect(self.close_cameras)
         
+        # 快照和连拍（保存所有图像流的画面和原始深度）
+        self.snapshot_button = QPushButton("快照")
+        self.snapshot_button.setFixedHeight(40)
+        self.snapshot_button.setStyleSheet("font-weight: bold; font-size: 14px;")
+        self.snapshot_button.clicked.connect(self.take_snapshot)
+        
+        self.burst_count_spin = QSpinBox()
+        self.burst_count_spin.setRange(2, 1000)
+        self.burst_count_spin.setValue(100)
+        self.burst_count_spin.setSuffix(" 帧")
+        self.burst_count_spin.setFixedHeight(40)
+        
+        self.burst_button = QPushButton("连拍")
+        self.burst_button.setFixedHeight(40)
+        self.burst_button.setStyleSheet("font-weight: bold; font-size: 14px;")
+        self.burst_button.clicked.connect(self.take_burst)
+        
+        # 录像（同时录制所有图像流）
+        self.video_button = QPushButton("开始录像")
+        self.video_button.setCheckable(True)
+        self.video_button.setFixedHeight(40)
+        self.video_button.setStyleSheet("font-weight: bold; font-size: 14px;")
+        self.video_button.toggled.connect(self.toggle_video_recording)
+        
+        # 启动时和设备插入时自动连接工位配置中记住的夹爪和摄像头
+        self.auto_connect_checkbox = QCheckBox("自动连接工位设备")
+        self.auto_connect_checkbox.setChecked(self.station_profile.auto_connect)
+        self.auto_connect_checkbox.setToolTip(f"工位配置: {self.station_profile.path}")
+        self.auto_connect_checkbox.toggled.connect(self.station_profile.set_auto_connect)
+        
+        # 点云预览（RealSense深度）
+        self.pointcloud_button = QPushButton("点云预览")
+        self.pointcloud_button.setFixedHeight(40)
+        self.pointcloud_button.setStyleSheet("font-weight: bold; font-size: 14px;")
+        self.pointcloud_button.clicked.connect(self.show_pointcloud_view)
+        
         button_layout.addStretch(1)
         button_layout.addWidget(self.open_camera_button)
         button_layout.addSpacing(20)  # 添加间距
         button_layout.addWidget(self.close_camera_button)
+        button_layout.addSpacing(40)
+        button_layout.addWidget(self.snapshot_button)
+        button_layout.addSpacing(20)
+        button_layout.addWidget(self.burst_count_spin)
+        button_layout.addWidget(self.burst_button)
+        button_layout.addSpacing(20)
+        button_layout.addWidget(self.video_button)
+        button_layout.addSpacing(20)
+        button_layout.addWidget(self.pointcloud_button)
+        button_layout.addSpacing(40)
+        button_layout.addWidget(self.auto_connect_checkbox)
         button_layout.addStretch(1)
         
+        # 摄像头设备状态指示（非模态）
+        camera_status_layout = QHBoxLayout()
+        self.usb_status_label = QLabel("USB摄像头: 未打开")
+        self.rs_status_label = QLabel("RealSense: 未打开")
+        for label in (self.usb_status_label, self.rs_status_label):
+            label.setStyleSheet("font-size: 14px; color: gray;")
+            camera_status_layout.addWidget(label)
+        self.camera_status_labels = {
+            "usb": (self.usb_status_label, "USB摄像头"),
+            "realsense": (self.rs_status_label, "RealSense"),
+        }
+        
+        # RealSense配置和深度滤波（配置列表在重型模块加载完成后填充）
+        depth_processing_layout = QHBoxLayout()
+        depth_processing_layout.addWidget(QLabel("RealSense配置:"))
+        self.rs_profile_combo = QComboBox()
+        self.rs_profile_combo.setEnabled(False)
+        self.rs_profile_combo.currentIndexChanged.connect(self.on_rs_profile_changed)
+        depth_processing_layout.addWidget(self.rs_profile_combo)
+        depth_processing_layout.addSpacing(20)
+        depth_processing_layout.addWidget(QLabel("深度滤波:"))
+        self.filter_checkboxes = {}
+        for name, text in (("decimation", "降采样"), ("threshold", "距离阈值"), ("spatial", "空间"),
+                           ("temporal", "时间"), ("hole_filling", "补洞")):
+            checkbox = QCheckBox(text)
+            checkbox.setEnabled(False)
+            checkbox.toggled.connect(lambda checked, name=name: self.set_depth_filter_enabled(name, checked))
+            self.filter_checkboxes[name] = checkbox
+            depth_processing_layout.addWidget(checkbox)
+        depth_processing_layout.addSpacing(20)
+        self.filter_timing_label = QLabel("")
+        self.filter_timing_label.setStyleSheet("font-size: 13px; color: gray;")
+        depth_processing_layout.addWidget(self.filter_timing_label, 1)
+        
         # 添加所有区域到主布局
-        main_layout.addLayout(camera_layout)
+        main_layout.addWidget(self.camera_view, 1)
+        main_layout.addLayout(camera_status_layout)
+        main_layout.addLayout(depth_processing_layout)
         main_layout.addWidget(gripper_group)
         main_layout.addWidget(sense_group)
         main_layout.addLayout(button_layout)
         
-        # 显示占位图像
-        self.display_image(self.usb_label, self.usb_placeholder)
-        self.display_image(self.rs_color_label, self.rs_color_placeholder)
-        self.display_image(self.rs_depth_label, self.rs_depth_placeholder)
+        # 启动状态：模块加载完成之前显示加载提示，摄像头按钮不可用
+        self.open_camera_button.setEnabled(False)
+        self.close_camera_button.setEnabled(False)
+        self.snapshot_button.setEnabled(False)
+        self.burst_button.setEnabled(False)
+        self.video_button.setEnabled(False)
+        self.pointcloud_button.setEnabled(False)
+        self.statusBar().showMessage("正在启动...")
+        
+        # 串口列表在窗口显示后再初始化
+        QTimer.singleShot(0, self.refresh_serial_ports)
+    
+    def mark_startup(self, name):
+        """记录启动阶段的时间点（只记录第一次）"""
+        if name not in self.startup_marks:
+            self.startup_marks[name] = time.perf_counter() - _STARTUP_T0
+    
+    def start_background_init(self):
+        """窗口显示后，在后台线程加载重型模块并枚举设备"""
+        self.mark_startup('window_shown')
+        threading.Thread(target=self._background_init, daemon=True).start()
+    
+    def _background_init(self):
+        """后台启动线程"""
+        self.startup_signals.progress.emit("正在加载图像处理模块...")
+        try:
+            timings = load_heavy_modules()
+        except Exception as e:
+            self.startup_signals.modules_failed.emit(str(e))
+            return
+        self.startup_signals.modules_loaded.emit(timings)
         
-        # 初始化串口列表
-        self.refresh_serial_ports()
+        self.startup_signals.progress.emit("正在枚举摄像头设备...")
+        self.startup_signals.devices_enumerated.emit(enumerate_camera_devices())
+    
+    def show_startup_progress(self, message):
+        """在状态栏显示启动进度"""
+        self.statusBar().showMessage(message)
+    
+    def on_modules_loaded(self, timings):
+        """重型模块加载完成：创建占位图像，启动画面刷新"""
+        self.heavy_import_timings = timings
+        self.mark_startup('modules_loaded')
+        self.modules_ready = True
+        self.cameras = camera_manager.CameraManager(self.camera_signals.device_status.emit)
+        self.cameras.add_frame_listener(self.time_sync.on_frame)
+        # 每帧计算指纹，检测画面冻结/全黑（深度图在没有物体时全黑且每帧相同，不检测全黑和冻结）
+        self.stream_health = StreamHealthMonitor(no_black_check=(camera_manager.STREAM_RS_DEPTH,),
+                                                 no_frozen_check=(camera_manager.STREAM_RS_DEPTH,))
+        self.cameras.add_frame_listener(self.stream_health.on_frame)
+        self.start_station_server()
+        
+        # 画面按格子尺寸缩放后合成到同一块画布，没有画面时显示占位图像（按格子尺寸生成一次）
+        refresh_rate = 1.0 / self.get_display_frame_interval()
+        self.camera_view.start(display_fps_limit(refresh_rate), self.create_placeholder_image)
+        self.camera_view.add_view(camera_manager.STREAM_USB_COLOR, "鱼眼图像",
+                                  "The USB camera is not connected")
+        self.camera_view.add_view(camera_manager.STREAM_RS_COLOR, "RGB 图像",
+                                  "The RealSense color camera is not connected")
+        self.camera_view.add_view(camera_manager.STREAM_RS_DEPTH, "深度图像",
+                                  "The RealSense depth camera is not connected")
+        # 画面在各设备的采集线程中预先缩放到格子尺寸，GUI线程只做复制和叠加文字
+        self.cameras.add_frame_listener(self.camera_view.on_frame)
+        self.update_frames()
+        
+        self.load_rs_profiles()
+        
+        import snapshot
+        self.snapshot_writer = snapshot.SnapshotWriter(self.cameras, metadata=self.snapshot_metadata,
+                                                       done_callback=self.snapshot_signals.finished.emit)
+        
+        self.open_camera_button.setEnabled(True)
+        self.close_camera_button.setEnabled(True)
+        self.snapshot_button.setEnabled(True)
+        self.burst_button.setEnabled(True)
+        self.video_button.setEnabled(True)
+        self.pointcloud_button.setEnabled(True)
+        self.record_button.setEnabled(True)
+        # 显示帧率上限与采集帧率无关，没有新帧的周期几乎没有开销
+        self.timer.start(self.camera_view.interval_ms)
+        
+        # 工位配置中有已知摄像头时直接打开（不等待设备枚举）
+        if self.station_profile.auto_connect and self.station_profile.has_cameras and not STARTUP_BENCH:
+            self.open_cameras()
+    
+    def on_modules_failed(self, error):
+        """重型模块加载失败"""
+        print(f"加载图像处理模块失败: {error}")
+        self.statusBar().showMessage(f"加载图像处理模块失败: {error}")
+        self.camera_view.set_message("图像处理模块加载失败")
+        if STARTUP_BENCH:
+            self.report_startup_benchmark()
+    
+    def on_devices_enumerated(self, devices):
+        """设备枚举完成"""
+        self.detected_devices = devices
+        self.mark_startup('devices_enumerated')
+        self.statusBar().showMessage(
+            f"就绪 - RealSense设备: {len(devices['realsense'])} 台，视频设备: {len(devices['video'])} 个")
+        if STARTUP_BENCH:
+            # 测试模式：自动打开摄像头，超时后无论是否有画面都输出结果
+            QTimer.singleShot(15000, self.report_startup_benchmark)
+            self.open_cameras()
+    
+    def report_startup_benchmark(self):
+        """输出启动耗时并退出（仅测试模式）"""
+        result = dict(self.startup_marks)
+        result['heavy_imports'] = self.heavy_import_timings
+        print("STARTUP_BENCH " + json.dumps(result), flush=True)
+        QApplication.instance().exit(0)
     
     def refresh_serial_ports(self):
-        """刷新串口设备列表"""
+        """刷新串口设备列表（列表变化时才更新下拉框），并按工位配置自动连接已知夹爪"""
+        # 获取可用串口列表
+        ports = list_serial_ports()
+        if ports != self.serial_ports:
+            self.serial_ports = ports
+            self.update_port_combos(ports)
+        self.sync_station_grippers(ports)
+    
+    def update_port_combos(self, ports):
+        """更新串口下拉框"""
         # 保存当前选择的端口
         current_port = self.port_combo.currentText()
         current_sense_port = self.sense_port_combo.currentText()
@@ -333,9 +657,6 @@ class CameraDisplayApp(QMainWindow):
         self.port_combo.clear()
         self.sense_port_combo.clear()
         
-        # 获取可用串口列表
-        ports = list_serial_ports()
-        
         if ports:
             # 添加到下拉框
             self.port_combo.addItems(ports)
@@ -348,9 +669,9 @@ class CameraDisplayApp(QMainWindow):
             if current_sense_port in ports:
                 self.sense_port_combo.setCurrentText(current_sense_port)
             
-            # 启用连接按钮
-            self.connect_button.setEnabled(True)
-            self.sense_connect_button.setEnabled(True)
+            # 启用连接按钮（正在自动连接的除外）
+            self.connect_button.setEnabled(ROLE_GRIPPER not in self.station_connecting)
+            self.sense_connect_button.setEnabled(ROLE_SENSE not in self.station_connecting)
         else:
             # 无可用串口
             self.port_combo.addItem("未检测到设备")
@@ -358,6 +679,79 @@ class CameraDisplayApp(QMainWindow):
             self.connect_button.setEnabled(False)
             self.sense_connect_button.setEnabled(False)
     
+    def sync_station_grippers(self, ports):
+        """按工位配置同步已知夹爪（GUI线程）: 已连接的设备被拔出时断开，已知设备插入时自动连接
+        
+        只比较串口列表和解析 /dev/serial 下的符号链接，不打开未知设备
+        """
+        if not self.station_profile.auto_connect:
+            return
+        controllers = {
+            ROLE_GRIPPER: (self.gripper, self.connect_gripper),
+            ROLE_SENSE: (self.sense_gripper, self.connect_sense_gripper),
+        }
+        for role, (controller, toggle) in controllers.items():
+            if role not in self.station_connecting and controller.is_connected() and controller.port not in ports:
+                # 被测设备被拔出：结束测试并断开，同一接口插入新设备后自动连接
+                toggle()
+        for role, port in list(self.station_hold.items()):
+            if port not in ports:
+                del self.station_hold[role]
+        
+        busy = {controller.port for controller, _ in controllers.values() if controller.is_connected()}
+        for role, (controller, _) in controllers.items():
+            if role in self.station_connecting or controller.is_connected():
+                continue
+            port = self.station_profile.known_port(role)
+            if port is None or port not in ports or port in busy or self.station_hold.get(role) == port:
+                continue
+            busy.add(port)
+            self.start_station_connect(role, port)
+    
+    def start_station_connect(self, role, port):
+        """在后台线程连接已知夹爪（两个角色并行，查询设备信息约需1秒），完成后在GUI线程更新界面"""
+        controller = self.gripper if role == ROLE_GRIPPER else self.sense_gripper
+        callback = None
+        if role == ROLE_SENSE:
+            # 开始新的判定（在开始接收数据之前）
+            self.rules.reset()
+            self.time_sync.reset_samples()
+            callback = self.on_gripper_data_received
+        self.station_connecting.add(role)
+        (self.connect_button if role == ROLE_GRIPPER else self.sense_connect_button).setEnabled(False)
+        self.statusBar().showMessage(f"正在自动连接{role}夹爪: {port}")
+        
+        def worker():
+            ok = controller.connect(port)
+            if ok and not controller.start_data_reception(callback):
+                controller.disconnect()
+                ok = False
+            if ok:
+                controller.get_device_info_command()
+            self.station_signals.gripper_opened.emit(role, port, ok)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def on_station_gripper_opened(self, role, port, ok):
+        """已知夹爪自动连接完成（GUI线程）"""
+        self.station_connecting.discard(role)
+        button = self.connect_button if role == ROLE_GRIPPER else self.sense_connect_button
+        button.setEnabled(True)
+        if not ok:
+            # 同一个设备拔出之前不再重试，避免反复打开有问题的串口
+            self.station_hold[role] = port
+            self.statusBar().showMessage(f"自动连接{role}夹爪失败: {port}，重新插入设备或手动连接", 10000)
+            return
+        if role == ROLE_GRIPPER:
+            self.port_combo.setCurrentText(port)
+            self.on_gripper_opened(port)
+        else:
+            self.sense_port_combo.setCurrentText(port)
+            self.on_sense_gripper_opened(port)
+            # 亮灯和振动需要约7秒，在后台线程进行
+            threading.Thread(target=self.vibrate_and_set_light, daemon=True).start()
+        self.statusBar().showMessage(f"已自动连接{role}夹爪: {port}", 5000)
+    
     def connect_gripper(self):
         """连接或断开夹爪控制器"""
         if self.gripper.is_connected():
@@ -370,19 +764,16 @@ class CameraDisplayApp(QMainWindow):
             self.gripper_enabled = False
             self.port_combo.setEnabled(True)
             self.refresh_button.setEnabled(True)
+            # 设备拔出之前不再自动连接
+            self.station_hold[ROLE_GRIPPER] = self.gripper.port
         else:
             # 连接
             port = self.port_combo.currentText()
             if port and port != "未检测到设备":
                 if self.gripper.connect(port):
-                    if self.gripper.start_data_reception(self.on_gripper_data_received):
-                        self.connect_button.setText("断开")
-                        self.enable_button.setEnabled(True)
-                        self.port_combo.setEnabled(False)
-                        self.refresh_button.setEnabled(False)
+                    if self.gripper.start_data_reception():
                         self.gripper.get_device_info_command()
-                        self.gripper_version_label.setText(f"Gripper固件版本: {self.gripper.firmware_version}")
-                        self.gripper_sn_info.setText(f"Gripper SN码: {self.gripper.sn_code}")
+                        self.on_gripper_opened(port)
                         QMessageBox.information(self, "连接成功", f"成功连接到串口设备: {port}")
                     else:
                         self.sense_gripper.disconnect()
@@ -390,46 +781,47 @@ class CameraDisplayApp(QMainWindow):
                 else:
                     QMessageBox.warning(self, "连接失败", f"无法连接到串口设备: {port}")
     
+    def on_gripper_opened(self, port):
+        """夹爪连接成功（手动或自动连接）：更新界面，记入结果数据库和工位配置"""
+        self.connect_button.setText("断开")
+        self.enable_button.setEnabled(True)
+        self.port_combo.setEnabled(False)
+        self.refresh_button.setEnabled(False)
+        serial, firmware = self.reported_device_info(self.gripper)
+        if serial:
+            self.results_db.update_device(KIND_GRIPPER, serial, firmware)
+        self.gripper_version_label.setText(f"Gripper固件版本: {self.gripper.firmware_version}")
+        self.gripper_sn_info.setText(f"Gripper SN码: {self.gripper.sn_code}")
+        self.station_profile.remember_port(ROLE_GRIPPER, port)
+    
     def connect_sense_gripper(self):
         """连接或断开夹爪数据接收器"""
         if self.sense_gripper.is_connected():
             # 断开连接
+            self.record_button.setChecked(False)
+            self.finish_sense_session()
             self.sense_gripper.stop_data_reception()
             self.sense_gripper.disconnect()
             self.sense_connect_button.setText("连接")
             self.sense_port_combo.setEnabled(True)
             self.sense_refresh_button.setEnabled(True)
             self.sense_data_receiving = False
-            self.data_status_label.setText("数据状态: 未连接")
-            self.data_status_label.setStyleSheet("color: red;")
-            self.angle_display.setText("0.0000")
-            # 重置角度显示颜色为默认
-            self.angle_display.setStyleSheet("""
-                QLineEdit {
-                    background-color: white;
-                    color: black;
-                    border: 1px solid #A0A0A0;
-                    border-radius: 5px;
-                    padding: 5px;
-                    min-height: 30px;
-                }
-            """)
+            # 重置数据状态和角度显示
+            self.sense_panel.reset()
+            # 设备拔出之前不再自动连接
+            self.station_hold[ROLE_SENSE] = self.sense_gripper.port
         else:
             # 连接
             port = self.sense_port_combo.currentText()
             if port and port != "未检测到设备":
                 if self.sense_gripper.connect(port):
+                    # 开始新的判定
+                    self.rules.reset()
+                    self.time_sync.reset_samples()
                     # 开始数据接收
                     if self.sense_gripper.start_data_reception(self.on_gripper_data_received):
-                        self.sense_connect_button.setText("断开")
-                        self.sense_port_combo.setEnabled(False)
-                        self.sense_refresh_button.setEnabled(False)
-                        self.sense_data_receiving = True
-                        self.data_status_label.setText("数据状态: 已连接")
-                        self.data_status_label.setStyleSheet("color: green;")
                         self.sense_gripper.get_device_info_command()
-                        self.sense_gripper_version_label.setText(f"Sense固件版本: {self.sense_gripper.firmware_version}")
-                        self.sense_sn_info.setText(f"Sense SN码: {self.sense_gripper.sn_code}")
+                        self.on_sense_gripper_opened(port)
                         QMessageBox.information(self, "连接成功", f"成功连接到串口设备: {port}")
                         self.vibrate_and_set_light()
                     else:
@@ -438,28 +830,123 @@ class CameraDisplayApp(QMainWindow):
                 else:
                     QMessageBox.warning(self, "连接失败", f"无法连接到串口设备: {port}")
     
-    def write_gripper_sn(self):
-        """写入 Gripper 的 SN 码"""
-        sn = self.gripper_sn_input.text().strip()
-        if not sn:
-            QMessageBox.warning(self, "警告", "请输入有效的SN码")
+    def on_sense_gripper_opened(self, port):
+        """Sense夹爪连接成功（手动或自动连接）：更新界面，开始新的测试，记入工位配置"""
+        self.sense_connect_button.setText("断开")
+        self.sense_port_combo.setEnabled(False)
+        self.sense_refresh_button.setEnabled(False)
+        self.sense_data_receiving = True
+        self.sense_panel.set_status(STATUS_CONNECTED)
+        serial, firmware = self.reported_device_info(self.sense_gripper)
+        self.sense_session = self.results_db.start_session(
+            KIND_SENSE, TEST_ANGLE, serial, firmware, self.rules.variant)
+        self.sense_gripper_version_label.setText(f"Sense固件版本: {self.sense_gripper.firmware_version}")
+        self.sense_sn_info.setText(f"Sense SN码: {self.sense_gripper.sn_code}")
+        self.station_profile.remember_port(ROLE_SENSE, port)
+    
+    def restart_sense_test(self):
+        """结束当前Sense测试并开始新的测试（远程请求，GUI线程）"""
+        if not self.sense_gripper.is_connected():
+            self.rules.reset()
             return
-        if self.gripper.set_sn_code_command(sn):
-            QMessageBox.information(self, "成功", f"Gripper SN码 '{sn}' 已发送写入指令")
+        self.finish_sense_session()
+        self.rules.reset()
+        serial, firmware = self.reported_device_info(self.sense_gripper)
+        self.sense_session = self.results_db.start_session(
+            KIND_SENSE, TEST_ANGLE, serial, firmware, self.rules.variant)
+        self.statusBar().showMessage("远程请求：已开始新的Sense测试", 3000)
+    
+    def start_station_server(self):
+        """启动远程查看和控制服务，环境变量 PIKA_SERVER 指定监听地址，如 0.0.0.0:8765"""
+        address = os.environ.get("PIKA_SERVER")
+        if not address:
+            return
+        try:
+            host, port = parse_address(address)
+        except ValueError:
+            print(f"PIKA_SERVER 格式错误: {address}，应为 地址:端口")
+            return
+        self.station_server = StationServer(
+            self.cameras, {"gripper": self.gripper, "sense": self.sense_gripper}, self.rules,
+            self.stream_health, self.server_signals.test_restart.emit, host, port)
+        if self.station_server.start():
+            print(f"远程服务: {self.station_server.url}")
         else:
-            QMessageBox.warning(self, "错误", "写入失败，请检查串口连接")
+            print(f"远程服务启动失败: {self.station_server.start_error}")
+            self.station_server = None
+    
+    def reported_device_info(self, controller):
+        """设备回报的SN码和固件版本，未回报时为None"""
+        if controller.info_seq == 0:
+            return None, None
+        return controller.sn_code, controller.firmware_version
+    
+    def finish_sense_session(self):
+        """结束当前Sense测试，把判定结果和摄像头状态写入结果数据库"""
+        if self.sense_session is None:
+            return
+        session = self.sense_session
+        self.sense_session = None
+        self.results_db.record_metric(session, "sample_count", value=self.rules.sample_count)
+        self.results_db.record_metric(session, "last_angle", value=self.sense_gripper.current_angle)
+        if self.cameras is not None:
+            for device, state in self.cameras.states.items():
+                self.results_db.record_metric(session, f"camera.{device}", text=state)
+            for stream, health in self.stream_health.states().items():
+                self.results_db.record_metric(session, f"stream.{stream}", text=health)
+        serial, _ = self.reported_device_info(self.sense_gripper)
+        # 写入整次测试的判定（任一样本不通过即为不通过），而不是断开时刻的判定
+        self.results_db.end_session(session, self.rules.session_verdict, self.rules.session_summary(),
+                                    serial=serial)
+    
+    def write_gripper_sn(self):
+        """写入 Gripper 的 SN 码"""
+        self.start_sn_write("Gripper", self.gripper, self.gripper_sn_input, self.gripper_sn_btn)
 
     def write_sense_sn(self):
         """写入 Sense 的 SN 码"""
-        sn = self.sense_sn_input.text().strip()
+        self.start_sn_write("Sense", self.sense_gripper, self.sense_sn_input, self.sense_sn_btn)
+    
+    def start_sn_write(self, name, controller, sn_input, sn_button):
+        """在后台线程写入SN码并通过GET_INFO回读校验，不阻塞界面"""
+        sn = sn_input.text().strip()
         if not sn:
             QMessageBox.warning(self, "警告", "请输入有效的SN码")
             return
-        if self.sense_gripper.set_sn_code_command(sn):
-            time.sleep(0.5)
-            QMessageBox.information(self, "成功", f"Sense SN码 '{sn}' 已发送写入指令")
-        else:
+        if not controller.is_connected():
             QMessageBox.warning(self, "错误", "写入失败，请检查串口连接")
+            return
+        
+        sn_button.setEnabled(False)
+        self.statusBar().showMessage(f"正在写入{name} SN码: {sn}...")
+        
+        def worker():
+            ok, attempts, error = write_and_verify_sn(controller, sn)
+            reported_sn, firmware = self.reported_device_info(controller)
+            # 写入失败时设备并未采用该SN码，测试记录关联到设备实际回报的SN码（没有回报时不关联设备），
+            # 要写入的SN码作为文本指标保留
+            self.results_db.record_session(
+                KIND_GRIPPER if name == "Gripper" else KIND_SENSE, TEST_SN_WRITE, sn if ok else reported_sn,
+                VERDICT_PASS if ok else VERDICT_FAIL, error or None,
+                {"attempts": attempts, "port": controller.port, "attempted_sn": sn},
+                firmware=firmware)
+            self.sn_write_signals.finished.emit(name, sn, ok, error)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def on_sn_write_finished(self, name, sn, ok, error):
+        """SN码写入校验完成（GUI线程）"""
+        if name == "Gripper":
+            self.gripper_sn_btn.setEnabled(True)
+            self.gripper_sn_info.setText(f"Gripper SN码: {self.gripper.sn_code}")
+        else:
+            self.sense_sn_btn.setEnabled(True)
+            self.sense_sn_info.setText(f"Sense SN码: {self.sense_gripper.sn_code}")
+        self.statusBar().clearMessage()
+        if ok:
+            QMessageBox.information(self, "成功", f"{name} SN码 '{sn}' 已写入并校验通过")
+        else:
+            QMessageBox.warning(self, "错误", f"{name} SN码 '{sn}' 写入失败: {error}")
             
     def vibrate_and_set_light(self):
         print("正在执行亮灯操作...")
@@ -485,60 +972,93 @@ class CameraDisplayApp(QMainWindow):
         print("关闭振动马达...")
         self.sense_gripper.vibrate_control(0)
         
+    def get_display_frame_interval(self):
+        """获取屏幕一帧的时长（秒），用于限制数据显示的刷新频率"""
+        screen = QApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen is not None else 0
+        if refresh_rate <= 0:
+            refresh_rate = 60.0
+        return 1.0 / refresh_rate
+    
+    def load_rules(self):
+        """加载判定规则，配置文件和产品型号可通过环境变量 PIKA_RULES / PIKA_VARIANT 指定"""
+        path = os.environ.get("PIKA_RULES", DEFAULT_RULES_PATH)
+        try:
+            rules = RulesEngine.from_config(path, os.environ.get("PIKA_VARIANT"))
+            print(f"已加载判定规则: {path}，产品型号: {rules.variant}")
+            return rules
+        except Exception as e:
+            # 配置文件不可用时使用原有的固定范围判定
+            print(f"加载判定规则失败: {e}，使用默认规则")
+            return RulesEngine([InRangeRule("张开角度", 1.68, 1.75)], "default")
+    
+    def toggle_telemetry_recording(self, checked):
+        """开始/停止录制Sense夹爪数据（录制按钮在重型模块加载完成后才可用）"""
+        if checked:
+            if not self.sense_gripper.is_connected():
+                QMessageBox.warning(self, "无法录制", "请先连接Sense夹爪")
+                self.record_button.setChecked(False)
+                return
+            self.telemetry_recorder = telemetry_recorder.TelemetryRecorder(self.sense_gripper)
+            try:
+                path = self.telemetry_recorder.start()
+            except OSError as e:
+                self.telemetry_recorder = None
+                QMessageBox.warning(self, "无法录制", f"无法创建录制文件: {e}")
+                self.record_button.setChecked(False)
+                return
+            self.record_button.setText("停止录制")
+            self.record_status_label.setText(f"正在录制: {path}")
+        elif self.telemetry_recorder is not None:
+            meta = self.telemetry_recorder.stop()
+            self.record_button.setText("开始录制")
+            self.record_status_label.setText(
+                f"已录制 {meta['samples']} 个样本（丢弃 {meta['dropped']} 个）: {self.telemetry_recorder.path}")
+            self.telemetry_recorder = None
+    
     def on_gripper_data_received(self, angle, distance, timestamp):
         """夹爪数据接收回调函数"""
-        # 数据接收回调，由数据接收线程调用
-        # 不在此处更新UI，避免线程安全问题
-        pass
+        # 数据接收回调，由数据接收线程调用，每个样本都参与规则判定
+        self.rules.update(angle, timestamp)
+        # 不在此处更新UI，只发出（合并后的）排队信号，由GUI线程读取最新快照
+        self.sense_data_signal.notify()
+    
+    def on_sense_data_ready(self):
+        """GUI线程收到新数据通知，按屏幕刷新率节流后更新显示"""
+        if self.data_display_timer.isActive():
+            # 已经安排了下一帧的刷新，新数据会在那时一并显示
+            return
+        elapsed = time.time() - self.last_data_display_time
+        if elapsed >= self.data_display_interval:
+            self.update_gripper_data_display()
+        else:
+            remaining_ms = int((self.data_display_interval - elapsed) * 1000) + 1
+            self.data_display_timer.start(remaining_ms)
+    
+    def check_gripper_data_timeout(self):
+        """检查数据是否过期（超过1秒未更新）"""
+        if not self.sense_gripper.is_connected() or not self.sense_data_receiving:
+            return
+        
+        timestamp = self.sense_gripper.get_latest_sample().timestamp
+        if time.time() - timestamp > 1.0:
+            self.sense_panel.set_status(STATUS_STALE)
     
     def update_gripper_data_display(self):
         """更新夹爪数据显示"""
+        # 先清除通知标记，之后到达的数据会重新发出信号
+        self.sense_data_signal.consume()
+        self.last_data_display_time = time.time()
+        
         if not self.sense_gripper.is_connected() or not self.sense_data_receiving:
             return
         
-        # 获取当前数据
-        angle, distance, timestamp = self.sense_gripper.get_current_data()
+        # 获取最新的数据快照（角度、距离、时间戳属于同一帧）
+        sample = self.sense_gripper.get_latest_sample()
+        angle = sample.angle
         
-        # 检查数据是否过期（超过1秒未更新）
-        if time.time() - timestamp > 1.0:
-            self.data_status_label.setText("数据状态: 无数据")
-            self.data_status_label.setStyleSheet("color: orange;")
-        else:
-            self.data_status_label.setText("数据状态: 接收中")
-            self.data_status_label.setStyleSheet("color: green;")
-        
-        # 更新显示
-        self.angle_display.setText(f"{angle:.4f}")
-        # self.gripper_version_label.setText(f"固件版本: {self.gripper.firmware_version}")
-        # self.sense_gripper_version_label.setText(f"固件版本: {self.sense_gripper.firmware_version}")
-        
-        # 根据角度值设置颜色
-        if angle < 1.68 or angle > 1.75:
-            # 角度超出范围，显示红色
-            self.angle_display.setStyleSheet("""
-                QLineEdit {
-                    background-color: #FFDDDD;
-                    color: red;
-                    border: 1px solid red;
-                    border-radius: 5px;
-                    padding: 5px;
-                    min-height: 30px;
-                    font-weight: bold;
-                }
-            """)
-        else:
-            # 角度在范围内，显示绿色
-            self.angle_display.setStyleSheet("""
-                QLineEdit {
-                    background-color: #DDFFDD;
-                    color: green;
-                    border: 1px solid green;
-                    border-radius: 5px;
-                    padding: 5px;
-                    min-height: 30px;
-                    font-weight: bold;
-                }
-            """)
+        # 显示规则引擎的判定结果，只在状态切换时更新颜色
+        self.sense_panel.show_angle(angle, self.rules.verdict, self.rules.summary())
     
     def toggle_gripper_enable(self, checked):
         """切换夹爪使能状态"""
@@ -588,8 +1108,11 @@ class CameraDisplayApp(QMainWindow):
         font_color = (255, 255, 255)  # 白色
         font_thickness = 2
         
-        # 计算文本大小以居中显示
+        # 计算文本大小以居中显示，显示区域较窄时缩小文字
         text_size = cv2.getTextSize(text, font, font_scale, font_thickness)[0]
+        if text_size[0] > width * 0.9:
+            font_scale *= width * 0.9 / text_size[0]
+            text_size = cv2.getTextSize(text, font, font_scale, font_thickness)[0]
         text_x = (width - text_size[0]) // 2
         text_y = (height + text_size[1]) // 2
         
@@ -598,215 +1121,214 @@ class CameraDisplayApp(QMainWindow):
         
         return image
     
-    def display_image(self, label, image):
-        """将OpenCV图像显示在QLabel上"""
-        h, w, ch = image.shape
-        bytes_per_line = ch * w
-        qt_image = QImage(image.data, w, h, bytes_per_line, QImage.Format_RGB888).rgbSwapped()
-        pixmap = QPixmap.fromImage(qt_image)
-        label.setPixmap(pixmap)
-    
     def open_cameras(self):
-        """打开摄像头"""
-        # 先关闭现有摄像头
-        self.close_cameras()
-        
-        # 显示占位图像
-        self.display_image(self.usb_label, self.usb_placeholder)
-        self.display_image(self.rs_color_label, self.rs_color_placeholder)
-        self.display_image(self.rs_depth_label, self.rs_depth_placeholder)
+        """打开摄像头（在工作线程中并行打开，不阻塞界面）"""
+        if self.cameras is None:
+            return
         
-        # 尝试初始化RealSense D405摄像头
+        self.open_camera_button.setEnabled(False)
+        self.statusBar().showMessage("正在打开摄像头...")
+        rs_config = self.rs_profiles.get(self.rs_profile_combo.currentData())
         try:
-            # 初始化RealSense管道和配置
-            self.rs_pipeline = rs.pipeline()
-            rs_config = rs.config()
-            
-            # 查找RealSense设备
-            ctx = rs.context()
-            devices = ctx.query_devices()
-            
-            if len(devices) == 0:
-                print("未检测到RealSense设备，将显示提示窗口")
-                QMessageBox.warning(self, "摄像头检测", "未检测到RealSense设备，将显示占位图像")
-            else:
-                # 获取RealSense设备序列号
-                device = devices[0]
-                serial_number = device.get_info(rs.camera_info.serial_number)
-                print(f"已检测到RealSense设备，序列号: {serial_number}")
-                
-                # 配置RealSense流
-                rs_config.enable_device(serial_number)
-                rs_config.enable_stream(rs.stream.depth, 640, 480, rs.format.z16, 30)
-                rs_config.enable_stream(rs.stream.color, 640, 480, rs.format.bgr8, 30)
-                
-                # 启动RealSense管道
-                self.rs_pipeline.start(rs_config)
-                print("RealSense D405摄像头已启动")
-                self.rs_depth_frame_available = True
-                self.rs_color_frame_available = True
-                
-                # 创建深度图像的颜色映射对象
-                self.colorizer = rs.colorizer()
-        except Exception as e:
-            print(f"RealSense摄像头初始化失败: {e}")
-            QMessageBox.warning(self, "摄像头检测", f"RealSense摄像头初始化失败: {e}\n将显示占位图像")
-            if self.rs_pipeline is not None:
-                try:
-                    self.rs_pipeline.stop()
-                    self.rs_pipeline = None
-                except:
-                    pass
-        
-        # 初始化外接USB摄像头
-        # 注意：我们从索引1开始尝试，避免使用笔记本自带摄像头（通常是索引0）
-        usb_cam_index = 1  # 从索引1开始尝试
-        
-        while usb_cam_index < 10:  # 尝试多个索引以找到外接USB摄像头
-            try:
-                temp_cam = cv2.VideoCapture(usb_cam_index)
-                if temp_cam.isOpened():
-                    ret, frame = temp_cam.read()
-                    if ret:
-                        self.usb_cam = temp_cam
-                        self.usb_cam_available = True
-                        print(f"外接USB摄像头已找到，索引: {usb_cam_index}")
-                        break
-                    else:
-                        temp_cam.release()
-                else:
-                    temp_cam.release()
-            except Exception as e:
-                print(f"尝试索引 {usb_cam_index} 失败: {e}")
-            
-            usb_cam_index += 1
-        
-        if self.usb_cam is None:
-            print("未找到外接USB摄像头，将显示提示窗口")
-            QMessageBox.warning(self, "摄像头检测", "未找到外接USB摄像头，将显示占位图像")
-        
-        # 如果所有摄像头都不可用，则提示用户
-        if not self.rs_depth_frame_available and not self.rs_color_frame_available and not self.usb_cam_available:
-            QMessageBox.warning(self, "摄像头检测", "所有摄像头均不可用，将显示占位图像")
+            # 工位配置记住的USB摄像头在线时只打开它（按设备节点路径查找，不探测），RealSense优先打开记住的设备
+            # 候选USB索引不取启动时的枚举结果，由CameraManager每次打开/重连前重新扫描，启动后插入的摄像头也能被发现
+            self.cameras.open_all(self.camera_signals.open_finished.emit,
+                                  rs_config=rs_config, rs_preferred_serial=self.station_profile.rs_serial,
+                                  usb_locator=self.station_profile.usb_camera_index)
+        except ValueError as e:
+            self.open_camera_button.setEnabled(True)
+            QMessageBox.warning(self, "无法打开摄像头", f"RealSense配置有误: {e}")
+            return
+        # 恢复该配置上次的深度滤波开关
+        chain = self.cameras.rs_filter_chain
+        for name, enabled in self.station_profile.rs_filters(self.cameras.rs_config.name).items():
+            if name in chain.enabled:
+                chain.set_enabled(name, enabled)
+        self.sync_filter_checkboxes()
+    
+    def load_rs_profiles(self):
+        """读取RealSense配置文件，填充配置列表（默认选中文件或环境变量指定的配置）"""
+        import rs_processing
+        try:
+            self.rs_profiles, default = rs_processing.load_profiles()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"读取RealSense配置失败，使用默认配置: {e}")
+            self.rs_profiles, default = {"default": rs_processing.RealSenseConfig()}, "default"
+        # 环境变量 > 工位配置中上次使用的配置 > 配置文件中的默认配置
+        if self.station_profile.rs_profile in self.rs_profiles:
+            default = self.station_profile.rs_profile
+        default = os.environ.get("PIKA_CAMERA_PROFILE") or default
+        self.rs_profile_combo.blockSignals(True)
+        for name, config in self.rs_profiles.items():
+            self.rs_profile_combo.addItem(name, name)
+            self.rs_profile_combo.setItemData(self.rs_profile_combo.count() - 1,
+                                              config.description or config.describe(), Qt.ToolTipRole)
+        index = self.rs_profile_combo.findData(default)
+        self.rs_profile_combo.setCurrentIndex(max(index, 0))
+        self.rs_profile_combo.blockSignals(False)
+        self.rs_profile_combo.setEnabled(True)
+        self.filter_timing_timer.start(1000)
+    
+    def on_rs_profile_changed(self, index):
+        """切换RealSense配置：摄像头已打开时按新配置重新打开"""
+        self.station_profile.remember_realsense(profile=self.rs_profile_combo.currentData())
+        if self.cameras is None or not self.cameras.wanted[camera_manager.DEVICE_REALSENSE]:
+            return
+        self.open_cameras()
+    
+    def sync_filter_checkboxes(self):
+        """按当前滤波链的开关状态更新复选框"""
+        chain = self.cameras.rs_filter_chain
+        for name, checkbox in self.filter_checkboxes.items():
+            checkbox.blockSignals(True)
+            checkbox.setChecked(chain is not None and chain.enabled[name])
+            checkbox.setEnabled(chain is not None)
+            checkbox.blockSignals(False)
+    
+    def set_depth_filter_enabled(self, name, enabled):
+        """打开/关闭一个深度滤波（下一帧生效，不重新打开摄像头）"""
+        chain = self.cameras.rs_filter_chain if self.cameras is not None else None
+        if chain is not None:
+            chain.set_enabled(name, enabled)
+            self.station_profile.remember_filter(self.cameras.rs_config.name, name, enabled)
+    
+    def update_filter_timing(self):
+        """显示深度滤波和着色的耗时"""
+        chain = self.cameras.rs_filter_chain if self.cameras is not None else None
+        if chain is not None and self.cameras.get_frame(camera_manager.STREAM_RS_DEPTH) is not None:
+            self.filter_timing_label.setText(f"耗时: {chain.format_timings()}")
         else:
-            QMessageBox.information(self, "摄像头打开", "摄像头已成功打开")
+            self.filter_timing_label.setText("")
+    
+    def on_camera_status(self, device, state, message):
+        """显示摄像头设备状态（GUI线程）"""
+        label, name = self.camera_status_labels[device]
+        colors = {
+            camera_manager.STATE_IDLE: "gray",
+            camera_manager.STATE_OPENING: "#D08000",
+            camera_manager.STATE_READY: "green",
+            camera_manager.STATE_NOT_FOUND: "red",
+            camera_manager.STATE_FAILED: "red",
+            camera_manager.STATE_RECONNECTING: "orange",
+        }
+        label.setText(f"{name}: {message}")
+        label.setStyleSheet(f"font-size: 14px; color: {colors.get(state, 'gray')};")
+        if device == camera_manager.DEVICE_REALSENSE and state == camera_manager.STATE_READY:
+            if self.cameras.rs_serial:
+                self.results_db.update_device(KIND_REALSENSE, self.cameras.rs_serial)
+            self.station_profile.remember_realsense(serial=self.cameras.rs_serial)
+        elif device == camera_manager.DEVICE_USB and state == camera_manager.STATE_READY:
+            self.station_profile.remember_usb_camera(self.cameras.usb_index)
+    
+    def on_cameras_opened(self, results):
+        """所有摄像头处理完成（GUI线程）"""
+        self.open_camera_button.setEnabled(True)
+        if not any(results.values()):
+            self.statusBar().showMessage("所有摄像头均不可用，将显示占位图像")
+        else:
+            self.statusBar().showMessage("摄像头已成功打开")
+    
+    def snapshot_metadata(self):
+        """快照/连拍附带的元数据：夹爪SN码和当前Sense测试编号"""
+        gripper_sn, _ = self.reported_device_info(self.gripper)
+        sense_sn, sense_firmware = self.reported_device_info(self.sense_gripper)
+        return {"gripper_sn": gripper_sn, "sense_sn": sense_sn, "sense_firmware": sense_firmware,
+                "sense_session": self.sense_session}
+    
+    def take_snapshot(self):
+        """保存所有图像流的当前画面（编码和写盘在后台进行）"""
+        try:
+            job = self.snapshot_writer.snapshot()
+        except (RuntimeError, OSError) as e:
+            self.statusBar().showMessage(f"无法拍摄快照: {e}", 5000)
+            return
+        self.statusBar().showMessage(f"正在保存快照: {job.path}")
+    
+    def take_burst(self):
+        """开始连拍，每个图像流连续保存指定帧数"""
+        try:
+            job = self.snapshot_writer.burst(count=self.burst_count_spin.value())
+        except (RuntimeError, OSError) as e:
+            self.statusBar().showMessage(f"无法连拍: {e}", 5000)
+            return
+        self.burst_button.setEnabled(False)
+        self.statusBar().showMessage(f"正在连拍: {job.path}")
+    
+    def on_snapshot_finished(self, job):
+        """快照/连拍保存完成（GUI线程）"""
+        if not self.snapshot_writer.busy:
+            self.burst_button.setEnabled(True)
+        self.statusBar().showMessage(job.format_summary(), 10000)
+    
+    def toggle_video_recording(self, checked):
+        """开始/停止录制所有图像流"""
+        import video_recorder
+        if checked:
+            streams = [stream for stream in self.cameras.frames if self.cameras.get_frame(stream) is not None]
+            if not streams:
+                QMessageBox.warning(self, "无法录像", "请先打开摄像头")
+                self.video_button.setChecked(False)
+                return
+            self.video_recorder = video_recorder.VideoRecorder(self.cameras, streams,
+                                                               metadata=self.snapshot_metadata())
+            try:
+                path = self.video_recorder.start()
+            except OSError as e:
+                self.video_recorder = None
+                QMessageBox.warning(self, "无法录像", f"无法创建录像目录: {e}")
+                self.video_button.setChecked(False)
+                return
+            self.video_button.setText("停止录像")
+            self.statusBar().showMessage(f"正在录像: {path}")
+        elif self.video_recorder is not None:
+            # 等待编码线程写完队列中的帧（最多几十帧）
+            meta = self.video_recorder.stop()
+            self.video_button.setText("开始录像")
+            self.statusBar().showMessage(
+                f"录像已保存: {self.video_recorder.path}（{video_recorder.format_stats(meta['streams'])}）", 10000)
+            self.video_recorder = None
+    
+    def show_pointcloud_view(self):
+        """打开点云预览窗口"""
+        if self.pointcloud_window is None:
+            import pointcloud_view
+            self.pointcloud_window = pointcloud_view.PointCloudWindow(
+                self.cameras, camera_manager.STREAM_RS_DEPTH, camera_manager.STREAM_RS_COLOR, self)
+        self.pointcloud_window.show()
+        self.pointcloud_window.raise_()
     
     def close_cameras(self):
         """关闭摄像头"""
-        # 释放资源
-        if self.usb_cam is not None:
-            self.usb_cam.release()
-            self.usb_cam = None
-            self.usb_cam_available = False
-        
-        if self.rs_pipeline is not None:
-            self.rs_pipeline.stop()
-            self.rs_pipeline = None
-            self.rs_depth_frame_available = False
-            self.rs_color_frame_available = False
-        
-        # 重置FPS计算变量
-        self.usb_fps_start_time = time.time()
-        self.rs_color_fps_start_time = time.time()
-        self.rs_depth_fps_start_time = time.time()
-        self.usb_frame_count = 0
-        self.rs_color_frame_count = 0
-        self.rs_depth_frame_count = 0
-        self.usb_fps = 0
-        self.rs_color_fps = 0
-        self.rs_depth_fps = 0
-        
-        # 显示占位图像
-        self.display_image(self.usb_label, self.usb_placeholder)
-        self.display_image(self.rs_color_label, self.rs_color_placeholder)
-        self.display_image(self.rs_depth_label, self.rs_depth_placeholder)
+        # 释放资源（在工作线程中进行）
+        if self.cameras is not None:
+            self.cameras.close_all()
         
         print("已关闭所有摄像头")
     
     def update_frames(self):
-        """更新摄像头画面"""
-        # 初始化图像变量
-        rs_depth_image = self.rs_depth_placeholder.copy()
-        rs_color_image = self.rs_color_placeholder.copy()
-        usb_color_image = self.usb_placeholder.copy()
-        
-        # 获取RealSense帧（如果可用）
-        if self.rs_pipeline is not None and (self.rs_depth_frame_available or self.rs_color_frame_available):
-            try:
-                rs_frames = self.rs_pipeline.wait_for_frames(200)  # 设置超时时间为200ms
-                
-                if self.rs_depth_frame_available:
-                    rs_depth_frame = rs_frames.get_depth_frame()
-                    if rs_depth_frame:
-                        # 将RealSense深度帧转换为numpy数组
-                        rs_depth_image = np.asanyarray(self.colorizer.colorize(rs_depth_frame).get_data())
-                        
-                        # 计算RealSense深度摄像头FPS
-                        self.rs_depth_frame_count += 1
-                        if (time.time() - self.rs_depth_fps_start_time) > 1.0:  # 每秒更新一次FPS
-                            self.rs_depth_fps = self.rs_depth_frame_count / (time.time() - self.rs_depth_fps_start_time)
-                            self.rs_depth_frame_count = 0
-                            self.rs_depth_fps_start_time = time.time()
-                        
-                        # 在RealSense深度图像上显示FPS
-                        font = cv2.FONT_HERSHEY_SIMPLEX
-                        font_scale = 0.7
-                        font_color = (0, 255, 0)  # 绿色
-                        font_thickness = 2
-                        fps_text = f"FPS: {self.rs_depth_fps:.1f}"
-                        cv2.putText(rs_depth_image, fps_text, (10, 30), font, font_scale, font_color, font_thickness)
-                
-                if self.rs_color_frame_available:
-                    rs_color_frame = rs_frames.get_color_frame()
-                    if rs_color_frame:
-                        # 将RealSense彩色帧转换为numpy数组
-                        rs_color_image = np.asanyarray(rs_color_frame.get_data())
-                        
-                        # 计算RealSense彩色摄像头FPS
-                        self.rs_color_frame_count += 1
-                        if (time.time() - self.rs_color_fps_start_time) > 1.0:  # 每秒更新一次FPS
-                            self.rs_color_fps = self.rs_color_frame_count / (time.time() - self.rs_color_fps_start_time)
-                            self.rs_color_frame_count = 0
-                            self.rs_color_fps_start_time = time.time()
-                        
-                        # 在RealSense彩色图像上显示FPS
-                        font = cv2.FONT_HERSHEY_SIMPLEX
-                        font_scale = 0.7
-                        font_color = (0, 255, 0)  # 绿色
-                        font_thickness = 2
-                        fps_text = f"FPS: {self.rs_color_fps:.1f}"
-                        cv2.putText(rs_color_image, fps_text, (10, 30), font, font_scale, font_color, font_thickness)
-            except Exception as e:
-                print(f"获取RealSense帧时出错: {e}")
-        
-        # 获取USB摄像头帧（如果可用）
-        if self.usb_cam is not None and self.usb_cam_available:
-            try:
-                ret, frame = self.usb_cam.read()
-                if ret:
-                    usb_color_image = frame
-                    
-                    # 计算USB摄像头FPS
-                    self.usb_frame_count += 1
-                    if (time.time() - self.usb_fps_start_time) > 1.0:  # 每秒更新一次FPS
-                        self.usb_fps = self.usb_frame_count / (time.time() - self.usb_fps_start_time)
-                        self.usb_frame_count = 0
-                        self.usb_fps_start_time = time.time()
-                    
-                    # 在USB摄像头图像上显示FPS
-                    font = cv2.FONT_HERSHEY_SIMPLEX
-                    font_scale = 0.7
-                    font_color = (0, 255, 0)  # 绿色
-                    font_thickness = 2
-                    fps_text = f"FPS: {self.usb_fps:.1f}"
-                    cv2.putText(usb_color_image, fps_text, (10, 30), font, font_scale, font_color, font_thickness)
-            except Exception as e:
-                print(f"获取USB摄像头帧时出错: {e}")
-        
-        # 显示图像
-        self.display_image(self.usb_label, usb_color_image)
-        self.display_image(self.rs_color_label, rs_color_image)
-        self.display_image(self.rs_depth_label, rs_depth_image)
+        """更新摄像头画面（画面由采集线程获取，只重新合成有新帧或尺寸、状态变化的图像流，每个周期绘制一次）"""
+        new_frame = self.camera_view.refresh(self.cameras.get_frame, self.draw_overlay, self.stream_health.state)
+        
+        # 记录第一帧真实画面的显示时间
+        if new_frame and 'first_frame' not in self.startup_marks:
+            self.mark_startup('first_frame')
+            if STARTUP_BENCH:
+                self.report_startup_benchmark()
+    
+    def draw_overlay(self, stream, frame, text):
+        """在缩放后的画面上叠加采集帧率、同一时刻的夹爪角度和画面健康状态（文字位图由合成器缓存）"""
+        text(1, f"FPS: {self.cameras.fps[stream]:.1f}")
+        
+        # 叠加与该帧采集时刻最接近的Sense夹爪角度及时间差
+        if self.sense_data_receiving:
+            sample, dt = self.time_sync.nearest_sample(frame.capture_time)
+            if sample is not None and abs(dt) <= SYNC_OVERLAY_MAX_GAP:
+                text(2, f"Angle: {sample.angle:.4f} rad  dt: {dt * 1000:+.1f} ms")
+        
+        # 画面冻结/全黑/停滞时用红字提示（帧率统计无法发现这类故障）
+        health = self.stream_health.state(stream)
+        if health not in (HEALTH_OK, HEALTH_UNKNOWN):
+            text(3, health.upper(), (0, 0, 255), 1.0)
     
     def closeEvent(self, event):
         """关闭窗口时释放资源"""
@@ -814,31 +1336,60 @@ class CameraDisplayApp(QMainWindow):
         self.timer.stop()
         self.port_timer.stop()
         self.data_timer.stop()
+        self.data_display_timer.stop()
+        self.filter_timing_timer.stop()
         
-        # 释放资源
-        if self.usb_cam is not None:
-            self.usb_cam.release()
+        # 先停止远程服务，不再接受远程命令
+        if self.station_server is not None:
+            self.station_server.stop()
         
-        if self.rs_pipeline is not None:
-            self.rs_pipeline.stop()
+        # 结束当前测试（在关闭摄像头之前，记录摄像头的实际状态）并写完结果数据库
+        self.finish_sense_session()
+        self.results_db.close()
+        
+        # 结束连拍和录像，写完队列中的画面
+        if self.snapshot_writer is not None:
+            self.snapshot_writer.close()
+        if self.video_recorder is not None:
+            self.video_recorder.stop()
+        
+        # 释放资源
+        if self.cameras is not None:
+            for device, clock in self.cameras.clock_sync.items():
+                print(f"{device} 时钟同步: {clock.format_status()}")
+            self.cameras.shutdown()
         
         # 断开夹爪连接
         if self.gripper.is_connected():
             self.gripper.disconnect()
         
+        # 停止录制，写完缓存的样本
+        if self.telemetry_recorder is not None:
+            self.telemetry_recorder.stop()
+        
         # 断开夹爪数据接收器连接
         if self.sense_gripper.is_connected():
             self.sense_gripper.stop_data_reception()
             self.sense_gripper.disconnect()
         
+        print(f"数据面板刷新统计: {self.sense_panel.format_stats()}")
+        print(f"画面刷新统计: {self.camera_view.format_stats()}")
         print("已关闭所有摄像头和窗口")
         event.accept()
 
 def main():
+    # 后台线程的日志经队列写入终端和日志文件，不阻塞采集和串口线程
+    log_path = setup_logging()
+    if log_path:
+        print(f"日志文件: {log_path}")
     app = QApplication(sys.argv)
     window = CameraDisplayApp()
     window.show()
-    sys.exit(app.exec_())
+    # 进入事件循环、窗口绘制完成后再开始加载重型模块
+    QTimer.singleShot(0, window.start_background_init)
+    exit_code = app.exec_()
+    shutdown_logging()
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,735 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+摄像头管理模块
+在线程池中并行打开RealSense D405和外接USB摄像头，
+通过回调汇报每个设备的打开进度和错误，不阻塞GUI线程
+每个设备由独立的采集线程读取画面，GUI线程只取最新一帧显示
+支持热拔插：设备断开后自动释放，重新插入后在后台按指数退避重连
+RealSense图像流的分辨率/帧率/格式和深度滤波由 RealSenseConfig 配置（见 rs_processing.py）
+"""
+
+import os
+import glob
+import time
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pyrealsense2 as rs
+
+from station_log import get_logger, log_fields
+from time_sync import ClockSync
+from rs_processing import RealSenseConfig, DepthFilterChain
+
+log = get_logger("camera")
+
+# 设备标识
+DEVICE_REALSENSE = "realsense"
+DEVICE_USB = "usb"
+
+# 图像流标识
+STREAM_USB_COLOR = "usb_color"
+STREAM_RS_COLOR = "rs_color"
+STREAM_RS_DEPTH = "rs_depth"
+
+DEVICE_STREAMS = {
+    DEVICE_REALSENSE: (STREAM_RS_COLOR, STREAM_RS_DEPTH),
+    DEVICE_USB: (STREAM_USB_COLOR,),
+}
+
+# 设备状态
+STATE_IDLE = "idle"                  # 未打开
+STATE_OPENING = "opening"            # 正在打开
+STATE_READY = "ready"                # 已打开
+STATE_NOT_FOUND = "not_found"        # 未检测到设备（等待插入）
+STATE_FAILED = "failed"              # 打开失败
+STATE_RECONNECTING = "reconnecting"  # 设备断开，正在后台重连
+
+# 外接USB摄像头默认尝试的索引（从1开始，避免使用笔记本自带摄像头）
+DEFAULT_USB_INDICES = list(range(1, 10))
+
+# RealSense的USB厂商ID（Intel），其视频设备节点不作为外接USB摄像头探测
+REALSENSE_USB_VENDOR = "8086"
+VIDEO4LINUX_SYSFS = "/sys/class/video4linux"
+
+# 重连退避时间（秒）
+RECONNECT_MIN_DELAY = 0.5
+RECONNECT_MAX_DELAY = 8.0
+
+# 连续取帧失败超过该时间（秒）视为设备断开
+RS_STALL_TIMEOUT = 3.0
+USB_STALL_TIMEOUT = 2.0
+
+# 采集线程中单次等待RealSense帧的超时时间（毫秒）
+RS_FRAME_TIMEOUT_MS = 1000
+
+# 摄像头画面快照（不可变），采集线程每帧整体替换
+# timestamp 为到达时的 time.time()；capture_time 为采集时刻，由设备时间戳映射到 time.monotonic() 时钟
+# seq 在同一图像流中持续递增（设备重连后不会从头开始）
+# raw 为深度图像流的原始z16深度（uint16，单位见 CameraManager.rs_depth_scale），其他图像流为None
+CameraFrame = namedtuple('CameraFrame', ['image', 'timestamp', 'seq', 'capture_time', 'raw'], defaults=(None,))
+
+
+def intrinsics_to_dict(intrinsics):
+    """把 rs.intrinsics 转换为可写入JSON的字典"""
+    return {
+        "width": intrinsics.width,
+        "height": intrinsics.height,
+        "fx": intrinsics.fx,
+        "fy": intrinsics.fy,
+        "ppx": intrinsics.ppx,
+        "ppy": intrinsics.ppy,
+        "model": str(intrinsics.model),
+        "coeffs": list(intrinsics.coeffs),
+    }
+
+
+def probe_usb_camera(index):
+    """尝试打开指定索引的USB摄像头并读取一帧
+
+    参数:
+        index (int): 摄像头索引
+
+    返回:
+        cv2.VideoCapture: 能正常读取画面时返回摄像头对象，否则返回None
+    """
+    try:
+        cam = cv2.VideoCapture(index)
+        if cam.isOpened():
+            ret, _ = cam.read()
+            if ret:
+                return cam
+        cam.release()
+    except Exception as e:
+        log.warning("尝试索引 %s 失败: %s", index, e, extra=log_fields(device=DEVICE_USB))
+    return None
+
+
+def realsense_video_indices():
+    """RealSense自身的视频设备节点索引（按sysfs中所属USB设备的厂商ID判断，不打开设备）
+
+    RealSense启动管道时需要独占这些节点，USB摄像头探测不能打开它们
+
+    返回:
+        set: 视频设备索引，无法读取sysfs时为空
+    """
+    indices = set()
+    try:
+        names = os.listdir(VIDEO4LINUX_SYSFS)
+    except OSError:
+        return indices
+    for name in names:
+        if not name.startswith("video") or not name[len("video"):].isdigit():
+            continue
+        # device 指向USB接口，其上一级为USB设备
+        usb_device = os.path.dirname(os.path.realpath(os.path.join(VIDEO4LINUX_SYSFS, name, "device")))
+        try:
+            with open(os.path.join(usb_device, "idVendor")) as f:
+                vendor = f.read().strip().lower()
+        except OSError:
+            continue
+        if vendor == REALSENSE_USB_VENDOR:
+            indices.add(int(name[len("video"):]))
+    return indices
+
+
+def video_device_indices():
+    """当前存在的视频设备节点索引（/dev/videoN，N>=1，跳过笔记本自带摄像头）
+
+    返回:
+        list: 升序索引，没有设备节点时为空
+    """
+    indices = []
+    for path in glob.glob("/dev/video*"):
+        suffix = path[len("/dev/video"):]
+        if suffix.isdigit() and int(suffix) >= 1:
+            indices.append(int(suffix))
+    return sorted(indices)
+
+
+class FpsCounter:
+    """每秒更新一次的帧率计数器"""
+
+    def __init__(self):
+        self.start_time = time.time()
+        self.count = 0
+        self.fps = 0.0
+
+    def tick(self):
+        self.count += 1
+        now = time.time()
+        if now - self.start_time > 1.0:
+            self.fps = self.count / (now - self.start_time)
+            self.count = 0
+            self.start_time = now
+        return self.fps
+
+
+class CameraManager:
+    """摄像头管理器
+
+    参数:
+        status_callback: 设备状态回调函数，参数为(device, state, message)，在工作线程中调用
+    """
+
+    def __init__(self, status_callback=None):
+        self.status_callback = status_callback
+        self.executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="camera-worker")
+
+        # 设备锁保证同一设备的释放和打开按顺序进行
+        self.rs_lock = threading.Lock()
+        self.usb_lock = threading.Lock()
+        # 状态锁保护设备句柄的发布和摘除
+        self.state_lock = threading.Lock()
+        # 每次打开/关闭都会递增，过期的打开/重连任务会自行退出并释放设备
+        self.generation = 0
+        self.closing = False
+
+        self.rs_pipeline = None
+        self.rs_device = None
+        self.colorizer = None
+        self.rs_serial = None
+        # RealSense图像流配置和深度滤波链（在open_all时创建，重连时沿用）
+        self.rs_config = RealSenseConfig()
+        self.rs_filter_chain = None
+        # 当前RealSense各图像流的内参 {stream: dict} 和深度单位（米）
+        # 深度内参对应滤波后的深度图（降采样后尺寸和焦距都会缩小）
+        self.rs_intrinsics = {}
+        self.rs_depth_scale = None
+        self.usb_cam = None
+        self.usb_index = None
+        self.capture_threads = {DEVICE_REALSENSE: None, DEVICE_USB: None}
+        self.states = {DEVICE_REALSENSE: STATE_IDLE, DEVICE_USB: STATE_IDLE}
+
+        # 当前会话希望打开的设备（用于断开后重连）
+        self.wanted = {DEVICE_REALSENSE: False, DEVICE_USB: False}
+        self.rs_requested_serial = None
+        self.rs_preferred_serial = None
+        self.usb_indices = None
+        self.usb_locator = None
+
+        # 重连任务：记录负责重连的会话代数，每个设备每代最多一个，插入事件会唤醒等待中的重连任务
+        # 旧会话的重连任务在退出前（可能正在退避等待）不能阻止新会话安排重连
+        self.reconnecting = {DEVICE_REALSENSE: None, DEVICE_USB: None}
+        self.reconnect_wake = {DEVICE_REALSENSE: threading.Event(), DEVICE_USB: threading.Event()}
+
+        # 最新画面和采集帧率
+        self.frames = {stream: None for streams in DEVICE_STREAMS.values() for stream in streams}
+        self.fps = {stream: 0.0 for stream in self.frames}
+        self.frame_seq = {stream: 0 for stream in self.frames}
+
+        # 设备时钟到主机单调时钟的映射，每次打开设备时重新估计
+        self.clock_sync = {DEVICE_REALSENSE: ClockSync(), DEVICE_USB: ClockSync()}
+
+        # 帧订阅者，每帧在采集线程中以 listener(stream, CameraFrame) 调用
+        self.frame_listeners = ()
+
+        # RealSense设备插拔通知
+        self.rs_context = rs.context()
+        self.rs_context.set_devices_changed_callback(self._on_rs_devices_changed)
+
+    def _report(self, device, state, message):
+        """汇报设备状态"""
+        self.states[device] = state
+        level = logging.WARNING if state in (STATE_FAILED, STATE_RECONNECTING) else logging.INFO
+        sn = self.rs_serial if device == DEVICE_REALSENSE else None
+        log.log(level, message, extra=log_fields(device=device, sn=sn))
+        if self.status_callback:
+            self.status_callback(device, state, message)
+
+    def get_frame(self, stream):
+        """获取指定图像流的最新画面
+
+        返回:
+            CameraFrame: 没有画面时返回None
+        """
+        return self.frames[stream]
+
+    def add_frame_listener(self, listener):
+        """订阅摄像头帧
+
+        参数:
+            listener: 帧处理函数，在采集线程中以 listener(stream, CameraFrame) 调用，不能阻塞
+        """
+        self.frame_listeners = self.frame_listeners + (listener,)
+
+    def remove_frame_listener(self, listener):
+        """取消订阅摄像头帧"""
+        self.frame_listeners = tuple(l for l in self.frame_listeners if l != listener)
+
+    def _publish(self, stream, image, timestamp, capture_time, raw=None):
+        """发布一帧画面（采集线程调用）"""
+        self.frame_seq[stream] += 1
+        frame = CameraFrame(image, timestamp, self.frame_seq[stream], capture_time, raw)
+        self.frames[stream] = frame
+        for listener in self.frame_listeners:
+            listener(stream, frame)
+
+    def _clear_frames(self, device):
+        for stream in DEVICE_STREAMS[device]:
+            self.frames[stream] = None
+            self.fps[stream] = 0.0
+
+    def _detach(self, device):
+        """摘除设备句柄（不释放，调用方需持有state_lock），返回(句柄, 采集线程)"""
+        thread = self.capture_threads[device]
+        self.capture_threads[device] = None
+        if device == DEVICE_REALSENSE:
+            handle = self.rs_pipeline
+            self.rs_pipeline = None
+            self.rs_device = None
+            self.colorizer = None
+        else:
+            handle = self.usb_cam
+            self.usb_cam = None
+        self._clear_frames(device)
+        return handle, thread
+
+    def _detach_all(self):
+        """摘除全部设备句柄并开始新的会话，返回新的会话编号和旧句柄"""
+        with self.state_lock:
+            self.generation += 1
+            old = {device: self._detach(device) for device in (DEVICE_REALSENSE, DEVICE_USB)}
+        # 唤醒旧的重连任务，让它们尽快退出
+        for event in self.reconnect_wake.values():
+            event.set()
+        return self.generation, old
+
+    def open_all(self, done_callback=None, rs_serial=None, usb_indices=None, rs_config=None,
+                 rs_preferred_serial=None, usb_locator=None):
+        """并行打开RealSense和USB摄像头，立即返回
+
+        参数:
+            done_callback: 全部设备处理完成后的回调，参数为{device: 是否成功}，在工作线程中调用
+            rs_serial (str): 指定RealSense序列号，为None时使用第一台设备
+            usb_indices (list): 候选USB摄像头索引，为None时每次打开/重连前重新扫描/dev/video*
+            rs_config (RealSenseConfig): RealSense图像流和滤波配置，为None时沿用当前配置
+            rs_preferred_serial (str): 优先打开的RealSense序列号（如工位配置记住的设备），不在线时打开其他设备
+            usb_locator: 返回已知USB摄像头当前索引的函数（只解析设备节点，不打开设备），在工作线程中调用；
+                         返回索引时只打开该索引，不探测其他候选索引；返回None时按候选索引探测
+        """
+        # 先创建滤波链，配置有误时直接抛出ValueError，不影响已打开的设备
+        rs_config = rs_config or self.rs_config
+        filter_chain = DepthFilterChain(rs_config.filters)
+        generation, old = self._detach_all()
+        self.rs_config = rs_config
+        self.rs_filter_chain = filter_chain
+        self.wanted = {DEVICE_REALSENSE: True, DEVICE_USB: True}
+        self.rs_requested_serial = rs_serial
+        self.rs_preferred_serial = rs_preferred_serial
+        self.usb_indices = usb_indices or None
+        self.usb_locator = usb_locator
+        results = {}
+        results_lock = threading.Lock()
+
+        def finish(device, ok):
+            with results_lock:
+                results[device] = ok
+                done = len(results) == 2
+            if done and done_callback:
+                done_callback(dict(results))
+
+        self.executor.submit(self._open_realsense_task, generation, old[DEVICE_REALSENSE], finish)
+        self.executor.submit(self._open_usb_task, generation, old[DEVICE_USB], finish)
+
+    def close_all(self):
+        """关闭所有摄像头，设备在工作线程中释放，立即返回"""
+        _, old = self._detach_all()
+        self.wanted = {DEVICE_REALSENSE: False, DEVICE_USB: False}
+        if old[DEVICE_REALSENSE][0] is not None:
+            self.executor.submit(self._release_realsense, *old[DEVICE_REALSENSE])
+        if old[DEVICE_USB][0] is not None:
+            self.executor.submit(self._release_usb, *old[DEVICE_USB])
+
+    def shutdown(self):
+        """关闭所有摄像头并等待工作线程结束（程序退出时调用）"""
+        self.closing = True
+        self.close_all()
+        self.executor.shutdown(wait=True)
+
+    # ---------------- 释放 ----------------
+
+    def _release_realsense(self, pipeline, thread, report=True):
+        with self.rs_lock:
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout=RS_FRAME_TIMEOUT_MS / 1000.0 + 1.0)
+            self._stop_pipeline(pipeline)
+        if report:
+            self._report(DEVICE_REALSENSE, STATE_IDLE, "RealSense摄像头已关闭")
+
+    def _release_usb(self, cam, thread, report=True):
+        with self.usb_lock:
+            # 等采集线程退出后再释放，避免和正在进行的read()并发
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout=USB_STALL_TIMEOUT + 1.0)
+            cam.release()
+        if report:
+            self._report(DEVICE_USB, STATE_IDLE, "USB摄像头已关闭")
+
+    @staticmethod
+    def _stop_pipeline(pipeline):
+        try:
+            pipeline.stop()
+        except Exception as e:
+            log.warning("停止RealSense管道失败: %s", e, extra=log_fields(device=DEVICE_REALSENSE))
+
+    # ---------------- 打开 ----------------
+
+    def _open_realsense_task(self, generation, old, finish):
+        """打开RealSense摄像头（工作线程）"""
+        ok = False
+        try:
+            old_pipeline, old_thread = old
+            if old_pipeline is not None:
+                self._release_realsense(old_pipeline, old_thread, report=False)
+            ok = self._try_open_realsense(generation)
+            if not ok and generation == self.generation:
+                # 设备未插入或启动失败：在后台等待插入并重试
+                self._schedule_reconnect(DEVICE_REALSENSE, generation)
+        finally:
+            finish(DEVICE_REALSENSE, ok)
+
+    def _pick_rs_serial(self):
+        """选择要打开的RealSense序列号：指定序列号 > 上次打开的序列号 > 优先序列号 > 第一台设备"""
+        serials = [device.get_info(rs.camera_info.serial_number)
+                   for device in self.rs_context.query_devices()]
+        if self.rs_requested_serial:
+            return self.rs_requested_serial if self.rs_requested_serial in serials else None
+        for serial_number in (self.rs_serial, self.rs_preferred_serial):
+            if serial_number in serials:
+                return serial_number
+        return serials[0] if serials else None
+
+    def _try_open_realsense(self, generation):
+        """尝试打开RealSense摄像头并启动采集线程
+
+        返回:
+            bool: 是否成功
+        """
+        pipeline = None
+        with self.rs_lock:
+            if self.rs_pipeline is not None:
+                # 已由其他任务打开
+                return True
+            try:
+                self._report(DEVICE_REALSENSE, STATE_OPENING, "正在查找RealSense设备...")
+                serial_number = self._pick_rs_serial()
+                if serial_number is None:
+                    self._report(DEVICE_REALSENSE, STATE_NOT_FOUND, "未检测到RealSense设备，等待插入")
+                    return False
+
+                self._report(DEVICE_REALSENSE, STATE_OPENING,
+                             f"正在启动RealSense管道，序列号: {serial_number}")
+
+                # 配置RealSense流
+                depth, color = self.rs_config.depth, self.rs_config.color
+                filter_chain = self.rs_filter_chain
+                pipeline = rs.pipeline(self.rs_context)
+                rs_config = rs.config()
+                rs_config.enable_device(serial_number)
+                rs_config.enable_stream(rs.stream.depth, depth.width, depth.height,
+                                        getattr(rs.format, depth.format), depth.fps)
+                rs_config.enable_stream(rs.stream.color, color.width, color.height,
+                                        getattr(rs.format, color.format), color.fps)
+                profile = pipeline.start(rs_config)
+                colorizer = rs.colorizer()
+                intrinsics = {
+                    STREAM_RS_DEPTH: intrinsics_to_dict(
+                        profile.get_stream(rs.stream.depth).as_video_stream_profile().get_intrinsics()),
+                    STREAM_RS_COLOR: intrinsics_to_dict(
+                        profile.get_stream(rs.stream.color).as_video_stream_profile().get_intrinsics()),
+                }
+                depth_scale = profile.get_device().first_depth_sensor().get_depth_scale()
+
+                published = False
+                with self.state_lock:
+                    if generation == self.generation:
+                        self.rs_serial = serial_number
+                        self.rs_device = profile.get_device()
+                        self.rs_intrinsics = intrinsics
+                        self.rs_depth_scale = depth_scale
+                        self.colorizer = colorizer
+                        self.rs_pipeline = pipeline
+                        thread = threading.Thread(target=self._realsense_capture_loop,
+                                                  args=(pipeline, colorizer, filter_chain, color.format,
+                                                        generation), daemon=True)
+                        self.capture_threads[DEVICE_REALSENSE] = thread
+                        thread.start()
+                        published = True
+                if not published:
+                    # 打开过程中已被关闭或重新打开，丢弃本次结果
+                    self._stop_pipeline(pipeline)
+                    return False
+                self._report(DEVICE_REALSENSE, STATE_READY,
+                             f"RealSense D405摄像头已启动，序列号: {serial_number}，配置: {self.rs_config.name}")
+                return True
+            except Exception as e:
+                if pipeline is not None:
+                    self._stop_pipeline(pipeline)
+                self._report(DEVICE_REALSENSE, STATE_FAILED, f"RealSense摄像头初始化失败: {e}")
+                return False
+
+    def _open_usb_task(self, generation, old, finish):
+        """打开外接USB摄像头（工作线程）"""
+        ok = False
+        try:
+            old_cam, old_thread = old
+            if old_cam is not None:
+                self._release_usb(old_cam, old_thread, report=False)
+            ok = self._try_open_usb(generation, self._usb_candidates(self._usb_index_pool()))
+            if not ok and generation == self.generation:
+                self._schedule_reconnect(DEVICE_USB, generation)
+        finally:
+            finish(DEVICE_USB, ok)
+
+    def _usb_index_pool(self):
+        """候选USB摄像头索引：调用方未指定时重新扫描视频设备节点（包含启动后才插入的摄像头）"""
+        if self.usb_indices is not None:
+            return list(self.usb_indices)
+        return video_device_indices() or list(DEFAULT_USB_INDICES)
+
+    def _usb_candidates(self, indices):
+        """本次要打开的USB摄像头索引：已知设备在线时只有它的索引，否则为indices"""
+        if self.usb_locator is not None:
+            try:
+                index = self.usb_locator()
+            except Exception as e:
+                log.warning("查找已知USB摄像头失败: %s", e, extra=log_fields(device=DEVICE_USB))
+                index = None
+            if index is not None:
+                return [index]
+        return indices
+
+    def _try_open_usb(self, generation, usb_indices):
+        """所有候选索引并行探测，打开索引最小的可用USB摄像头并启动采集线程
+        （RealSense自身的视频设备节点不探测，避免和RealSense管道争用）
+
+        返回:
+            bool: 是否成功
+        """
+        with self.usb_lock:
+            if self.usb_cam is not None:
+                # 已由其他任务打开
+                return True
+            try:
+                excluded = realsense_video_indices()
+                usb_indices = [index for index in usb_indices if index not in excluded]
+                if not usb_indices:
+                    self._report(DEVICE_USB, STATE_NOT_FOUND, "未找到外接USB摄像头，等待插入")
+                    return False
+                self._report(DEVICE_USB, STATE_OPENING,
+                             f"正在探测USB摄像头，候选索引: {usb_indices}")
+                with ThreadPoolExecutor(max_workers=len(usb_indices),
+                                        thread_name_prefix="usb-probe") as probe_pool:
+                    cams = list(probe_pool.map(probe_usb_camera, usb_indices))
+
+                # 保持原有行为：选择索引最小的可用摄像头，其余释放
+                found_index, found_cam = None, None
+                for index, cam in zip(usb_indices, cams):
+                    if cam is None:
+                        continue
+                    if found_cam is None:
+                        found_index, found_cam = index, cam
+                    else:
+                        cam.release()
+
+                if found_cam is None:
+                    self._report(DEVICE_USB, STATE_NOT_FOUND, "未找到外接USB摄像头，等待插入")
+                    return False
+
+                published = False
+                with self.state_lock:
+                    if generation == self.generation:
+                        self.usb_index = found_index
+                        self.usb_cam = found_cam
+                        thread = threading.Thread(target=self._usb_capture_loop,
+                                                  args=(found_cam, generation), daemon=True)
+                        self.capture_threads[DEVICE_USB] = thread
+                        thread.start()
+                        published = True
+                if not published:
+                    found_cam.release()
+                    return False
+                self._report(DEVICE_USB, STATE_READY, f"外接USB摄像头已找到，索引: {found_index}")
+                return True
+            except Exception as e:
+                self._report(DEVICE_USB, STATE_FAILED, f"USB摄像头初始化失败: {e}")
+                return False
+
+    # ---------------- 采集 ----------------
+
+    def _realsense_capture_loop(self, pipeline, colorizer, filter_chain, color_format, generation):
+        """RealSense采集线程，管道被摘除后退出"""
+        # 非BGR彩色格式在采集线程转换为BGR
+        color_conversion = {"rgb8": cv2.COLOR_RGB2BGR, "yuyv": cv2.COLOR_YUV2BGR_YUYV}.get(color_format)
+        depth_size = None
+        depth_fps = FpsCounter()
+        color_fps = FpsCounter()
+        clock = self.clock_sync[DEVICE_REALSENSE]
+        clock.reset()
+        domain_logged = False
+        last_ok = time.time()
+        while self.rs_pipeline is pipeline:
+            try:
+                rs_frames = pipeline.wait_for_frames(RS_FRAME_TIMEOUT_MS)
+            except Exception as e:
+                if self.rs_pipeline is not pipeline:
+                    break
+                if time.time() - last_ok > RS_STALL_TIMEOUT:
+                    log.warning("RealSense长时间无画面，视为断开: %s", e,
+                                extra=log_fields(device=DEVICE_REALSENSE, sn=self.rs_serial))
+                    self._handle_device_lost(DEVICE_REALSENSE, pipeline, generation)
+                    break
+                continue
+            arrival = time.monotonic()
+            last_ok = time.time()
+
+            if self.rs_pipeline is not pipeline:
+                break
+
+            if not domain_logged:
+                # 时间戳来源：hardware_clock / system_time / global_time
+                log.info("RealSense时间戳来源: %s", rs_frames.get_frame_timestamp_domain(),
+                         extra=log_fields(device=DEVICE_REALSENSE, sn=self.rs_serial))
+                domain_logged = True
+
+            # 每组帧估计一次时钟映射，组内各帧按各自硬件时间戳相对组时间戳换算
+            frameset_ms = rs_frames.get_timestamp()
+            frameset_time = clock.add(frameset_ms / 1000.0, arrival)
+
+            rs_depth_frame = rs_frames.get_depth_frame()
+            if rs_depth_frame:
+                # 深度帧滤波和着色在采集线程完成（先降采样，着色的像素更少），
+                # 滤波后的原始z16深度随帧一起发布（不复制）
+                capture_time = frameset_time + (rs_depth_frame.get_timestamp() - frameset_ms) / 1000.0
+                rs_depth_frame = filter_chain.process(rs_depth_frame)
+                size = (rs_depth_frame.get_width(), rs_depth_frame.get_height())
+                if size != depth_size:
+                    # 深度图尺寸变化（开关降采样）时更新深度内参
+                    intrinsics = rs_depth_frame.get_profile().as_video_stream_profile().get_intrinsics()
+                    self.rs_intrinsics = {**self.rs_intrinsics, STREAM_RS_DEPTH: intrinsics_to_dict(intrinsics)}
+                    depth_size = size
+                start = time.perf_counter()
+                image = np.asanyarray(colorizer.colorize(rs_depth_frame).get_data())
+                filter_chain.record("colorize", time.perf_counter() - start)
+                raw = np.asanyarray(rs_depth_frame.get_data())
+                self._publish(STREAM_RS_DEPTH, image, last_ok, capture_time, raw)
+                self.fps[STREAM_RS_DEPTH] = depth_fps.tick()
+
+            rs_color_frame = rs_frames.get_color_frame()
+            if rs_color_frame:
+                capture_time = frameset_time + (rs_color_frame.get_timestamp() - frameset_ms) / 1000.0
+                image = np.asanyarray(rs_color_frame.get_data())
+                if color_conversion is not None:
+                    image = cv2.cvtColor(image, color_conversion)
+                self._publish(STREAM_RS_COLOR, image, last_ok, capture_time)
+                self.fps[STREAM_RS_COLOR] = color_fps.tick()
+
+    def _usb_capture_loop(self, cam, generation):
+        """USB摄像头采集线程，摄像头被摘除后退出"""
+        usb_fps = FpsCounter()
+        clock = self.clock_sync[DEVICE_USB]
+        clock.reset()
+        fail_since = None
+        while self.usb_cam is cam:
+            try:
+                ret, frame = cam.read()
+            except Exception as e:
+                log.warning("获取USB摄像头帧时出错: %s", e, extra=log_fields(device=DEVICE_USB))
+                ret, frame = False, None
+            if ret and self.usb_cam is cam:
+                fail_since = None
+                # V4L2后端返回驱动填写的缓冲区时间戳（毫秒），不支持时为0，此时使用到达时刻
+                arrival = time.monotonic()
+                buffer_ms = cam.get(cv2.CAP_PROP_POS_MSEC)
+                capture_time = clock.add(buffer_ms / 1000.0 if buffer_ms > 0 else None, arrival)
+                self._publish(STREAM_USB_COLOR, frame, time.time(), capture_time)
+                self.fps[STREAM_USB_COLOR] = usb_fps.tick()
+                continue
+            if self.usb_cam is not cam:
+                break
+            if fail_since is None:
+                fail_since = time.time()
+            elif time.time() - fail_since > USB_STALL_TIMEOUT:
+                log.warning("USB摄像头长时间无画面，视为断开", extra=log_fields(device=DEVICE_USB))
+                # 由本线程释放摄像头，避免和read()并发
+                cam.release()
+                self._handle_device_lost(DEVICE_USB, cam, generation, release_now=False)
+                break
+            time.sleep(0.01)
+
+    # ---------------- 热拔插 ----------------
+
+    def _on_rs_devices_changed(self, info):
+        """RealSense设备插拔回调（librealsense线程），只做轻量工作"""
+        try:
+            device = self.rs_device
+            pipeline = self.rs_pipeline
+            if device is not None and pipeline is not None and info.was_removed(device):
+                self.executor.submit(self._handle_device_lost, DEVICE_REALSENSE, pipeline, self.generation)
+            if len(info.get_new_devices()) > 0:
+                # 有新设备插入：立即唤醒重连任务，没有重连任务时新建一个
+                self.reconnect_wake[DEVICE_REALSENSE].set()
+                if self.wanted[DEVICE_REALSENSE] and self.rs_pipeline is None:
+                    self._schedule_reconnect(DEVICE_REALSENSE, self.generation)
+        except Exception as e:
+            log.error("处理RealSense插拔事件失败: %s", e, extra=log_fields(device=DEVICE_REALSENSE))
+
+    def _handle_device_lost(self, device, handle, generation, release_now=True):
+        """设备断开：摘除并释放设备，然后开始后台重连"""
+        with self.state_lock:
+            current = self.rs_pipeline if device == DEVICE_REALSENSE else self.usb_cam
+            if generation != self.generation or current is not handle:
+                return
+            _, thread = self._detach(device)
+        if release_now:
+            if device == DEVICE_REALSENSE:
+                self._release_realsense(handle, thread, report=False)
+            else:
+                self._release_usb(handle, thread, report=False)
+        name = "RealSense" if device == DEVICE_REALSENSE else "USB摄像头"
+        self._report(device, STATE_RECONNECTING, f"{name}已断开，正在等待重新连接...")
+        self._schedule_reconnect(device, generation)
+
+    def _schedule_reconnect(self, device, generation):
+        """安排后台重连任务（每个设备在当前会话中最多一个）"""
+        with self.state_lock:
+            if self.closing or generation != self.generation or self.reconnecting[device] == generation:
+                return
+            self.reconnecting[device] = generation
+        self.executor.submit(self._reconnect_loop, device, generation)
+
+    def _reconnect_loop(self, device, generation):
+        """按指数退避重连设备，直到成功或会话结束"""
+        delay = RECONNECT_MIN_DELAY
+        wake = self.reconnect_wake[device]
+        try:
+            while not self.closing and generation == self.generation:
+                wake.clear()
+                if device == DEVICE_REALSENSE:
+                    if self._try_open_realsense(generation):
+                        return
+                else:
+                    # 只探测实际存在的视频设备节点，设备未插入时不做任何探测
+                    indices = self._usb_candidates(
+                        [i for i in self._usb_index_pool() if os.path.exists(f"/dev/video{i}")])
+                    if self.usb_index in indices:
+                        indices.remove(self.usb_index)
+                        indices.insert(0, self.usb_index)
+                    if indices and self._try_open_usb(generation, indices):
+                        return
+                if wake.wait(delay):
+                    # 设备插入事件：从最短退避时间重新开始
+                    delay = RECONNECT_MIN_DELAY
+                else:
+                    delay = min(delay * 2, RECONNECT_MAX_DELAY)
+        finally:
+            with self.state_lock:
+                # 新会话已安排了自己的重连任务时不清除其标记
+                if self.reconnecting[device] == generation:
+                    self.reconnecting[device] = None
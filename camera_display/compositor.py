@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多路画面合成器
+把所有图像流的最新帧缩放后写入同一块预先分配的画布（BGR），界面每个刷新周期只绘制一次画布:
+- 画布按显示控件尺寸分配一次，控件尺寸变化时才重新分配和重新布局
+- 每个图像流占一个格子，不超过 MAX_ROW_VIEWS 路时排成一行，更多时排成接近正方形的网格
+- 订阅采集线程的帧（on_frame）时，画面在各设备的采集线程中预先缩放到格子尺寸，GUI线程只做复制；
+  没有预先缩放的画面用 cv2.resize 直接缩放到格子在画布中的区域（不产生中间图像）
+- 只重新绘制有新帧、叠加内容或尺寸变化的格子，返回需要重绘的区域
+- 叠加文字来自按内容缓存的文字位图，内容不变时只做一次按掩码的复制，不再每帧调用 cv2.putText
+画面路数增加时格子变小，GUI线程复制和绘制的总像素数与画布大小相同，刷新耗时基本不随路数增加
+
+本模块不依赖Qt，显示控件见 compositor_widget.py
+"""
+
+import math
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# 不超过该路数时排成一行，否则排成网格
+MAX_ROW_VIEWS = 3
+
+# 格子之间的间隔、格子顶部标题栏的高度（像素，标题由显示控件绘制）
+TILE_GAP = 6
+TITLE_HEIGHT = 26
+
+BACKGROUND_COLOR = (48, 48, 48)
+BORDER_COLOR = (128, 128, 128)
+
+# 叠加文字: 字体、线宽、线型、颜色、相对字号、行高（未缩放的画面上）
+# 线型与界面原来的 cv2.putText 默认值相同，不抗锯齿时按掩码复制，比按覆盖率混合快
+OVERLAY_FONT = cv2.FONT_HERSHEY_SIMPLEX
+OVERLAY_THICKNESS = 2
+OVERLAY_LINE_TYPE = cv2.LINE_8
+OVERLAY_COLOR = (0, 255, 0)
+OVERLAY_FONT_SCALE = 0.7
+OVERLAY_LINE_HEIGHT = 30
+OVERLAY_MARGIN = 10
+
+# 缓存的文字位图数量上限（夹爪角度每帧不同，按最近使用淘汰）
+SPRITE_CACHE_SIZE = 512
+
+
+def grid_shape(count):
+    """count路画面的网格 (行数, 列数)"""
+    if count <= MAX_ROW_VIEWS:
+        return 1, max(count, 1)
+    columns = int(math.ceil(math.sqrt(count)))
+    return int(math.ceil(count / columns)), columns
+
+
+def fit_size(image_width, image_height, width, height):
+    """按比例缩放到不超过(width, height)的尺寸
+
+    返回:
+        tuple: (宽, 高, 缩放比例)
+    """
+    scale = min(width / image_width, height / image_height)
+    return (max(1, min(width, int(image_width * scale))), max(1, min(height, int(image_height * scale))), scale)
+
+
+def scale_image(image, width, height, scale, dst=None):
+    """把BGR图像（或灰度图）缩放到(width, height)，缩小时使用 INTER_AREA，结果为BGR"""
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    if image.shape[1] == width and image.shape[0] == height:
+        if dst is None:
+            return image.copy()
+        dst[:] = image
+        return dst
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+    return cv2.resize(image, (width, height), dst=dst, interpolation=interpolation)
+
+
+class TextSprites:
+    """叠加文字位图缓存
+
+    每行文字按 (文本, 字号, 颜色, 线宽) 用 cv2.putText 光栅化一次，之后按掩码复制到画面上（cv2.copyTo），
+    结果与直接调用 cv2.putText 相同。帧率、健康状态等内容变化不频繁的文字几乎总是命中缓存
+    """
+
+    def __init__(self, font=OVERLAY_FONT, capacity=SPRITE_CACHE_SIZE):
+        self.font = font
+        self.capacity = capacity
+        # {(文本, 字号, 颜色, 线宽): (纯色图像, 覆盖率, 混合权重或None, 左边距, 基线以上的高度)}
+        self.sprites = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text, font_scale, color, thickness=OVERLAY_THICKNESS):
+        """一行文字的位图
+
+        返回:
+            tuple: (纯色图像, 覆盖率, 混合权重或None, 左边距, 基线以上的高度)，
+                   位图左上角相对文字起点（基线左端）的偏移为 (-左边距, -基线以上的高度)
+        """
+        key = (text, font_scale, color, thickness)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            self.hits += 1
+            return sprite
+        self.misses += 1
+        (width, ascent), baseline = cv2.getTextSize(text, self.font, font_scale, thickness)
+        # 留出线宽的边距，笔画不会被截断
+        pad = thickness + 2
+        coverage = np.zeros((pad * 2 + ascent + baseline, pad * 2 + width), np.uint8)
+        cv2.putText(coverage, text, (pad, pad + ascent), self.font, font_scale, 255, thickness, OVERLAY_LINE_TYPE)
+        image = np.empty(coverage.shape + (3,), np.uint8)
+        image[:] = color
+        if np.isin(coverage, (0, 255)).all():
+            weights = None
+        else:
+            # 部分OpenCV版本的文字总是抗锯齿，按覆盖率与画面混合
+            weights = coverage.astype(np.float32) / 255.0
+            weights = (weights, 1.0 - weights)
+        sprite = (image, coverage, weights, pad, pad + ascent)
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.capacity:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    def draw(self, image, text, org, font_scale, color, thickness=OVERLAY_THICKNESS):
+        """在image上叠加一行文字，org为文字基线左端（与cv2.putText相同），超出画面的部分被裁掉"""
+        sprite, coverage, weights, left, top = self.get(text, font_scale, tuple(color), thickness)
+        x0, y0 = org[0] - left, org[1] - top
+        height, width = image.shape[:2]
+        # 与画面的交集
+        sx0, sy0 = max(0, -x0), max(0, -y0)
+        sx1, sy1 = min(coverage.shape[1], width - x0), min(coverage.shape[0], height - y0)
+        if sx1 <= sx0 or sy1 <= sy0:
+            return
+        region = image[y0 + sy0:y0 + sy1, x0 + sx0:x0 + sx1]
+        if weights is None:
+            cv2.copyTo(sprite[sy0:sy1, sx0:sx1], coverage[sy0:sy1, sx0:sx1], region)
+        else:
+            region[:] = cv2.blendLinear(sprite[sy0:sy1, sx0:sx1], region,
+                                        weights[0][sy0:sy1, sx0:sx1], weights[1][sy0:sy1, sx0:sx1])
+
+
+class Tile:
+    """一个图像流在画布中的格子"""
+
+    def __init__(self, stream, title, placeholder_text):
+        self.stream = stream
+        self.title = title
+        self.placeholder_text = placeholder_text
+        # 标题栏和画面区域在画布中的位置 (x, y, 宽, 高)
+        self.title_rect = (0, 0, 0, 0)
+        self.rect = (0, 0, 0, 0)
+        # 上一次绘制内容的标识，相同时跳过
+        self.key = None
+        # 上一次绘制的画面在画布中的位置，变化时先清空格子
+        self.drawn = None
+        # 按格子尺寸缓存的占位图像 (宽, 高, 图像)
+        self.placeholder = None
+
+
+class TileCompositor:
+    """多路画面合成器
+
+    参数:
+        placeholder_factory: 占位图像生成函数，参数为(宽, 高, 提示文本)，返回BGR图像
+        sprites (TextSprites): 文字位图缓存，默认新建
+    """
+
+    def __init__(self, placeholder_factory, sprites=None):
+        self.placeholder_factory = placeholder_factory
+        self.sprites = sprites or TextSprites()
+        self.tiles = []
+        self.canvas = None
+        self.width = 0
+        self.height = 0
+        # 采集线程预先缩放: 每个图像流格子的画面区域尺寸 {stream: (宽, 高)}（重新布局时整体替换），
+        # 预先缩放好的最新帧 {stream: (CameraFrame, 缩放后的图像)}；显示控件不可见时不缩放
+        self.targets = {}
+        self.prescaled = {}
+        self.active = True
+
+        # 合成统计
+        self.stats = {
+            'rendered': 0,
+            'skipped_unchanged': 0,
+            'skipped_hidden': 0,
+            'layouts': 0,
+            'prescaled': 0,
+        }
+        self.compose_time = 0.0
+        self.compose_calls = 0
+
+    def add_view(self, stream, title, placeholder_text):
+        """添加一个图像流的格子（画布已分配时重新布局）"""
+        self.tiles.append(Tile(stream, title, placeholder_text))
+        if self.canvas is not None:
+            self.layout()
+
+    def resize(self, width, height):
+        """按显示控件尺寸分配画布，尺寸没有变化时不做任何事
+
+        返回:
+            bool: 是否重新分配了画布（需要整体重绘）
+        """
+        width, height = max(1, int(width)), max(1, int(height))
+        if self.canvas is not None and (width, height) == (self.width, self.height):
+            return False
+        self.width, self.height = width, height
+        self.canvas = np.empty((height, width, 3), np.uint8)
+        self.layout()
+        return True
+
+    def layout(self):
+        """计算每个格子的位置，画出背景和边框，之后所有格子重新绘制"""
+        self.canvas[:] = BACKGROUND_COLOR
+        targets = {}
+        rows, columns = grid_shape(len(self.tiles))
+        cell_width = (self.width - TILE_GAP * (columns + 1)) // columns
+        cell_height = (self.height - TILE_GAP * (rows + 1)) // rows
+        for index, tile in enumerate(self.tiles):
+            row, column = divmod(index, columns)
+            x = TILE_GAP + column * (cell_width + TILE_GAP)
+            y = TILE_GAP + row * (cell_height + TILE_GAP)
+            tile.title_rect = (x, y, max(cell_width, 0), min(TITLE_HEIGHT, max(cell_height, 0)))
+            tile.rect = (x, y + TITLE_HEIGHT, max(cell_width, 0), max(cell_height - TITLE_HEIGHT, 0))
+            tile.key = None
+            tile.drawn = None
+            targets[tile.stream] = tile.rect[2:]
+            if cell_width > 0 and cell_height > 0:
+                cv2.rectangle(self.canvas, (x - 1, y - 1), (x + cell_width, y + cell_height), BORDER_COLOR, 1)
+                self.canvas[y + TITLE_HEIGHT:y + cell_height, x:x + cell_width] = 0
+        self.targets = targets
+        self.stats['layouts'] += 1
+
+    def invalidate(self):
+        """下一次合成时重新绘制所有格子"""
+        for tile in self.tiles:
+            tile.key = None
+
+    def on_frame(self, stream, frame):
+        """帧订阅回调（采集线程）: 把新帧缩放到所在格子的尺寸，GUI线程合成时只需要复制
+
+        用 CameraManager.add_frame_listener 订阅后，缩放在各设备的采集线程中并行进行，
+        GUI线程的耗时只与画布大小有关，与画面路数和原始分辨率基本无关
+        """
+        target = self.targets.get(stream)
+        if not self.active or target is None or target[0] <= 0 or target[1] <= 0:
+            return
+        image = frame.image
+        width, height, scale = fit_size(image.shape[1], image.shape[0], *target)
+        self.prescaled[stream] = (frame, scale_image(image, width, height, scale))
+
+    def compose(self, get_frame, overlay, state_key, visible=None):
+        """把需要更新的图像流写入画布
+
+        参数:
+            get_frame: 获取图像流最新帧的函数，参数为stream，返回CameraFrame或None
+            overlay: 叠加文字的函数，参数为(stream, frame, text)；
+                     text(行号, 文本, 颜色=OVERLAY_COLOR, 相对字号=OVERLAY_FONT_SCALE) 在画面左上角第几行叠加一行文字
+            state_key: 返回影响叠加内容的状态（如画面健康状态），参数为stream；
+                       状态变化时即使没有新帧也重新绘制
+            visible: 判断格子是否可见的函数，参数为格子的画面区域 (x, y, 宽, 高)；默认都可见
+
+        返回:
+            tuple: (需要重绘的区域列表 [(x, y, 宽, 高)], 是否绘制了新的摄像头帧)
+        """
+        start = time.perf_counter()
+        dirty = []
+        new_frame = False
+        for tile in self.tiles:
+            x, y, width, height = tile.rect
+            if width <= 0 or height <= 0:
+                continue
+            if visible is not None and not visible(tile.rect):
+                self.stats['skipped_hidden'] += 1
+                continue
+            frame = get_frame(tile.stream)
+            scaled = None
+            if frame is not None:
+                prescaled = self.prescaled.get(tile.stream)
+                # 帧先发布再通知订阅者，最新帧可能还在缩放，这时先显示上一帧
+                if prescaled is not None and frame.seq - 1 <= prescaled[0].seq <= frame.seq:
+                    frame, scaled = prescaled
+            key = None if frame is None else (frame.seq, state_key(tile.stream))
+            if key == tile.key and tile.drawn is not None:
+                self.stats['skipped_unchanged'] += 1
+                continue
+            tile.key = key
+
+            if frame is None:
+                drawn = self._draw_placeholder(tile)
+            else:
+                drawn = self._draw_frame(tile, frame, scaled, overlay)
+                new_frame = True
+            if drawn != tile.drawn:
+                # 画面位置变化（如切换分辨率、占位图像和画面切换）时整个格子重绘
+                dirty.append(tile.rect)
+            else:
+                dirty.append(drawn)
+            tile.drawn = drawn
+            self.stats['rendered'] += 1
+
+        self.compose_time += time.perf_counter() - start
+        self.compose_calls += 1
+        return dirty, new_frame
+
+    def _draw_placeholder(self, tile):
+        x, y, width, height = tile.rect
+        cached = tile.placeholder
+        if cached is None or cached[:2] != (width, height):
+            cached = (width, height, self.placeholder_factory(width, height, tile.placeholder_text))
+            tile.placeholder = cached
+        self.canvas[y:y + height, x:x + width] = cached[2]
+        return tile.rect
+
+    def _draw_frame(self, tile, frame, scaled, overlay):
+        image = frame.image
+        x, y, width, height = tile.rect
+        target_width, target_height, scale = fit_size(image.shape[1], image.shape[0], width, height)
+        drawn = (x + (width - target_width) // 2, y + (height - target_height) // 2, target_width, target_height)
+        if drawn != tile.drawn:
+            self.canvas[y:y + height, x:x + width] = 0
+
+        left, top = drawn[:2]
+        region = self.canvas[top:top + target_height, left:left + target_width]
+        if scaled is not None and scaled.shape[:2] == (target_height, target_width):
+            region[:] = scaled
+            self.stats['prescaled'] += 1
+        else:
+            # 没有订阅采集线程的帧，或格子尺寸刚变化
+            scale_image(image, target_width, target_height, scale, dst=region)
+
+        # 叠加文字的字号随画面缩放，但不小于一半
+        text_scale = max(scale, 0.5)
+        line_height = int(OVERLAY_LINE_HEIGHT * text_scale)
+
+        def text(line, content, color=OVERLAY_COLOR, size=OVERLAY_FONT_SCALE):
+            self.sprites.draw(region, content, (OVERLAY_MARGIN, line_height * line),
+                              round(size * text_scale, 3), color)
+
+        overlay(tile.stream, frame, text)
+        return drawn
+
+    def format_stats(self):
+        """格式化合成统计信息"""
+        per_call = self.compose_time / self.compose_calls * 1000 if self.compose_calls else 0.0
+        return ("绘制 {rendered} 格（其中采集线程已缩放 {prescaled} 格），跳过未变化 {skipped_unchanged} 次，"
+                "跳过不可见 {skipped_hidden} 次，重新布局 {layouts} 次，".format(**self.stats) +
+                f"文字位图命中 {self.sprites.hits}/{self.sprites.hits + self.sprites.misses}，"
+                f"每次合成耗时 {per_call:.2f} ms")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多路画面显示控件
+所有图像流显示在同一个控件上: 刷新时由 TileCompositor 把有变化的图像流写入画布，
+控件只请求重绘有变化的区域，Qt在下一次绘制时一次性画出画布（每个刷新周期一次绘制），
+不再为每个图像流单独生成QPixmap和重绘QLabel。格子标题（中文）由QPainter绘制
+跳过不需要处理的刷新:
+- 窗口最小化、控件不可见时不处理；被其他窗口完全遮挡的格子不处理
+- 图像流没有新的帧、叠加内容和控件尺寸都没有变化时不处理（占位图像只绘制一次）
+显示帧率上限见 render_scheduler.display_fps_limit
+
+合成器依赖NumPy和OpenCV，在重型模块加载完成后调用 start() 创建，之前只显示提示文字
+"""
+
+import time
+
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QColor, QFont, QImage, QPainter, QStaticText, QTransform
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+# Qt 5.14 之前没有BGR888格式，绘制时转换有变化的区域
+HAS_BGR888 = hasattr(QImage, "Format_BGR888")
+
+
+class CompositorWidget(QWidget):
+    """多路画面显示控件
+
+    参数:
+        message (str): 合成器创建之前显示的提示文字
+    """
+
+    def __init__(self, message="", parent=None):
+        super().__init__(parent)
+        self.message = message
+        self.compositor = None
+        self.max_fps = None
+        # 包装画布内存的QImage，画布重新分配时重建
+        self.image = None
+        # 格子标题 {stream: QStaticText}，按标题字体排版一次
+        self.titles = {}
+        self.title_font = QFont(self.font())
+        self.title_font.setBold(True)
+        self.title_font.setPixelSize(14)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        # 画布覆盖整个控件，Qt不需要先擦除背景
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+        # GUI线程刷新统计
+        self.paints = 0
+        self.skipped_hidden = 0
+        self.refresh_time = 0.0
+        self.refresh_calls = 0
+
+    def set_message(self, message):
+        """设置合成器创建之前显示的提示文字"""
+        self.message = message
+        self.update()
+
+    def start(self, max_fps, placeholder_factory):
+        """创建合成器（重型模块加载完成后调用）
+
+        参数:
+            max_fps (float): 显示帧率上限
+            placeholder_factory: 占位图像生成函数，参数为(宽, 高, 提示文本)，返回BGR图像
+        """
+        from compositor import TileCompositor
+        self.max_fps = max_fps
+        self.compositor = TileCompositor(placeholder_factory)
+
+    def on_frame(self, stream, frame):
+        """帧订阅回调（采集线程），在采集线程中把新帧预先缩放到格子尺寸，见 TileCompositor.on_frame"""
+        compositor = self.compositor
+        if compositor is not None:
+            compositor.on_frame(stream, frame)
+
+    @property
+    def interval_ms(self):
+        """刷新定时器的周期（毫秒）"""
+        return max(1, int(round(1000.0 / self.max_fps)))
+
+    def add_view(self, stream, title, placeholder_text):
+        """添加一个图像流的格子"""
+        self.compositor.add_view(stream, title, placeholder_text)
+        static = QStaticText(title)
+        static.setTextFormat(Qt.PlainText)
+        static.prepare(QTransform(), self.title_font)
+        self.titles[stream] = static
+        self.image = None
+
+    def invalidate(self):
+        """下一次刷新时重新显示所有画面"""
+        if self.compositor is not None:
+            self.compositor.invalidate()
+
+    def refresh(self, get_frame, overlay, state_key):
+        """把有变化的图像流写入画布并请求重绘（GUI线程）
+
+        参数与 TileCompositor.compose 相同
+
+        返回:
+            bool: 是否显示了新的摄像头帧
+        """
+        compositor = self.compositor
+        visible_region = self.visibleRegion()
+        if self.window().isMinimized() or not self.isVisible() or visible_region.isEmpty():
+            # 不可见时采集线程也不再预先缩放
+            compositor.active = False
+            self.skipped_hidden += 1
+            return False
+        compositor.active = True
+
+        start = time.perf_counter()
+        if compositor.resize(self.width(), self.height()) or self.image is None:
+            canvas = compositor.canvas
+            image_format = QImage.Format_BGR888 if HAS_BGR888 else QImage.Format_RGB888
+            # QImage不复制数据，画布由合成器持有
+            self.image = QImage(canvas.data, canvas.shape[1], canvas.shape[0], canvas.strides[0], image_format)
+            self.update()
+
+        dirty, new_frame = compositor.compose(
+            get_frame, overlay, state_key, lambda rect: visible_region.intersects(QRect(*rect)))
+        if dirty:
+            region = QRect(*dirty[0])
+            for rect in dirty[1:]:
+                region = region.united(QRect(*rect))
+            # 多次update会被Qt合并为一次绘制
+            self.update(region)
+
+        self.refresh_time += time.perf_counter() - start
+        self.refresh_calls += 1
+        return new_frame
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if self.image is None:
+            painter.fillRect(self.rect(), QColor(0, 0, 0))
+            painter.setPen(QColor(255, 255, 255))
+            painter.drawText(self.rect(), Qt.AlignCenter, self.message)
+            return
+        self.paints += 1
+        rect = event.rect()
+        if HAS_BGR888:
+            painter.drawImage(rect, self.image, rect)
+        else:
+            painter.drawImage(rect, self.image.copy(rect).rgbSwapped())
+
+        # 格子标题
+        painter.setFont(self.title_font)
+        painter.setPen(QColor(230, 230, 230))
+        for tile in self.compositor.tiles:
+            title_rect = QRect(*tile.title_rect)
+            if not rect.intersects(title_rect):
+                continue
+            static = self.titles[tile.stream]
+            size = static.size()
+            painter.drawStaticText(title_rect.x() + int((title_rect.width() - size.width()) / 2),
+                                   title_rect.y() + int((title_rect.height() - size.height()) / 2), static)
+
+    def format_stats(self):
+        """格式化刷新统计信息"""
+        per_call = self.refresh_time / self.refresh_calls * 1000 if self.refresh_calls else 0.0
+        text = (f"绘制 {self.paints} 次，窗口不可见时跳过 {self.skipped_hidden} 次，"
+                f"显示帧率上限 {self.max_fps or 0:.0f}，每次刷新耗时 {per_call:.2f} ms")
+        if self.compositor is not None:
+            text += f"；合成: {self.compositor.format_stats()}"
+        return text
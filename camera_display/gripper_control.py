@@ -6,6 +6,7 @@
 提供串口通信和夹爪控制功能
 """
 
+import os
 import serial
 import serial.tools.list_ports
 import struct
@@ -13,6 +14,15 @@ import time
 import json
 import threading
 import re
+from collections import namedtuple
+from station_log import get_logger, log_fields
+
+log = get_logger("gripper")
+
+# 夹爪数据快照（不可变）
+# 读取线程每收到一帧数据就整体替换一次快照，读取方拿到的角度、距离和时间戳始终属于同一帧
+# timestamp 为 time.time()，capture_time 为收到数据时的 time.monotonic()，用于和摄像头帧对齐
+GripperSample = namedtuple('GripperSample', ['angle', 'distance', 'timestamp', 'seq', 'capture_time'])
 
 # 定义发送标志
 class SendFlag:
@@ -26,39 +36,79 @@ class SendFlag:
     VIBRATE_CTRL = 51
 
 class GripperController:
-    def __init__(self, port=None, baudrate=460800):
+    def __init__(self, port=None, baudrate=460800, io_loop=None, name="gripper"):
+        """
+        参数:
+            port (str): 串口
+            baudrate (int): 波特率
+            io_loop (SerialIoLoop): 共享的串口事件循环；为None时每个控制器使用独立的读取线程
+            name (str): 设备名称，写入日志的device字段
+        """
+        self.name = name
         self.serial = None
         self.port = port
         self.baudrate = baudrate
         self.enabled = False
         self.read_thread = None
         self.stop_thread = False
+        self.io_loop = io_loop
+        self.io_fd = None
+        self._rx_buffer = ""
         self.data_callback = None
-        self.current_angle = 0.0
-        self.current_distance = 0.0
-        self.last_data_time = 0
-        self.firmware_version = "未查询到固件版本号"
-        self.sn_code = "未查询到SN码"
+        # 样本订阅者（如数据录制器），每个样本在数据接收线程中以 listener(sample) 调用
+        # 元组只整体替换不原地修改，读取线程遍历时无需加锁
+        self.sample_listeners = ()
+        self.latest_sample = GripperSample(0.0, 0.0, 0, 0, 0.0)
+        self.info_condition = threading.Condition()
+        self._reset_device_info()
+
+    def _reset_device_info(self):
+        """清除设备信息（连接和断开时调用，避免新设备未回报时沿用上一台设备的SN码）"""
+        with self.info_condition:
+            self.firmware_version = "未查询到固件版本号"
+            self.sn_code = "未查询到SN码"
+            # 设备信息（固件版本/SN码）回报计数，用于等待GET_INFO的回读结果；为0表示本次连接尚未回报
+            self.info_seq = 0
+
+    def _log_extra(self):
+        """日志的结构化字段"""
+        sn = self.sn_code if self.info_seq > 0 else None
+        return log_fields(device=self.name, sn=sn, port=self.port)
+
+    @property
+    def current_angle(self):
+        return self.latest_sample.angle
+
+    @property
+    def current_distance(self):
+        return self.latest_sample.distance
+
+    @property
+    def last_data_time(self):
+        return self.latest_sample.timestamp
     
     def connect(self, port, baudrate=460800):
         """连接到指定串口"""
         try:
             if self.serial and self.serial.is_open:
+                self._unregister_io()
                 self.serial.close()
                 if self.read_thread and self.read_thread.is_alive():
                     self.stop_thread = True
                     self.read_thread.join(timeout=1.0)
+            self._reset_device_info()
             
             self.serial = serial.Serial(port, baudrate, timeout=1)
             self.port = port
             self.baudrate = baudrate
             return True
         except Exception as e:
-            print(f"串口连接失败: {e}")
+            log.error("串口连接失败: %s", e, extra=self._log_extra())
             return False
     
     def disconnect(self):
         """断开串口连接"""
+        self._unregister_io()
         if self.read_thread and self.read_thread.is_alive():
             self.stop_thread = True
             self.read_thread.join(timeout=1.0)
@@ -68,6 +118,7 @@ class GripperController:
             self.serial.close()
             self.serial = None
             self.enabled = False
+        self._reset_device_info()
     
     def is_connected(self):
         """检查是否已连接"""
@@ -85,7 +136,7 @@ class GripperController:
             self.enabled = True
             return True
         except Exception as e:
-            print(f"夹爪使能失败: {e}")
+            log.error("夹爪使能失败: %s", e, extra=self._log_extra())
             return False
     
     def disable(self):
@@ -100,7 +151,7 @@ class GripperController:
             self.enabled = False
             return True
         except Exception as e:
-            print(f"夹爪禁用失败: {e}")
+            log.error("夹爪禁用失败: %s", e, extra=self._log_extra())
             return False
     
     def set_position(self, angle):
@@ -121,7 +172,7 @@ class GripperController:
             self.serial.write(cmd)
             return True
         except Exception as e:
-            print(f"设置夹爪位置失败: {e}")
+            log.error("设置夹爪位置失败: %s", e, extra=self._log_extra())
             return False
     
     def set_light(self, light_id):
@@ -142,7 +193,7 @@ class GripperController:
             return self.serial.write(data)
         
         except Exception as e:
-            print(f"设置夹爪灯光失败: {e}")
+            log.error("设置夹爪灯光失败: %s", e, extra=self._log_extra())
             return False
     
     def vibrate_control(self, mode):
@@ -154,7 +205,7 @@ class GripperController:
             return False
         
         try:
-            print(f"设置夹爪震动模式: {mode}")
+            log.info("设置夹爪震动模式: %s", mode, extra=self._log_extra())
             data = bytearray()
             data.append(SendFlag.VIBRATE_CTRL)
             data.extend(struct.pack(">i", mode))
@@ -163,7 +214,7 @@ class GripperController:
             return self.serial.write(data)
         
         except Exception as e:
-            print(f"设置夹爪震动失败: {e}")
+            log.error("设置夹爪震动失败: %s", e, extra=self._log_extra())
             return False
         
     
@@ -179,6 +230,14 @@ class GripperController:
         self.data_callback = callback
         self.stop_thread = False
         
+        if self.io_loop is not None:
+            # 由共享的事件循环读取数据
+            if self.io_fd is None:
+                self._rx_buffer = ""
+                self.io_fd = self.serial.fileno()
+                self.io_loop.register(self.io_fd, self._on_io_data)
+            return True
+        
         if self.read_thread is None or not self.read_thread.is_alive():
             self.read_thread = threading.Thread(target=self._read_data_thread, daemon=True)
             self.read_thread.start()
@@ -187,6 +246,7 @@ class GripperController:
     
     def stop_data_reception(self):
         """停止接收数据"""
+        self._unregister_io()
         if self.read_thread and self.read_thread.is_alive():
             self.stop_thread = True
             self.read_thread.join(timeout=1.0)
@@ -220,96 +280,149 @@ class GripperController:
         # 未找到匹配的结束括号
         return -1, -1
     
+    def _unregister_io(self):
+        """从共享事件循环中注销串口"""
+        if self.io_loop is not None and self.io_fd is not None:
+            self.io_loop.unregister(self.io_fd)
+            self.io_fd = None
+    
+    def _on_io_data(self, data):
+        """共享事件循环的数据处理函数（在事件循环线程中调用）"""
+        if data is None:
+            # 串口被拔出或关闭，事件循环已自动注销
+            self.io_fd = None
+            log.warning("串口已断开", extra=self._log_extra())
+            return
+        self._process_data(data.decode('utf-8', errors='ignore'))
+    
     def _read_data_thread(self):
         """数据读取线程"""
-        buffer = ""
+        self._rx_buffer = ""
         
         while not self.stop_thread and self.serial and self.serial.is_open:
             try:
                 # 读取串口数据
                 if self.serial.in_waiting > 0:
                     data = self.serial.read(self.serial.in_waiting).decode('utf-8', errors='ignore')
-                    buffer += data
-                    
-                    # 防止缓冲区过大
-                    if len(buffer) > 2000:
-                        buffer = ""
-                    
-                    # 查找完整的JSON对象
-                    start_idx, end_idx = self._find_json(buffer)
-                    while start_idx != -1 and end_idx != -1:
-                        # 提取JSON字符串
-                        json_str = buffer[start_idx:end_idx+1]
-                        buffer = buffer[end_idx+1:]
-                        
-                        json_str = re.sub(r',(\s*[}\]])', r'\1', json_str)   
-                             
-                        try:
-                            # 解析JSON数据
-                            data_obj = json.loads(json_str)
-                            
-                            # 检查是否包含固件版本信息
-                            if 'Version' in data_obj:
-                                self.firmware_version = data_obj['Version']
-                                print(f"接收到固件版本号: {self.firmware_version}")
-
-                            # 检查并更新 SN 码
-                            if 'SN' in data_obj:
-                                self.sn_code = data_obj['SN']
-                                print(f"接收到夹爪SN码: {self.sn_code}")
-                                
-                            # 检查是否包含AS5047数据
-                            if 'AS5047' in data_obj:
-                                as5047_data = data_obj['AS5047']
-                                if 'error' not in as5047_data:
-                                    # 优先使用rad字段，如果不存在则尝试使用angle字段
-                                    if 'rad' in as5047_data:
-                                        angle = as5047_data['rad']
-                                    elif 'angle' in as5047_data:
-                                        # 如果提供的是角度值，转换为弧度（假设角度范围是0-180）
-                                        angle = as5047_data['angle'] * 0.01745  # 角度转弧度
-                                    else:
-                                        angle = 0.0
-                                    
-                                    # 确保角度非负
-                                    # if angle < 0:
-                                    #     angle = 0.0
-                                    
-                                    # 获取distance值，如果不存在则为0
-                                    distance = as5047_data.get('distance', 0.0)
-                                    
-                                    # 更新当前数据
-                                    self.current_angle = angle
-                                    self.current_distance = distance
-                                    self.last_data_time = time.time()
-                                    
-                                    # 调用回调函数
-                                    if self.data_callback:
-                                        self.data_callback(angle, distance, self.last_data_time)
-                                    
-                                    # 打印调试信息
-                                    # print(f"接收到夹爪数据: 角度={angle:.4f}, 距离={distance:.4f}")
-                        except json.JSONDecodeError as e:
-                            print(f"JSON解析错误: {e}, 数据: {json_str}")
-                        except Exception as e:
-                            print(f"数据处理错误: {e}")
-                        
-                        # 继续查找下一个JSON对象
-                        start_idx, end_idx = self._find_json(buffer)
+                    self._process_data(data)
                 
                 # 短暂休眠，避免CPU占用过高
                 time.sleep(0.01)
             except Exception as e:
-                print(f"数据读取线程错误: {e}")
+                log.error("数据读取线程错误: %s", e, extra=self._log_extra())
                 time.sleep(0.1)  # 出错时稍微延长休眠时间
     
+    def _process_data(self, data):
+        """处理收到的串口数据：拼接缓冲区并解析其中完整的JSON对象
+        
+        参数:
+            data (str): 新收到的数据
+        """
+        self._rx_buffer += data
+        
+        # 防止缓冲区过大
+        if len(self._rx_buffer) > 2000:
+            self._rx_buffer = ""
+        
+        # 查找完整的JSON对象
+        start_idx, end_idx = self._find_json(self._rx_buffer)
+        while start_idx != -1 and end_idx != -1:
+            # 提取JSON字符串
+            json_str = self._rx_buffer[start_idx:end_idx+1]
+            self._rx_buffer = self._rx_buffer[end_idx+1:]
+            
+            json_str = re.sub(r',(\s*[}\]])', r'\1', json_str)   
+                 
+            try:
+                # 解析JSON数据
+                data_obj = json.loads(json_str)
+                
+                # 检查是否包含固件版本信息
+                if 'Version' in data_obj:
+                    self.firmware_version = data_obj['Version']
+                    log.info("接收到固件版本号: %s", self.firmware_version, extra=self._log_extra())
+
+                # 检查并更新 SN 码
+                if 'SN' in data_obj:
+                    self.sn_code = data_obj['SN']
+                    log.info("接收到夹爪SN码: %s", self.sn_code, extra=self._log_extra())
+
+                # 通知等待设备信息的线程
+                if 'Version' in data_obj or 'SN' in data_obj:
+                    with self.info_condition:
+                        self.info_seq += 1
+                        self.info_condition.notify_all()
+                    
+                # 检查是否包含AS5047数据
+                if 'AS5047' in data_obj:
+                    as5047_data = data_obj['AS5047']
+                    if 'error' not in as5047_data:
+                        # 优先使用rad字段，如果不存在则尝试使用angle字段
+                        if 'rad' in as5047_data:
+                            angle = as5047_data['rad']
+                        elif 'angle' in as5047_data:
+                            # 如果提供的是角度值，转换为弧度（假设角度范围是0-180）
+                            angle = as5047_data['angle'] * 0.01745  # 角度转弧度
+                        else:
+                            angle = 0.0
+                        
+                        # 确保角度非负
+                        # if angle < 0:
+                        #     angle = 0.0
+                        
+                        # 获取distance值，如果不存在则为0
+                        distance = as5047_data.get('distance', 0.0)
+                        
+                        # 发布新的数据快照（单次引用赋值，读取方不会读到半更新的数据）
+                        sample = GripperSample(angle, distance, time.time(),
+                                               self.latest_sample.seq + 1, time.monotonic())
+                        self.latest_sample = sample
+                        
+                        for listener in self.sample_listeners:
+                            listener(sample)
+                        
+                        # 调用回调函数
+                        if self.data_callback:
+                            self.data_callback(sample.angle, sample.distance, sample.timestamp)
+                        
+                        # 打印调试信息
+                        # print(f"接收到夹爪数据: 角度={angle:.4f}, 距离={distance:.4f}")
+            except json.JSONDecodeError as e:
+                log.warning("JSON解析错误: %s, 数据: %s", e, json_str, extra=self._log_extra())
+            except Exception as e:
+                log.warning("数据处理错误: %s", e, extra=self._log_extra())
+            
+            # 继续查找下一个JSON对象
+            start_idx, end_idx = self._find_json(self._rx_buffer)
+    
     def get_current_data(self):
         """获取当前数据
         
         返回:
             tuple: (angle, distance, timestamp)
         """
-        return (self.current_angle, self.current_distance, self.last_data_time)
+        sample = self.latest_sample
+        return (sample.angle, sample.distance, sample.timestamp)
+
+    def get_latest_sample(self):
+        """获取最新的数据快照
+        
+        返回:
+            GripperSample: (angle, distance, timestamp, seq, capture_time)，seq 每收到一帧数据加1
+        """
+        return self.latest_sample
+
+    def add_sample_listener(self, listener):
+        """订阅数据样本
+        
+        参数:
+            listener: 样本处理函数，在数据接收线程中以 listener(GripperSample) 调用，不能阻塞
+        """
+        self.sample_listeners = self.sample_listeners + (listener,)
+
+    def remove_sample_listener(self, listener):
+        """取消订阅数据样本"""
+        self.sample_listeners = tuple(l for l in self.sample_listeners if l != listener)
 
     def get_device_info_command(self):
         """
@@ -324,15 +437,52 @@ class GripperController:
             data = command.encode('utf-8')
             # 每0.write()命令,循环5次
             for _ in range(5):
-                print("正在发送GET_INFO命令...")
+                log.info("正在发送GET_INFO命令...", extra=self._log_extra())
                 self.serial.write(data)
                 time.sleep(0.2)
                     
             # return self.serial.write(data)
         except Exception as e:
-            print(f"发送GET_INFO命令失败: {e}")
+            log.error("发送GET_INFO命令失败: %s", e, extra=self._log_extra())
             # return False
 
+    def request_device_info(self):
+        """下发一次GET_INFO命令，不等待回复
+        
+        返回:
+            int: 发送前的设备信息回报计数，可传给 wait_for_sn() 只接受之后的回报；发送失败返回None
+        """
+        if not self.is_connected():
+            return None
+        try:
+            with self.info_condition:
+                seq = self.info_seq
+            self.serial.write('GET_INFO\r\n'.encode('utf-8'))
+            return seq
+        except Exception as e:
+            log.error("发送GET_INFO命令失败: %s", e, extra=self._log_extra())
+            return None
+
+    def wait_for_sn(self, expected_sn, after_seq, timeout=1.0):
+        """等待设备回报指定的SN码
+        
+        参数:
+            expected_sn (str): 期望的SN码
+            after_seq (int): 只接受该计数之后的设备信息回报
+            timeout (float): 超时时间（秒）
+            
+        返回:
+            bool: 在超时前回读到期望的SN码时返回True
+        """
+        deadline = time.time() + timeout
+        with self.info_condition:
+            while not (self.info_seq > after_seq and self.sn_code == expected_sn):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self.info_condition.wait(remaining)
+        return True
+
     def set_sn_code_command(self, sn_code):
         """
         下发SET_SN=<SN码>\r\n命令到设备
@@ -365,18 +515,20 @@ class GripperController:
             data = command.encode('utf-8')
             # 写入串口
             self.serial.write(data)
-            print(f"正在写入SN码: {command.strip()}")
+            log.info("正在写入SN码: %s", command.strip(), extra=self._log_extra())
             return True
         except Exception as e:
-            print(f"发送SN码失败: {e}")
+            log.error("发送SN码失败: %s", e, extra=self._log_extra())
             return False
         
 
 def list_serial_ports():
-    """列出所有可用的串口设备"""
+    """列出所有可用的串口设备（包括环境变量 PIKA_EXTRA_PORTS 中的串口，如模拟夹爪的伪终端，用:分隔）"""
     ports = []
     for port in serial.tools.list_ports.comports():
         if 'ttyUSB' in port.device:
             ports.append(port.device)
+    extra = os.environ.get("PIKA_EXTRA_PORTS", "")
+    ports.extend(path for path in extra.split(os.pathsep) if path and os.path.exists(path) and path not in ports)
     return ports
 
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Pika夹爪模拟器
+用伪终端(pty)模拟夹爪串口，不需要硬件即可测试 GripperController 和读取端的改动:
+- 按设定频率发送AS5047数据 {"AS5047": {"rad": 角度, "distance": 距离}}，带高斯噪声
+- 解析下发的命令: SendFlag 二进制命令（使能/失能/位置/灯光/震动等，7字节定长）、
+  GET_INFO（回复 {"Version": ..., "SN": ...}）、SET_SN=<SN码>
+- 使能后角度按限速跟随位置命令，失能时模拟手动开合（正弦往复）或回放录制的角度
+- 可注入异常: 格式错误的JSON、尾随逗号、成批突发发送、拆成两段发送、非UTF-8的二进制垃圾数据
+
+用法:
+    python3 gripper_sim.py                              # 一个模拟夹爪，100Hz，输出串口路径
+    python3 gripper_sim.py --count 4 --rate 1000        # 4个模拟夹爪，1000Hz（真实频率的10倍）
+    python3 gripper_sim.py --malformed 0.01 --trailing-comma 0.05 --burst 0.01 --garbage 0.01
+    python3 gripper_sim.py --selftest --rate 1000 --duration 10   # 用 GripperController 连接并统计
+
+模拟串口的路径（/dev/pts/N）不是ttyUSB设备，需要在界面中使用时设置环境变量:
+    PIKA_EXTRA_PORTS=/dev/pts/5:/dev/pts/6 python3 camera_display.py
+"""
+
+import os
+import sys
+import tty
+import math
+import json
+import time
+import logging
+import random
+import struct
+import select
+import argparse
+import threading
+from collections import Counter
+
+from gripper_control import SendFlag
+
+# 二进制命令长度: 标志(1字节) + 参数(4字节) + \r\n
+COMMAND_SIZE = 7
+# 参数为大端整数的命令，其余命令的参数为小端浮点数
+INT_COMMANDS = (SendFlag.LIGHT_CTRL, SendFlag.VIBRATE_CTRL)
+COMMAND_NAMES = {value: name.lower() for name, value in vars(SendFlag).items() if not name.startswith('_')}
+TEXT_COMMANDS = (b"GET_INFO", b"SET_SN=")
+
+# 夹爪行程: 角度范围（弧度）和对应的最大开口距离（毫米）
+MAX_ANGLE = 1.7
+MAX_DISTANCE = 98.0
+# 使能后跟随位置命令的最大角速度（弧度/秒）
+MAX_SLEW = 4.0
+# 失能时模拟手动开合的周期（秒）
+MANUAL_PERIOD = 4.0
+# 一次突发发送的帧数范围
+BURST_FRAMES = (5, 50)
+
+
+class VirtualGripper:
+    """一个模拟夹爪
+
+    参数:
+        rate (float): AS5047数据发送频率（Hz）
+        sn (str): 初始SN码
+        firmware (str): 固件版本号
+        noise (float): 角度噪声的标准差（弧度）
+        malformed (float): 每帧发送格式错误JSON的概率
+        trailing_comma (float): 每帧带尾随逗号的概率（真实固件会发送，读取端需要兼容）
+        burst (float): 每帧开始一次突发的概率（积压多帧后一次写出）
+        split (float): 每帧拆成两段、间隔约1毫秒发送的概率
+        garbage (float): 每帧前插入二进制垃圾数据的概率
+        seed (int): 随机数种子，相同种子产生相同的异常序列
+        replay (sequence): 回放的角度序列（弧度，如录制数据的 angle 列），循环播放，代替模拟的手动开合
+    """
+
+    def __init__(self, rate=100.0, sn="PIKA0000", firmware="V1.0.0-sim", noise=0.002, malformed=0.0,
+                 trailing_comma=0.0, burst=0.0, split=0.0, garbage=0.0, seed=None, replay=None):
+        self.rate = rate
+        self.sn = sn
+        self.firmware = firmware
+        self.noise = noise
+        self.faults = {"malformed": malformed, "trailing_comma": trailing_comma, "burst": burst,
+                       "split": split, "garbage": garbage}
+        self.random = random.Random(seed)
+        self.replay = replay if replay is not None and len(replay) > 0 else None
+        self.replay_index = 0
+
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        self.path = os.ttyname(self.slave_fd)
+
+        # 夹爪状态（只由模拟器线程修改）
+        self.enabled = False
+        self.angle = 0.0
+        self.target = 0.0
+        self.light = None
+        self.vibrate = None
+
+        # 统计: 发送的帧数和注入的异常次数、收到的命令
+        self.stats = Counter()
+        self.commands = Counter()
+        self.command_log = []
+        self.write_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.threads = []
+
+    def start(self):
+        """启动发送线程和命令解析线程"""
+        self.threads = [threading.Thread(target=self._telemetry_loop, name="sim-telemetry", daemon=True),
+                        threading.Thread(target=self._command_loop, name="sim-command", daemon=True)]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        """停止线程并关闭伪终端"""
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+        for fd in (self.master_fd, self.slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _write(self, data):
+        with self.write_lock:
+            try:
+                os.write(self.master_fd, data)
+            except OSError:
+                # 读取端未打开或缓冲区满（读取端跟不上），丢弃
+                self.stats["write_errors"] += 1
+
+    # ---------------- 数据发送 ----------------
+
+    def _step(self, dt, now):
+        """更新夹爪角度"""
+        if self.enabled:
+            delta = max(-MAX_SLEW * dt, min(MAX_SLEW * dt, self.target - self.angle))
+            self.angle += delta
+        elif self.replay is not None:
+            self.angle = float(self.replay[self.replay_index])
+            self.replay_index = (self.replay_index + 1) % len(self.replay)
+        else:
+            self.angle = MAX_ANGLE * 0.5 * (1 - math.cos(2 * math.pi * now / MANUAL_PERIOD))
+
+    def _frame(self):
+        """生成一帧数据（可能注入异常）"""
+        rand = self.random.random
+        angle = self.angle + self.random.gauss(0.0, self.noise)
+        distance = max(0.0, angle) / MAX_ANGLE * MAX_DISTANCE
+        if rand() < self.faults["malformed"]:
+            self.stats["malformed"] += 1
+            return self.random.choice((
+                '{"AS5047": {"rad": %.4f, "distance": }}\r\n' % angle,
+                '{"AS5047": {"rad": nan_, "distance": %.3f}}\r\n' % distance,
+                '{"AS5047": {"rad" %.4f "distance": %.3f}}\r\n' % (angle, distance),
+                '{"AS5047": {"error": "magnet too weak"}}\r\n',
+            )).encode()
+        if rand() < self.faults["trailing_comma"]:
+            self.stats["trailing_comma"] += 1
+            return ('{"AS5047": {"rad": %.4f, "distance": %.3f,},}\r\n' % (angle, distance)).encode()
+        return ('{"AS5047": {"rad": %.4f, "distance": %.3f}}\r\n' % (angle, distance)).encode()
+
+    def _telemetry_loop(self):
+        period = 1.0 / self.rate
+        next_time = time.perf_counter()
+        last = next_time
+        pending = []
+        burst_left = 0
+        while not self.stop_event.is_set():
+            now = time.perf_counter()
+            self._step(now - last, now)
+            last = now
+            frame = self._frame()
+            self.stats["frames"] += 1
+            if self.random.random() < self.faults["garbage"]:
+                self.stats["garbage"] += 1
+                frame = bytes(self.random.getrandbits(8) for _ in range(self.random.randint(1, 32))) + frame
+            if burst_left == 0 and self.random.random() < self.faults["burst"]:
+                self.stats["burst"] += 1
+                burst_left = self.random.randint(*BURST_FRAMES)
+            if burst_left > 0:
+                # 突发: 积压若干帧后一次写出（模拟USB转串口芯片的批量传输）
+                pending.append(frame)
+                burst_left -= 1
+                if burst_left == 0:
+                    self._write(b"".join(pending))
+                    pending = []
+            elif self.random.random() < self.faults["split"]:
+                self.stats["split"] += 1
+                cut = self.random.randint(1, len(frame) - 1)
+                self._write(frame[:cut])
+                time.sleep(0.001)
+                self._write(frame[cut:])
+            else:
+                self._write(frame)
+
+            next_time += period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -1.0:
+                # 落后太多（如进程被挂起）时不追赶
+                next_time = time.perf_counter()
+
+    # ---------------- 命令解析 ----------------
+
+    def _command_loop(self):
+        buffer = b""
+        while not self.stop_event.is_set():
+            try:
+                ready, _, _ = select.select([self.master_fd], [], [], 0.1)
+                if not ready:
+                    continue
+                data = os.read(self.master_fd, 4096)
+            except OSError:
+                # 读取端关闭后从端暂时没有打开者，稍后重试
+                time.sleep(0.05)
+                continue
+            buffer = self.parse_commands(buffer + data)
+
+    def parse_commands(self, buffer):
+        """解析缓冲区中的完整命令，返回剩余的不完整数据"""
+        while buffer:
+            if buffer.startswith(TEXT_COMMANDS):
+                end = buffer.find(b"\r\n")
+                if end == -1:
+                    return buffer
+                self._handle_text(buffer[:end].decode("utf-8", errors="replace"))
+                buffer = buffer[end + 2:]
+            elif buffer[0] in COMMAND_NAMES:
+                if len(buffer) < COMMAND_SIZE:
+                    return buffer
+                if buffer[5:7] != b"\r\n":
+                    self.commands["invalid"] += 1
+                    buffer = buffer[1:]
+                    continue
+                flag = buffer[0]
+                if flag in INT_COMMANDS:
+                    value = struct.unpack(">i", buffer[1:5])[0]
+                else:
+                    value = struct.unpack("<f", buffer[1:5])[0]
+                self._handle_command(flag, value)
+                buffer = buffer[COMMAND_SIZE:]
+            elif any(prefix.startswith(buffer) for prefix in TEXT_COMMANDS):
+                # 文本命令的前缀，等待更多数据
+                return buffer
+            else:
+                # 无法识别的字节，跳过一个字节重新同步
+                self.commands["invalid"] += 1
+                buffer = buffer[1:]
+        return buffer
+
+    def _log_command(self, name, value):
+        self.commands[name] += 1
+        self.command_log.append((time.time(), name, value))
+        if len(self.command_log) > 1000:
+            del self.command_log[:500]
+
+    def _handle_command(self, flag, value):
+        name = COMMAND_NAMES[flag]
+        self._log_command(name, value)
+        if flag == SendFlag.ENABLE:
+            self.enabled = True
+            self.target = self.angle
+        elif flag == SendFlag.DISABLE:
+            self.enabled = False
+        elif flag == SendFlag.POSITION_CTRL:
+            self.target = max(0.0, min(MAX_ANGLE, value))
+        elif flag == SendFlag.SET_ZERO:
+            self.angle = self.target = 0.0
+        elif flag == SendFlag.LIGHT_CTRL:
+            self.light = value
+        elif flag == SendFlag.VIBRATE_CTRL:
+            self.vibrate = value
+
+    def _handle_text(self, command):
+        if command == "GET_INFO":
+            self._log_command("get_info", None)
+            self._write((json.dumps({"Version": self.firmware, "SN": self.sn}) + "\r\n").encode())
+        elif command.startswith("SET_SN="):
+            self.sn = command[len("SET_SN="):]
+            self._log_command("set_sn", self.sn)
+        else:
+            self.commands["invalid"] += 1
+
+    def format_stats(self):
+        """格式化统计信息"""
+        sent = "，".join(f"{name} {count}" for name, count in sorted(self.stats.items()))
+        received = "，".join(f"{name} {count}" for name, count in sorted(self.commands.items())) or "无"
+        return f"{self.path}: 发送 {sent}；收到命令 {received}"
+
+
+def selftest(gripper, duration):
+    """用 GripperController（共享事件循环）连接模拟夹爪，检查数据接收和各个命令
+
+    返回:
+        bool: 全部检查是否通过
+    """
+    from gripper_control import GripperController
+    from serial_io import get_default_loop
+    from station_log import get_logger
+
+    # 注入的格式错误帧是预期的，不逐条输出解析警告
+    get_logger("gripper").setLevel(logging.ERROR)
+    controller = GripperController(io_loop=get_default_loop(), name="sim")
+    if not controller.connect(gripper.path):
+        print(f"无法打开 {gripper.path}")
+        return False
+    controller.start_data_reception()
+    ok = True
+
+    def check(name, passed):
+        nonlocal ok
+        ok = ok and passed
+        print(f"  {'通过' if passed else '失败'}  {name}")
+
+    try:
+        info_seq = controller.info_seq
+        controller.request_device_info()
+        check("GET_INFO 回读SN码", controller.wait_for_sn(gripper.sn, info_seq))
+        info_seq = controller.info_seq
+        controller.set_sn_code_command("PIKA9999")
+        time.sleep(0.05)
+        controller.request_device_info()
+        check("SET_SN 后回读新SN码", controller.wait_for_sn("PIKA9999", info_seq))
+        controller.set_light(2)
+        controller.vibrate_control(1)
+        controller.enable()
+        controller.set_position(1.2)
+        time.sleep(0.5)
+        check("灯光/震动命令", gripper.light == 2 and gripper.vibrate == 1)
+        check("位置控制", gripper.enabled and abs(controller.current_angle - 1.2) < 0.05)
+        controller.disable()
+
+        start_seq = controller.get_latest_sample().seq
+        start_frames = gripper.stats["frames"]
+        start = time.perf_counter()
+        time.sleep(duration)
+        elapsed = time.perf_counter() - start
+        received = controller.get_latest_sample().seq - start_seq
+        frames = gripper.stats["frames"] - start_frames
+        print(f"  收到 {received} / 发送 {frames} 帧（{received / elapsed:.0f} Hz），"
+              f"无效命令 {gripper.commands['invalid']}")
+        check("数据接收率不低于90%（不含注入的格式错误帧）",
+              received >= 0.9 * (frames - frames * gripper.faults["malformed"]))
+    finally:
+        controller.stop_data_reception()
+        controller.disconnect()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pika夹爪模拟器")
+    parser.add_argument('--count', type=int, default=1, help="模拟夹爪数量")
+    parser.add_argument('--rate', type=float, default=100.0, help="数据发送频率（Hz）")
+    parser.add_argument('--sn', default="PIKA0000", help="初始SN码（多个夹爪时末尾数字递增）")
+    parser.add_argument('--firmware', default="V1.0.0-sim", help="固件版本号")
+    parser.add_argument('--noise', type=float, default=0.002, help="角度噪声标准差（弧度）")
+    parser.add_argument('--malformed', type=float, default=0.0, help="格式错误帧的概率")
+    parser.add_argument('--trailing-comma', type=float, default=0.0, help="尾随逗号的概率")
+    parser.add_argument('--burst', type=float, default=0.0, help="突发发送的概率")
+    parser.add_argument('--split', type=float, default=0.0, help="拆分发送的概率")
+    parser.add_argument('--garbage', type=float, default=0.0, help="插入二进制垃圾数据的概率")
+    parser.add_argument('--seed', type=int, help="随机数种子")
+    parser.add_argument('--duration', type=float, help="运行时长（秒），默认一直运行到Ctrl+C")
+    parser.add_argument('--selftest', action='store_true', help="用 GripperController 连接第一个模拟夹爪并检查")
+    args = parser.parse_args()
+
+    from sn_provision import expand_sn_range
+    grippers = [VirtualGripper(args.rate, sn, args.firmware, args.noise, args.malformed, args.trailing_comma,
+                               args.burst, args.split, args.garbage,
+                               None if args.seed is None else args.seed + index).start()
+                for index, sn in enumerate(expand_sn_range(args.sn, args.count))]
+    try:
+        if args.selftest:
+            print(f"自检 {grippers[0].path}（{args.rate:.0f} Hz）:")
+            ok = selftest(grippers[0], args.duration or 5.0)
+            print(grippers[0].format_stats())
+            return 0 if ok else 1
+
+        paths = ":".join(gripper.path for gripper in grippers)
+        for gripper in grippers:
+            print(f"模拟夹爪 {gripper.sn}: {gripper.path}")
+        print(f"在界面中使用: PIKA_EXTRA_PORTS={paths} python3 camera_display.py")
+        try:
+            if args.duration:
+                time.sleep(args.duration)
+            else:
+                while True:
+                    time.sleep(1.0)
+        except KeyboardInterrupt:
+            pass
+        for gripper in grippers:
+            print(gripper.format_stats())
+        return 0
+    finally:
+        for gripper in grippers:
+            gripper.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
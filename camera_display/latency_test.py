@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+端到端延迟测试（glass-to-glass）
+通过 GripperController.set_light 切换夹爪LED颜色，USB摄像头拍摄LED，在画面的ROI区域内检测颜色切换，
+统计从发出命令到以下各阶段的延迟分布:
+    快门    切换后第一帧的采集时刻（CameraFrame.capture_time，V4L2缓冲区时间戳）
+    到达    该帧被采集线程读到的时刻
+    显示    按界面刷新定时器（30ms）轮询最新帧时，第一次取到该帧（或更新的帧）的时刻
+可以比较不同的采集配置（分辨率/帧率/像素格式）和采集管线:
+    direct   独立读取线程，驱动默认缓冲区数量
+    buffer1  独立读取线程，CAP_PROP_BUFFERSIZE=1
+    manager  质检软件实际使用的 CameraManager 采集线程（使用摄像头默认配置，RealSense如已连接也同时采集）
+
+用法:
+    python3 latency_test.py --port /dev/ttyUSB0 --camera 1
+    python3 latency_test.py --port /dev/ttyUSB0 --profiles 640x480@30 1280x720@30:MJPG --modes direct buffer1 --trials 50 --json result.json
+
+注意: 测试前请先在质检软件中断开该串口并关闭摄像头，把夹爪LED放在摄像头视野内
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+
+import cv2
+import numpy as np
+
+from gripper_control import GripperController
+from station_log import setup_logging, shutdown_logging, get_logger
+from time_sync import ClockSync
+
+log = get_logger("latency")
+
+# 交替切换的两种LED颜色（1-红色，3-蓝色，色差最大）
+LIGHT_A = 1
+LIGHT_B = 3
+
+# 界面刷新定时器间隔（秒），与 camera_display 的画面刷新定时器一致
+DISPLAY_INTERVAL = 0.03
+
+# 校准：每种颜色保持的时间和采集的帧数
+CALIBRATE_SETTLE = 0.5
+CALIBRATE_FRAMES = 10
+
+# 自动查找ROI时的区域边长（像素）和最小色差
+AUTO_ROI_SIZE = 24
+AUTO_ROI_MIN_DIFF = 30.0
+
+# 单次切换等待检测结果的超时时间，以及两次切换之间的随机间隔（避免与帧周期同相）
+TRIAL_TIMEOUT = 1.0
+TRIAL_GAP = (0.25, 0.5)
+
+# ROI颜色从旧颜色向新颜色移动超过该比例时视为已切换
+SWITCH_THRESHOLD = 0.5
+
+PIPELINE_MODES = ("direct", "buffer1", "manager")
+
+STAGES = ("photon", "arrival", "display")
+STAGE_TEXT = {"photon": "快门", "arrival": "到达", "display": "显示"}
+
+
+def parse_profile(text):
+    """解析采集配置，格式为 宽x高@帧率[:FOURCC]，如 1280x720@30:MJPG"""
+    match = re.match(r'^(\d+)x(\d+)@(\d+)(?::(\w{4}))?$', text)
+    if not match:
+        raise ValueError(f"无效的采集配置: {text}")
+    width, height, fps, fourcc = match.groups()
+    return {"name": text, "width": int(width), "height": int(height), "fps": int(fps), "fourcc": fourcc}
+
+
+def roi_mean(image, roi):
+    """ROI区域的平均颜色（BGR）"""
+    x, y, w, h = roi
+    return image[y:y + h, x:x + w].mean(axis=(0, 1))
+
+
+def switch_progress(mean, old_ref, new_ref):
+    """ROI颜色从旧颜色向新颜色移动的比例（投影到两种参考颜色的连线上）"""
+    direction = new_ref - old_ref
+    return float(np.dot(mean - old_ref, direction) / np.dot(direction, direction))
+
+
+def find_led_roi(images_a, images_b, size=AUTO_ROI_SIZE):
+    """根据两种LED颜色下的画面找出色差最大的区域
+
+    参数:
+        images_a (list): LED为颜色A时的画面
+        images_b (list): LED为颜色B时的画面
+
+    返回:
+        tuple: (x, y, w, h)，找不到明显色差时返回None
+    """
+    mean_a = np.mean(np.stack(images_a).astype(np.float32), axis=0)
+    mean_b = np.mean(np.stack(images_b).astype(np.float32), axis=0)
+    diff = np.abs(mean_a - mean_b).sum(axis=2)
+    diff = cv2.blur(diff, (size, size))
+    _, max_value, _, (cx, cy) = cv2.minMaxLoc(diff)
+    if max_value < AUTO_ROI_MIN_DIFF:
+        return None
+    height, width = diff.shape
+    x = min(max(cx - size // 2, 0), width - size)
+    y = min(max(cy - size // 2, 0), height - size)
+    return (x, y, size, size)
+
+
+class DirectSource:
+    """独立读取线程的USB摄像头画面源
+
+    参数:
+        index (int): 摄像头索引
+        profile (dict): 采集配置
+        buffer_size (int): 驱动缓冲区数量，为None时使用默认值
+    """
+
+    def __init__(self, index, profile, buffer_size=None):
+        self.index = index
+        self.profile = profile
+        self.buffer_size = buffer_size
+        self.cam = None
+        self.thread = None
+        self.running = False
+        self.listener = None
+        self.latest = None  # (seq, image)
+        self.clock = ClockSync()
+
+    def start(self, listener):
+        self.listener = listener
+        self.cam = cv2.VideoCapture(self.index)
+        if not self.cam.isOpened():
+            raise RuntimeError(f"无法打开摄像头 {self.index}")
+        if self.profile["fourcc"]:
+            self.cam.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.profile["fourcc"]))
+        self.cam.set(cv2.CAP_PROP_FRAME_WIDTH, self.profile["width"])
+        self.cam.set(cv2.CAP_PROP_FRAME_HEIGHT, self.profile["height"])
+        self.cam.set(cv2.CAP_PROP_FPS, self.profile["fps"])
+        if self.buffer_size is not None:
+            self.cam.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        self.running = True
+        self.thread = threading.Thread(target=self._read_loop, name="latency-capture", daemon=True)
+        self.thread.start()
+
+    def describe(self):
+        """实际生效的采集配置"""
+        width = int(self.cam.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cam.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return f"{width}x{height}@{self.cam.get(cv2.CAP_PROP_FPS):.0f}"
+
+    def _read_loop(self):
+        seq = 0
+        while self.running:
+            ret, image = self.cam.read()
+            if not ret:
+                time.sleep(0.005)
+                continue
+            arrival = time.monotonic()
+            buffer_ms = self.cam.get(cv2.CAP_PROP_POS_MSEC)
+            capture_time = self.clock.add(buffer_ms / 1000.0 if buffer_ms > 0 else None, arrival)
+            seq += 1
+            self.latest = (seq, image)
+            self.listener(image, seq, capture_time, arrival)
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+        if self.cam is not None:
+            self.cam.release()
+
+
+class ManagerSource:
+    """质检软件使用的 CameraManager 采集管线（USB摄像头使用默认配置）"""
+
+    def __init__(self, index):
+        import camera_manager
+        self.camera_manager = camera_manager
+        self.index = index
+        self.manager = None
+        self.listener = None
+        self.opened = threading.Event()
+
+    @property
+    def latest(self):
+        frame = self.manager.get_frame(self.camera_manager.STREAM_USB_COLOR)
+        return None if frame is None else (frame.seq, frame.image)
+
+    def start(self, listener):
+        cm = self.camera_manager
+        self.listener = listener
+
+        def on_status(device, state, message):
+            if device == cm.DEVICE_USB and state == cm.STATE_READY:
+                self.opened.set()
+
+        self.manager = cm.CameraManager(on_status)
+        self.manager.add_frame_listener(self._on_frame)
+        # 与质检软件相同：RealSense（如已连接）同时采集
+        self.manager.open_all(usb_indices=[self.index])
+        if not self.opened.wait(10.0):
+            raise RuntimeError(f"CameraManager无法打开摄像头 {self.index}")
+
+    def describe(self):
+        image = self.latest[1] if self.latest else None
+        return "默认配置" if image is None else f"{image.shape[1]}x{image.shape[0]}（默认配置）"
+
+    def _on_frame(self, stream, frame):
+        if stream == self.camera_manager.STREAM_USB_COLOR:
+            self.listener(frame.image, frame.seq, frame.capture_time, time.monotonic())
+
+    def stop(self):
+        if self.manager is not None:
+            self.manager.shutdown()
+
+
+def create_source(mode, index, profile):
+    if mode == "direct":
+        return DirectSource(index, profile)
+    if mode == "buffer1":
+        return DirectSource(index, profile, buffer_size=1)
+    if mode == "manager":
+        return ManagerSource(index)
+    raise ValueError(f"未知的采集管线: {mode}")
+
+
+class SwitchDetector:
+    """在帧订阅函数中检测LED颜色切换（采集线程调用，只计算ROI均值）"""
+
+    def __init__(self, roi, refs):
+        self.roi = roi
+        self.refs = refs
+        self.lock = threading.Lock()
+        self.armed = None
+        self.result = None
+        self.done = threading.Event()
+
+    def arm(self, old_light, new_light, command_time):
+        """开始一次切换检测"""
+        with self.lock:
+            self.result = None
+            self.done.clear()
+            self.armed = (self.refs[old_light], self.refs[new_light], command_time)
+
+    def disarm(self):
+        with self.lock:
+            self.armed = None
+
+    def on_frame(self, image, seq, capture_time, arrival):
+        armed = self.armed
+        if armed is None:
+            return
+        old_ref, new_ref, command_time = armed
+        if arrival < command_time:
+            return
+        if switch_progress(roi_mean(image, self.roi), old_ref, new_ref) < SWITCH_THRESHOLD:
+            return
+        with self.lock:
+            if self.armed is armed:
+                self.armed = None
+                self.result = (seq, capture_time, arrival)
+                self.done.set()
+
+
+class DisplayPoller:
+    """模拟界面刷新定时器：每 DISPLAY_INTERVAL 秒取一次最新帧，记录每次取到的帧序号"""
+
+    def __init__(self, source):
+        self.source = source
+        self.polls = []
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, name="latency-display", daemon=True)
+        self.thread.start()
+
+    def _loop(self):
+        next_time = time.monotonic()
+        while self.running:
+            latest = self.source.latest
+            if latest is not None:
+                with self.lock:
+                    self.polls.append((time.monotonic(), latest[0]))
+                    if len(self.polls) > 1000:
+                        del self.polls[:500]
+            next_time += DISPLAY_INTERVAL
+            time.sleep(max(0.0, next_time - time.monotonic()))
+
+    def display_time(self, seq, timeout=DISPLAY_INTERVAL * 3):
+        """第一次取到该帧（或更新的帧）的时刻，超时返回None"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                for poll_time, poll_seq in self.polls:
+                    if poll_seq >= seq:
+                        return poll_time
+            time.sleep(DISPLAY_INTERVAL / 3)
+        return None
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+
+
+def collect_images(source, light, gripper, count=CALIBRATE_FRAMES):
+    """点亮指定颜色并采集若干帧画面"""
+    gripper.set_light(light)
+    time.sleep(CALIBRATE_SETTLE)
+    images = []
+    last_seq = None
+    deadline = time.monotonic() + 3.0
+    while len(images) < count and time.monotonic() < deadline:
+        latest = source.latest
+        if latest is not None and latest[0] != last_seq:
+            last_seq = latest[0]
+            images.append(latest[1].copy())
+        time.sleep(0.01)
+    if not images:
+        raise RuntimeError("校准时没有收到画面")
+    return images
+
+
+def calibrate(source, gripper, roi=None):
+    """校准：确定ROI和两种LED颜色在ROI内的参考颜色
+
+    返回:
+        tuple: (roi, {light: 参考颜色})
+    """
+    images_a = collect_images(source, LIGHT_A, gripper)
+    images_b = collect_images(source, LIGHT_B, gripper)
+    if roi is None:
+        roi = find_led_roi(images_a, images_b)
+        if roi is None:
+            raise RuntimeError("画面中找不到LED颜色变化，请把夹爪LED放在摄像头视野内或用 --roi 指定区域")
+    refs = {
+        LIGHT_A: np.mean([roi_mean(image, roi) for image in images_a], axis=0),
+        LIGHT_B: np.mean([roi_mean(image, roi) for image in images_b], axis=0),
+    }
+    if np.linalg.norm(refs[LIGHT_A] - refs[LIGHT_B]) < AUTO_ROI_MIN_DIFF / 3:
+        raise RuntimeError(f"ROI {roi} 内两种LED颜色差别太小，无法检测切换")
+    return roi, refs
+
+
+def run_trials(source, gripper, detector, poller, trials):
+    """交替切换LED颜色，返回每次切换各阶段的延迟（秒），未检测到的记为None"""
+    results = {stage: [] for stage in STAGES}
+    missed = 0
+    light = LIGHT_B  # 校准结束时为颜色B
+    for _ in range(trials):
+        time.sleep(random.uniform(*TRIAL_GAP))
+        new_light = LIGHT_A if light == LIGHT_B else LIGHT_B
+        command_time = time.monotonic()
+        detector.arm(light, new_light, command_time)
+        gripper.set_light(new_light)
+        light = new_light
+        if not detector.done.wait(TRIAL_TIMEOUT):
+            detector.disarm()
+            missed += 1
+            continue
+        seq, capture_time, arrival = detector.result
+        results["photon"].append(capture_time - command_time)
+        results["arrival"].append(arrival - command_time)
+        display_time = poller.display_time(seq)
+        if display_time is not None:
+            results["display"].append(display_time - command_time)
+    return results, missed
+
+
+def summarize(values):
+    """延迟分布统计（毫秒）"""
+    if not values:
+        return None
+    data = np.asarray(values) * 1000.0
+    p50, p90, p99 = np.percentile(data, [50, 90, 99])
+    return {"count": len(values), "min": float(data.min()), "p50": float(p50), "p90": float(p90),
+            "p99": float(p99), "max": float(data.max()), "mean": float(data.mean()), "std": float(data.std())}
+
+
+def run_case(mode, index, profile, gripper, trials, roi=None):
+    """测试一种采集配置和采集管线的组合"""
+    source = create_source(mode, index, profile)
+    detector = None
+    poller = None
+    try:
+        source.start(lambda *args: detector.on_frame(*args) if detector else None)
+        poller = DisplayPoller(source)
+        poller.start()
+        roi, refs = calibrate(source, gripper, roi)
+        detector = SwitchDetector(roi, refs)
+        results, missed = run_trials(source, gripper, detector, poller, trials)
+        return {
+            "profile": profile["name"] if mode != "manager" else "default",
+            "actual": source.describe(),
+            "mode": mode,
+            "roi": list(roi),
+            "trials": trials,
+            "missed": missed,
+            "stages": {stage: summarize(results[stage]) for stage in STAGES},
+            "raw_ms": {stage: [v * 1000.0 for v in results[stage]] for stage in STAGES},
+        }
+    finally:
+        if poller is not None:
+            poller.stop()
+        source.stop()
+
+
+def print_report(cases):
+    """输出延迟对比表"""
+    print()
+    print(f"{'采集配置':<22}{'管线':<10}{'检测':>8}  " +
+          "  ".join(f"{STAGE_TEXT[stage] + ' p50/p90/max (ms)':<28}" for stage in STAGES))
+    for case in cases:
+        detected = f"{case['trials'] - case['missed']}/{case['trials']}"
+        cells = []
+        for stage in STAGES:
+            stats = case["stages"][stage]
+            cells.append(f"{'-':<28}" if stats is None else
+                         f"{stats['p50']:7.1f} /{stats['p90']:7.1f} /{stats['max']:7.1f}      ")
+        print(f"{case['actual']:<22}{case['mode']:<10}{detected:>8}  " + "  ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="通过夹爪LED测量摄像头画面的端到端延迟")
+    parser.add_argument('--port', required=True, help="夹爪串口")
+    parser.add_argument('--camera', type=int, default=1, help="USB摄像头索引")
+    parser.add_argument('--profiles', nargs='+', default=["640x480@30"],
+                        help="采集配置，格式为 宽x高@帧率[:FOURCC]")
+    parser.add_argument('--modes', nargs='+', default=list(PIPELINE_MODES), choices=PIPELINE_MODES,
+                        help="采集管线")
+    parser.add_argument('--trials', type=int, default=30, help="每种组合的切换次数")
+    parser.add_argument('--roi', help="LED所在区域 x,y,w,h，默认自动查找")
+    parser.add_argument('--json', help="把结果（含每次切换的原始延迟）写入JSON文件")
+    args = parser.parse_args()
+    setup_logging(console=False)
+
+    profiles = [parse_profile(text) for text in args.profiles]
+    roi = tuple(int(v) for v in args.roi.split(",")) if args.roi else None
+
+    gripper = GripperController(name="latency")
+    if not gripper.connect(args.port):
+        print(f"无法连接夹爪串口: {args.port}")
+        return 1
+
+    cases = []
+    try:
+        for mode in args.modes:
+            # CameraManager 使用摄像头默认配置，只测一次
+            for profile in (profiles if mode != "manager" else profiles[:1]):
+                print(f"测试 {mode} {profile['name'] if mode != 'manager' else '默认配置'} ...")
+                try:
+                    cases.append(run_case(mode, args.camera, profile, gripper, args.trials, roi))
+                except Exception as e:
+                    print(f"  失败: {e}")
+                    log.error("延迟测试失败: %s %s: %s", mode, profile["name"], e)
+    finally:
+        gripper.set_light(0)
+        gripper.disconnect()
+
+    print_report(cases)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(cases, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入: {args.json}")
+    shutdown_logging()
+    return 0 if cases else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+深度点云生成、PLY导出和CPU预览
+- RayTable: 按深度内参预先计算每个像素的视线方向 (x/z, y/z, 1)，包括畸变校正，
+  内参或步长不变时复用；每帧反投影只需一次逐元素乘法（没有Python循环）:
+      点坐标(米) = 视线方向 * z16深度 * depth_scale
+- PointCloudGenerator: 可选彩色纹理（D405的彩色和深度来自同一组传感器，像素对应；
+  深度降采样后彩色图按最近邻缩放到深度尺寸）、按步长抽取像素、体素降采样、深度范围裁剪
+- write_ply: 按需导出二进制或文本PLY
+- render_preview: 不依赖OpenGL的轻量预览（旋转 + 透视投影 + 深度缓冲），用于快速发现深度变形或错位
+
+用法（无界面运行，打开已连接的摄像头）:
+    python3 pointcloud.py cloud.ply                 # 导出一帧彩色点云
+    python3 pointcloud.py cloud.ply --voxel 0.002   # 2毫米体素降采样
+"""
+
+import sys
+import time
+import argparse
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+# 点云: points 为 N x 3 float32（米，相机坐标系: x向右、y向下、z向前），colors 为 N x 3 uint8（BGR）或None
+PointCloud = namedtuple('PointCloud', ['points', 'colors'])
+
+# 预览时点云绕其中心旋转，相机到中心的距离为点云半径的倍数
+PREVIEW_DISTANCE = 3.0
+
+
+class RayTable:
+    """每个像素的视线方向表
+
+    参数:
+        intrinsics (dict): 深度内参（camera_manager.intrinsics_to_dict 的格式）
+        stride (int): 像素抽取步长，表只包含抽取后的像素
+    """
+
+    def __init__(self, intrinsics, stride=1):
+        self.key = self.make_key(intrinsics, stride)
+        width, height = intrinsics["width"], intrinsics["height"]
+        u, v = np.meshgrid(np.arange(0, width, stride, dtype=np.float32),
+                           np.arange(0, height, stride, dtype=np.float32))
+        coeffs = np.asarray(intrinsics.get("coeffs") or [0.0] * 5, dtype=np.float64)
+        if np.any(coeffs != 0):
+            # 畸变校正（Brown-Conrady 迭代求逆），只在建表时计算一次
+            camera = np.array([[intrinsics["fx"], 0, intrinsics["ppx"]],
+                               [0, intrinsics["fy"], intrinsics["ppy"]],
+                               [0, 0, 1]], dtype=np.float64)
+            pixels = np.stack([u.ravel(), v.ravel()], axis=1).reshape(-1, 1, 2)
+            normalized = cv2.undistortPoints(pixels, camera, coeffs[:5]).reshape(u.shape + (2,))
+            x, y = normalized[..., 0], normalized[..., 1]
+        else:
+            x = (u - intrinsics["ppx"]) / intrinsics["fx"]
+            y = (v - intrinsics["ppy"]) / intrinsics["fy"]
+        self.rays = np.empty(u.shape + (3,), dtype=np.float32)
+        self.rays[..., 0] = x
+        self.rays[..., 1] = y
+        self.rays[..., 2] = 1.0
+        self.shape = u.shape
+
+    @staticmethod
+    def make_key(intrinsics, stride):
+        return (intrinsics["width"], intrinsics["height"], intrinsics["fx"], intrinsics["fy"],
+                intrinsics["ppx"], intrinsics["ppy"], tuple(intrinsics.get("coeffs") or ()), stride)
+
+
+class PointCloudGenerator:
+    """深度帧 -> 点云
+
+    参数:
+        stride (int): 像素抽取步长（2 表示每隔一行一列取一个像素，点数为1/4）
+        voxel (float): 体素边长（米），每个体素只保留一个点；为None时不做体素降采样
+        min_depth (float): 最小深度（米），更近的点丢弃
+        max_depth (float): 最大深度（米），更远的点丢弃；为None时不限制
+    """
+
+    def __init__(self, stride=1, voxel=None, min_depth=0.0, max_depth=None):
+        self.stride = max(1, int(stride))
+        self.voxel = voxel
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.table = None
+        # 最近一次生成的耗时（秒）
+        self.last_time = 0.0
+
+    def rays(self, intrinsics):
+        """当前内参和步长对应的视线方向表（内参或步长变化时重建）"""
+        key = RayTable.make_key(intrinsics, self.stride)
+        if self.table is None or self.table.key != key:
+            self.table = RayTable(intrinsics, self.stride)
+        return self.table.rays
+
+    def generate(self, raw, intrinsics, depth_scale, color=None):
+        """生成点云
+
+        参数:
+            raw (numpy.ndarray): z16深度（uint16，H x W），尺寸需与内参一致
+            intrinsics (dict): 深度内参
+            depth_scale (float): 深度单位（米）
+            color (numpy.ndarray): 彩色画面（BGR），为None时不生成颜色
+
+        返回:
+            PointCloud: 只包含有效深度的点
+        """
+        start = time.perf_counter()
+        if raw.shape != (intrinsics["height"], intrinsics["width"]):
+            raise ValueError(f"深度图尺寸 {raw.shape[1]}x{raw.shape[0]} 与内参 "
+                             f"{intrinsics['width']}x{intrinsics['height']} 不一致")
+        rays = self.rays(intrinsics)
+        stride = self.stride
+        depth = raw[::stride, ::stride]
+        # 深度范围换算为z16原始值比较，避免对整幅图做浮点运算
+        low = max(1, int(np.ceil(self.min_depth / depth_scale)))
+        valid = depth >= low
+        if self.max_depth is not None:
+            valid &= depth <= int(self.max_depth / depth_scale)
+        # 按有效像素的平铺索引取值（np.take 比布尔索引快数倍）
+        index = np.flatnonzero(valid)
+        z = np.take(depth.ravel(), index).astype(np.float32)
+        z *= np.float32(depth_scale)
+        points = np.take(rays.reshape(-1, 3), index, axis=0)
+        points *= z[:, None]
+
+        colors = None
+        if color is not None:
+            if color.shape[:2] != raw.shape:
+                color = cv2.resize(color, (raw.shape[1], raw.shape[0]), interpolation=cv2.INTER_NEAREST)
+            colors = np.take(color[::stride, ::stride].reshape(-1, 3), index, axis=0)
+
+        if self.voxel:
+            points, colors = voxel_downsample(points, colors, self.voxel)
+        self.last_time = time.perf_counter() - start
+        return PointCloud(points, colors)
+
+
+def voxel_downsample(points, colors, voxel):
+    """体素降采样：每个体素保留第一个点
+
+    返回:
+        tuple: (点, 颜色)
+    """
+    if len(points) == 0:
+        return points, colors
+    # 按坐标轴分别计算体素编号（对 N x 3 数组按列归约很慢）
+    keys = None
+    total = 1
+    for axis in range(3):
+        cells = np.floor(points[:, axis] * np.float32(1.0 / voxel)).astype(np.int64)
+        low = cells.min()
+        span = int(cells.max() - low) + 1
+        cells -= low
+        keys = cells if keys is None else keys * span + cells
+        total *= span
+    count = len(keys)
+    if float(total) * count < 2 ** 62:
+        # 体素编号和点序号合成一个整数后排序（比 np.unique(return_index=True) 快数倍），
+        # 每个体素取序号最小的点
+        packed = np.sort(keys * count + np.arange(count))
+        cells_sorted = packed // count
+        first = np.empty(count, dtype=bool)
+        first[0] = True
+        np.not_equal(cells_sorted[1:], cells_sorted[:-1], out=first[1:])
+        index = packed[first] % count
+    else:
+        _, index = np.unique(keys, return_index=True)
+    return points[index], (colors[index] if colors is not None else None)
+
+
+def write_ply(path, cloud, binary=True):
+    """导出PLY文件（颜色按RGB写入）
+
+    参数:
+        path (str): 文件路径
+        cloud (PointCloud): 点云
+        binary (bool): 是否使用二进制格式（文件小、写入快）
+    """
+    points, colors = cloud
+    count = len(points)
+    header = ["ply", f"format {'binary_little_endian' if binary else 'ascii'} 1.0", f"element vertex {count}",
+              "property float x", "property float y", "property float z"]
+    fields = [('x', '<f4'), ('y', '<f4'), ('z', '<f4')]
+    if colors is not None:
+        header += ["property uchar red", "property uchar green", "property uchar blue"]
+        fields += [('red', 'u1'), ('green', 'u1'), ('blue', 'u1')]
+    header.append("end_header")
+    vertices = np.empty(count, dtype=fields)
+    vertices['x'], vertices['y'], vertices['z'] = points[:, 0], points[:, 1], points[:, 2]
+    if colors is not None:
+        vertices['red'], vertices['green'], vertices['blue'] = colors[:, 2], colors[:, 1], colors[:, 0]
+    with open(path, 'wb') as f:
+        f.write(("\n".join(header) + "\n").encode("ascii"))
+        if binary:
+            f.write(vertices.tobytes())
+        else:
+            fmt = "%.6f %.6f %.6f" + (" %d %d %d" if colors is not None else "")
+            np.savetxt(f, vertices.tolist(), fmt=fmt)
+
+
+def render_preview(cloud, width, height, yaw=0.0, pitch=0.0, zoom=1.0, point_size=1):
+    """把点云渲染为BGR预览图（绕点云中心旋转后透视投影，近处的点遮挡远处的点）
+
+    参数:
+        cloud (PointCloud): 点云
+        width, height (int): 预览图尺寸
+        yaw, pitch (float): 绕竖直轴和水平轴的旋转角（弧度）
+        zoom (float): 缩放倍数
+        point_size (int): 点的大小（像素），大于1时做膨胀，稀疏点云看起来更连续
+
+    返回:
+        numpy.ndarray: BGR图像；没有颜色时按深度着色
+    """
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    points, colors = cloud
+    if len(points) == 0:
+        return image
+    # 相机放在点云中心前方，距离为点云半径的 PREVIEW_DISTANCE 倍（半径取98%分位，忽略离群点）
+    center = np.median(points, axis=0)
+    offsets = points - center
+    radius = max(float(np.percentile(np.abs(offsets).max(axis=1), 98)), 1e-3)
+    distance = radius * PREVIEW_DISTANCE
+    cos_y, sin_y, cos_p, sin_p = np.cos(yaw), np.sin(yaw), np.cos(pitch), np.sin(pitch)
+    rotation = np.array([[cos_y, 0, sin_y], [0, 1, 0], [-sin_y, 0, cos_y]], dtype=np.float32) @ \
+        np.array([[1, 0, 0], [0, cos_p, -sin_p], [0, sin_p, cos_p]], dtype=np.float32)
+    view = offsets @ rotation.T
+    view[:, 2] += distance
+    front = view[:, 2] > radius * 0.05
+    view = view[front]
+    focal = 0.45 * min(width, height) * zoom * (distance - radius) / radius
+    u = (view[:, 0] / view[:, 2] * focal + width / 2).astype(np.int32)
+    v = (view[:, 1] / view[:, 2] * focal + height / 2).astype(np.int32)
+    inside = (u >= 0) & (u < width) & (v >= 0) & (v < height)
+    u, v, z = u[inside], v[inside], view[inside, 2]
+    if colors is not None:
+        shade = colors[front][inside]
+    else:
+        scaled = 255 - np.clip((z - z.min()) / max(float(np.ptp(z)), 1e-6) * 255, 0, 255).astype(np.uint8)
+        shade = cv2.applyColorMap(scaled.reshape(-1, 1), cv2.COLORMAP_JET).reshape(-1, 3)
+    # 深度缓冲: 按像素、深度排序，每个像素取最近的点
+    pixels = v * width + u
+    order = np.lexsort((z, pixels))
+    sorted_pixels = pixels[order]
+    nearest = np.ones(len(order), dtype=bool)
+    nearest[1:] = sorted_pixels[1:] != sorted_pixels[:-1]
+    order = order[nearest]
+    image[v[order], u[order]] = shade[order]
+    if point_size > 1:
+        image = cv2.dilate(image, np.ones((point_size, point_size), np.uint8))
+    return image
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出RealSense深度点云")
+    parser.add_argument('output', help="PLY文件路径")
+    parser.add_argument('--stride', type=int, default=1, help="像素抽取步长")
+    parser.add_argument('--voxel', type=float, help="体素边长（米）")
+    parser.add_argument('--max-depth', type=float, help="最大深度（米）")
+    parser.add_argument('--no-color', action='store_true', help="不导出颜色")
+    parser.add_argument('--ascii', action='store_true', help="导出文本格式")
+    args = parser.parse_args()
+
+    import camera_manager
+    cameras = camera_manager.CameraManager(lambda device, state, message: print(f"[{device}] {message}"))
+    cameras.open_all()
+    try:
+        deadline = time.time() + 10.0
+        while cameras.get_frame(camera_manager.STREAM_RS_DEPTH) is None and time.time() < deadline:
+            time.sleep(0.1)
+        depth = cameras.get_frame(camera_manager.STREAM_RS_DEPTH)
+        if depth is None:
+            print("没有深度画面")
+            return 1
+        color = None if args.no_color else cameras.get_frame(camera_manager.STREAM_RS_COLOR)
+        generator = PointCloudGenerator(args.stride, args.voxel, max_depth=args.max_depth)
+        cloud = generator.generate(depth.raw, cameras.rs_intrinsics[camera_manager.STREAM_RS_DEPTH],
+                                   cameras.rs_depth_scale, color.image if color is not None else None)
+        write_ply(args.output, cloud, binary=not args.ascii)
+        print(f"已导出 {len(cloud.points)} 个点到 {args.output}（生成耗时 {generator.last_time * 1000:.1f} ms）")
+    finally:
+        cameras.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+RealSense点云预览窗口
+按固定频率用最新的深度帧生成降采样点云并在CPU上渲染（不依赖OpenGL），
+拖动鼠标旋转视角、滚轮缩放，用于快速检查深度是否变形、彩色纹理是否错位。
+“导出PLY”按当前设置（不抽取像素）导出最新一帧的完整点云
+"""
+
+import os
+import math
+import time
+from datetime import datetime
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import (QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QSpinBox,
+                             QDoubleSpinBox, QCheckBox, QFileDialog, QMessageBox, QSizePolicy)
+
+from pointcloud import PointCloudGenerator, render_preview, write_ply
+from render_scheduler import show_image
+from snapshot import default_snapshot_dir
+
+# 预览刷新频率（Hz），预览在GUI线程渲染，频率不宜过高
+PREVIEW_FPS = 10
+
+# 鼠标拖动一个像素对应的旋转角（弧度）
+ROTATE_PER_PIXEL = 0.01
+
+
+class PointCloudWindow(QWidget):
+    """点云预览窗口
+
+    参数:
+        cameras (CameraManager): 摄像头管理器
+        depth_stream (str): 深度图像流
+        color_stream (str): 彩色纹理图像流
+    """
+
+    def __init__(self, cameras, depth_stream, color_stream, parent=None):
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle("点云预览")
+        self.resize(800, 640)
+        self.cameras = cameras
+        self.depth_stream = depth_stream
+        self.color_stream = color_stream
+        self.generator = PointCloudGenerator(stride=2)
+        self.yaw = 0.0
+        self.pitch = 0.0
+        self.zoom = 1.0
+        self.drag_pos = None
+        # 上一次渲染的 (深度帧序号, 视角, 尺寸)，相同时跳过
+        self.last_key = None
+
+        self.view_label = QLabel("等待深度画面...")
+        self.view_label.setAlignment(Qt.AlignCenter)
+        self.view_label.setMinimumSize(320, 240)
+        self.view_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        self.view_label.setStyleSheet("background: black; color: gray;")
+
+        self.stride_spin = QSpinBox()
+        self.stride_spin.setRange(1, 8)
+        self.stride_spin.setValue(self.generator.stride)
+        self.stride_spin.setPrefix("步长 ")
+        self.stride_spin.valueChanged.connect(self.on_settings_changed)
+        self.voxel_spin = QDoubleSpinBox()
+        self.voxel_spin.setRange(0.0, 20.0)
+        self.voxel_spin.setSingleStep(0.5)
+        self.voxel_spin.setPrefix("体素 ")
+        self.voxel_spin.setSuffix(" mm")
+        self.voxel_spin.setSpecialValueText("不做体素降采样")
+        self.voxel_spin.valueChanged.connect(self.on_settings_changed)
+        self.max_depth_spin = QDoubleSpinBox()
+        self.max_depth_spin.setRange(0.0, 5.0)
+        self.max_depth_spin.setSingleStep(0.05)
+        self.max_depth_spin.setPrefix("最大深度 ")
+        self.max_depth_spin.setSuffix(" m")
+        self.max_depth_spin.setSpecialValueText("最大深度不限")
+        self.max_depth_spin.valueChanged.connect(self.on_settings_changed)
+        self.color_checkbox = QCheckBox("彩色纹理")
+        self.color_checkbox.setChecked(True)
+        self.color_checkbox.toggled.connect(self.on_settings_changed)
+        self.reset_button = QPushButton("重置视角")
+        self.reset_button.clicked.connect(self.reset_view)
+        self.export_button = QPushButton("导出PLY")
+        self.export_button.clicked.connect(self.export_ply)
+        self.info_label = QLabel("")
+        self.info_label.setStyleSheet("font-size: 13px; color: gray;")
+
+        controls = QHBoxLayout()
+        for widget in (self.stride_spin, self.voxel_spin, self.max_depth_spin, self.color_checkbox,
+                       self.reset_button, self.export_button):
+            controls.addWidget(widget)
+        controls.addStretch(1)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.view_label, 1)
+        layout.addLayout(controls)
+        layout.addWidget(self.info_label)
+
+        # 窗口显示时才刷新
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def on_settings_changed(self, _value=None):
+        """降采样设置变化，下一次刷新时重新生成"""
+        self.generator.stride = self.stride_spin.value()
+        self.generator.voxel = self.voxel_spin.value() / 1000.0 or None
+        self.generator.max_depth = self.max_depth_spin.value() or None
+        self.last_key = None
+
+    def reset_view(self):
+        self.yaw = self.pitch = 0.0
+        self.zoom = 1.0
+        self.last_key = None
+
+    def latest(self):
+        """最新的深度帧、深度内参、深度单位和彩色画面；没有深度画面时返回None"""
+        depth = self.cameras.get_frame(self.depth_stream)
+        intrinsics = self.cameras.rs_intrinsics.get(self.depth_stream)
+        if depth is None or depth.raw is None or intrinsics is None:
+            return None
+        color = None
+        if self.color_checkbox.isChecked():
+            color_frame = self.cameras.get_frame(self.color_stream)
+            color = color_frame.image if color_frame is not None else None
+        return depth, intrinsics, self.cameras.rs_depth_scale, color
+
+    def refresh(self):
+        """有新的深度帧或视角变化时重新生成和渲染（GUI线程）"""
+        if not self.isVisible() or self.isMinimized():
+            return
+        latest = self.latest()
+        if latest is None:
+            return
+        depth, intrinsics, depth_scale, color = latest
+        rect = self.view_label.contentsRect()
+        key = (depth.seq, self.yaw, self.pitch, self.zoom, rect.width(), rect.height())
+        if key == self.last_key or rect.width() <= 0 or rect.height() <= 0:
+            return
+        self.last_key = key
+        try:
+            cloud = self.generator.generate(depth.raw, intrinsics, depth_scale, color)
+        except ValueError:
+            # 开关降采样后，深度帧和内参可能短暂不一致
+            return
+        start = time.perf_counter()
+        image = render_preview(cloud, rect.width(), rect.height(), self.yaw, self.pitch, self.zoom,
+                               point_size=min(self.generator.stride, 3))
+        render_ms = (time.perf_counter() - start) * 1000
+        show_image(self.view_label, image)
+        self.info_label.setText(f"{len(cloud.points)} 个点，生成 {self.generator.last_time * 1000:.1f} ms，"
+                                f"渲染 {render_ms:.1f} ms（{intrinsics['width']}x{intrinsics['height']}）")
+
+    def export_ply(self):
+        """导出最新一帧的点云（不抽取像素，体素和深度范围按当前设置）"""
+        latest = self.latest()
+        if latest is None:
+            QMessageBox.warning(self, "无法导出", "没有深度画面")
+            return
+        depth, intrinsics, depth_scale, color = latest
+        generator = PointCloudGenerator(1, self.generator.voxel, max_depth=self.generator.max_depth)
+        try:
+            cloud = generator.generate(depth.raw, intrinsics, depth_scale, color)
+        except ValueError as e:
+            QMessageBox.warning(self, "无法导出", str(e))
+            return
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{self.cameras.rs_serial or 'realsense'}.ply"
+        path, _ = QFileDialog.getSaveFileName(self, "导出PLY", os.path.join(default_snapshot_dir(), name),
+                                              "PLY (*.ply)")
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            write_ply(path, cloud)
+        except OSError as e:
+            QMessageBox.warning(self, "无法导出", f"写入失败: {e}")
+            return
+        self.info_label.setText(f"已导出 {len(cloud.points)} 个点: {path}")
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.drag_pos = event.pos()
+
+    def mouseMoveEvent(self, event):
+        if self.drag_pos is not None:
+            delta = event.pos() - self.drag_pos
+            self.drag_pos = event.pos()
+            self.yaw += delta.x() * ROTATE_PER_PIXEL
+            self.pitch = max(-math.pi / 2, min(math.pi / 2, self.pitch - delta.y() * ROTATE_PER_PIXEL))
+
+    def mouseReleaseEvent(self, event):
+        self.drag_pos = None
+
+    def wheelEvent(self, event):
+        self.zoom = max(0.2, min(10.0, self.zoom * (1.1 if event.angleDelta().y() > 0 else 1 / 1.1)))
+
+    def showEvent(self, event):
+        self.last_key = None
+        self.timer.start(1000 // PREVIEW_FPS)
+        super().showEvent(event)
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        super().closeEvent(event)
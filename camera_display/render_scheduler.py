@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+画面显示的公共函数
+- 显示帧率上限与采集帧率无关，默认不超过 DEFAULT_DISPLAY_FPS 和屏幕刷新率，
+  可通过环境变量 PIKA_DISPLAY_FPS 修改
+- 单个QLabel显示BGR图像（如点云预览）；摄像头画面由 compositor_widget 合成显示
+"""
+
+import os
+
+from PyQt5.QtGui import QImage, QPixmap
+
+DEFAULT_DISPLAY_FPS = 30.0
+
+
+def display_fps_limit(refresh_rate):
+    """显示帧率上限: 环境变量 PIKA_DISPLAY_FPS 或 DEFAULT_DISPLAY_FPS，且不超过屏幕刷新率"""
+    try:
+        fps = float(os.environ.get("PIKA_DISPLAY_FPS", DEFAULT_DISPLAY_FPS))
+    except ValueError:
+        fps = DEFAULT_DISPLAY_FPS
+    if refresh_rate > 0:
+        fps = min(fps, refresh_rate)
+    return max(fps, 1.0)
+
+
+def show_image(label, image):
+    """把BGR图像（或灰度图）显示在QLabel上"""
+    height, width = image.shape[:2]
+    if image.ndim == 2:
+        qt_image = QImage(image.data, width, height, image.strides[0], QImage.Format_Grayscale8)
+    else:
+        qt_image = QImage(image.data, width, height, image.strides[0], QImage.Format_RGB888).rgbSwapped()
+    # fromImage 会复制数据，之后image可以被释放
+    label.setPixmap(QPixmap.fromImage(qt_image))
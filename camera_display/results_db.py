@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+质检结果数据库
+测试结果（固件版本、SN码、角度判定、摄像头状态等）保存在本地SQLite数据库中，程序关闭后仍可查询和导出
+
+表结构:
+    stations  工位
+    devices   设备，按 (类型, 序列号) 唯一：夹爪/Sense按SN码，RealSense按序列号
+    sessions  一次测试（如一次Sense连接到断开、一次SN码写入），包含测试项目和判定结果
+    metrics   测试中记录的指标（数值或文本）
+
+- 写入请求只放入队列，由后台线程批量写入（一个事务写一批，每条请求一个保存点，
+  单条请求失败只回滚该请求），界面线程不访问数据库
+- 使用WAL模式，查询和导出工具可以在质检软件运行时同时读取
+
+用法:
+    python3 results_db.py yield --since 2026-01-01 --by day --test angle
+    python3 results_db.py device PIKA0001
+    python3 results_db.py export results.csv --since 2026-01-01 --until 2026-02-01
+"""
+
+import os
+import csv
+import sys
+import time
+import uuid
+import queue
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+
+from station_log import get_logger, get_station_name
+
+log = get_logger("results_db")
+
+# 设备类型
+KIND_GRIPPER = "gripper"
+KIND_SENSE = "sense"
+KIND_REALSENSE = "realsense"
+
+# 测试项目
+TEST_ANGLE = "angle"        # Sense夹爪开合角度判定
+TEST_SN_WRITE = "sn_write"  # SN码写入校验
+
+# 判定结果（与规则引擎一致）
+VERDICT_PASS = "pass"
+VERDICT_FAIL = "fail"
+VERDICT_PENDING = "pending"
+
+# 写入队列容量，队列满时丢弃并计数，不阻塞调用线程
+QUEUE_SIZE = 10000
+# 每批最多写入的请求数，以及凑批的最长等待时间（秒）
+BATCH_SIZE = 500
+BATCH_INTERVAL = 0.2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stations (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS devices (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    serial TEXT,
+    firmware TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    UNIQUE (kind, serial)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    uid TEXT NOT NULL UNIQUE,
+    station_id INTEGER NOT NULL REFERENCES stations(id),
+    device_id INTEGER REFERENCES devices(id),
+    kind TEXT NOT NULL,
+    test TEXT NOT NULL,
+    variant TEXT,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    verdict TEXT,
+    summary TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    name TEXT NOT NULL,
+    value REAL,
+    text TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_devices_serial ON devices(serial);
+CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions(started_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_device ON sessions(device_id, started_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_test ON sessions(test, started_at);
+CREATE INDEX IF NOT EXISTS idx_metrics_session ON metrics(session_id);
+CREATE INDEX IF NOT EXISTS idx_metrics_name ON metrics(name, created_at);
+"""
+
+
+def default_db_path():
+    """默认数据库文件，可通过环境变量 PIKA_RESULTS_DB 修改"""
+    return os.environ.get("PIKA_RESULTS_DB") or os.path.expanduser("~/pika_results/results.db")
+
+
+def connect(path, readonly=False):
+    """打开数据库连接（WAL模式）"""
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    else:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+class ResultsDB:
+    """质检结果数据库（写入端）
+
+    所有方法都可以在任意线程调用，只把写入请求放入队列，立即返回
+
+    参数:
+        path (str): 数据库文件，为None时使用默认路径
+        station (str): 工位名称，为None时使用 PIKA_STATION 或主机名
+    """
+
+    def __init__(self, path=None, station=None):
+        self.path = path or default_db_path()
+        self.station = station or get_station_name()
+        self.queue = queue.Queue(QUEUE_SIZE)
+        self.dropped = 0
+        self.written = 0
+        self.thread = threading.Thread(target=self._writer_loop, name="results-db", daemon=True)
+        self.thread.start()
+
+    # ---------------- 写入接口 ----------------
+
+    def update_device(self, kind, serial, firmware=None):
+        """记录设备（已存在时更新固件版本和最后出现时间）
+
+        异常:
+            ValueError: 序列号为空（未查询到序列号的设备不记录）
+        """
+        if not serial:
+            raise ValueError(f"设备序列号为空: {kind}")
+        self._put(("device", kind, serial, firmware, time.time()))
+
+    def start_session(self, kind, test, serial=None, firmware=None, variant=None):
+        """开始一次测试
+
+        参数:
+            kind (str): 设备类型
+            test (str): 测试项目
+            serial (str): 序列号，尚未查询到时为None
+            firmware (str): 固件版本
+            variant (str): 产品型号
+
+        返回:
+            str: 测试编号，用于 record_metric() / end_session()
+        """
+        uid = uuid.uuid4().hex
+        self._put(("start", uid, kind, test, serial, firmware, variant, time.time()))
+        return uid
+
+    def record_metric(self, session, name, value=None, text=None):
+        """记录一项指标（value为数值，text为文本，二者可只填一个）"""
+        self._put(("metric", session, name, value, text, time.time()))
+
+    def end_session(self, session, verdict, summary=None, serial=None):
+        """结束一次测试
+
+        参数:
+            verdict (str): 判定结果 pass/fail/pending
+            summary (str): 判定说明
+            serial (str): 测试过程中才查询到的序列号，不为None时更新该测试关联的设备
+        """
+        self._put(("end", session, verdict, summary, serial, time.time()))
+
+    def record_session(self, kind, test, serial, verdict, summary=None, metrics=None, firmware=None, variant=None):
+        """记录一次已完成的测试（如SN码写入）
+
+        参数:
+            metrics (dict): {指标名: 数值或文本}
+        """
+        session = self.start_session(kind, test, serial, firmware, variant)
+        for name, value in (metrics or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.record_metric(session, name, value=value)
+            else:
+                self.record_metric(session, name, text=str(value))
+        self.end_session(session, verdict, summary)
+        return session
+
+    def flush(self, timeout=5.0):
+        """等待已提交的请求全部写入"""
+        done = threading.Event()
+        self._put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """写完剩余的请求并停止后台线程"""
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self.thread.join(timeout)
+        if self.dropped:
+            log.warning("结果数据库写入队列已满，丢弃了 %d 条记录", self.dropped)
+
+    def _put(self, request):
+        try:
+            self.queue.put_nowait(request)
+        except queue.Full:
+            self.dropped += 1
+
+    # ---------------- 后台写入 ----------------
+
+    def _writer_loop(self):
+        try:
+            conn = connect(self.path)
+            station_id = self._station_id(conn)
+        except Exception as e:
+            log.error("无法打开结果数据库 %s: %s", self.path, e)
+            return
+        # 测试编号 -> 行号（测试开始和结束通常在同一次运行中）
+        session_ids = {}
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + BATCH_INTERVAL
+            while len(batch) < BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            flushes = []
+            written = 0
+            try:
+                with conn:
+                    conn.execute("BEGIN")
+                    for request in batch:
+                        if request is None:
+                            running = False
+                            break
+                        if request[0] == "flush":
+                            flushes.append(request[1])
+                            continue
+                        # 每条请求一个保存点，失败时只回滚该请求，不影响同一批的其他记录；
+                        # 非数据库异常（如请求格式有误）同样只跳过该请求，不能让后台线程退出
+                        conn.execute("SAVEPOINT request")
+                        try:
+                            self._apply(conn, station_id, session_ids, request)
+                            written += 1
+                        except Exception as e:
+                            conn.execute("ROLLBACK TO request")
+                            log.error("写入结果数据库失败，跳过一条%s记录: %r", request[0], e)
+                        conn.execute("RELEASE request")
+                self.written += written
+            except sqlite3.Error as e:
+                # 整批提交失败：本批开始的测试都未写入，清除其行号
+                for request in batch:
+                    if request is not None and request[0] == "start":
+                        session_ids.pop(request[1], None)
+                log.error("写入结果数据库失败（%d 条记录）: %s", len(batch), e)
+            for done in flushes:
+                done.set()
+        conn.close()
+
+    def _station_id(self, conn):
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO stations (name, created_at) VALUES (?, ?)",
+                         (self.station, time.time()))
+        return conn.execute("SELECT id FROM stations WHERE name = ?", (self.station,)).fetchone()[0]
+
+    @staticmethod
+    def _device_id(conn, kind, serial, firmware, now):
+        conn.execute("INSERT INTO devices (kind, serial, firmware, first_seen, last_seen) VALUES (?, ?, ?, ?, ?) "
+                     "ON CONFLICT (kind, serial) DO UPDATE SET last_seen = excluded.last_seen, "
+                     "firmware = COALESCE(excluded.firmware, devices.firmware)",
+                     (kind, serial, firmware, now, now))
+        return conn.execute("SELECT id FROM devices WHERE kind = ? AND serial = ?", (kind, serial)).fetchone()[0]
+
+    def _session_id(self, conn, session_ids, uid):
+        session_id = session_ids.get(uid)
+        if session_id is None:
+            row = conn.execute("SELECT id FROM sessions WHERE uid = ?", (uid,)).fetchone()
+            session_id = row[0] if row else None
+        return session_id
+
+    def _apply(self, conn, station_id, session_ids, request):
+        op = request[0]
+        if op == "device":
+            _, kind, serial, firmware, now = request
+            self._device_id(conn, kind, serial, firmware, now)
+        elif op == "start":
+            _, uid, kind, test, serial, firmware, variant, now = request
+            device_id = self._device_id(conn, kind, serial, firmware, now) if serial else None
+            cursor = conn.execute("INSERT INTO sessions (uid, station_id, device_id, kind, test, variant, started_at) "
+                                  "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                  (uid, station_id, device_id, kind, test, variant, now))
+            session_ids[uid] = cursor.lastrowid
+        elif op == "metric":
+            _, uid, name, value, text, now = request
+            session_id = self._session_id(conn, session_ids, uid)
+            if session_id is not None:
+                conn.execute("INSERT INTO metrics (session_id, name, value, text, created_at) VALUES (?, ?, ?, ?, ?)",
+                             (session_id, name, value, text, now))
+        elif op == "end":
+            _, uid, verdict, summary, serial, now = request
+            session_id = self._session_id(conn, session_ids, uid)
+            if session_id is None:
+                return
+            if serial is not None:
+                kind = conn.execute("SELECT kind FROM sessions WHERE id = ?", (session_id,)).fetchone()[0]
+                device_id = self._device_id(conn, kind, serial, None, now)
+                conn.execute("UPDATE sessions SET device_id = ? WHERE id = ?", (device_id, session_id))
+            conn.execute("UPDATE sessions SET ended_at = ?, verdict = ?, summary = ? WHERE id = ?",
+                         (now, verdict, summary, session_id))
+            session_ids.pop(uid, None)
+
+
+# ---------------- 查询和导出 ----------------
+
+def parse_date(text):
+    """解析日期（YYYY-MM-DD 或 YYYY-MM-DD HH:MM）为时间戳"""
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            pass
+    raise ValueError(f"无效的日期: {text}")
+
+
+def _time_filter(since, until, column="s.started_at"):
+    clauses, params = [], []
+    if since is not None:
+        clauses.append(f"{column} >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append(f"{column} < ?")
+        params.append(until)
+    return clauses, params
+
+
+GROUP_COLUMNS = {
+    "day": "date(s.started_at, 'unixepoch', 'localtime')",
+    "station": "st.name",
+    "variant": "s.variant",
+    "kind": "s.kind",
+    "test": "s.test",
+}
+
+
+def query_yield(conn, since=None, until=None, by="day", kind=None, test=None):
+    """统计良率
+
+    参数:
+        by (str): 分组方式 day/station/variant/kind/test
+        kind (str): 只统计指定设备类型
+        test (str): 只统计指定测试项目
+
+    返回:
+        list: [(分组, 测试数, 通过数, 不通过数, 未判定数, 设备数)]
+    """
+    clauses, params = _time_filter(since, until)
+    if kind:
+        clauses.append("s.kind = ?")
+        params.append(kind)
+    if test:
+        clauses.append("s.test = ?")
+        params.append(test)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    group = GROUP_COLUMNS[by]
+    sql = f"""
+        SELECT {group} AS grp, COUNT(*),
+               SUM(s.verdict = 'pass'), SUM(s.verdict = 'fail'),
+               SUM(s.verdict IS NULL OR s.verdict NOT IN ('pass', 'fail')),
+               COUNT(DISTINCT s.device_id)
+        FROM sessions s JOIN stations st ON st.id = s.station_id
+        {where}
+        GROUP BY grp ORDER BY grp
+    """
+    return conn.execute(sql, params).fetchall()
+
+
+def query_device(conn, serial):
+    """查询一台设备（SN码或RealSense序列号）的全部测试记录"""
+    sql = """
+        SELECT s.id, d.kind, s.test, d.serial, d.firmware, st.name, s.started_at, s.ended_at, s.verdict, s.summary
+        FROM devices d
+        JOIN sessions s ON s.device_id = d.id
+        JOIN stations st ON st.id = s.station_id
+        WHERE d.serial = ?
+        ORDER BY s.started_at
+    """
+    return conn.execute(sql, (serial,)).fetchall()
+
+
+def query_metrics(conn, session_id):
+    """查询一次测试的全部指标"""
+    return conn.execute("SELECT name, value, text FROM metrics WHERE session_id = ? ORDER BY id",
+                        (session_id,)).fetchall()
+
+
+def export_csv(conn, csv_path, since=None, until=None):
+    """导出测试记录为CSV（逐行读取，内存占用与记录数无关）
+
+    返回:
+        int: 导出的测试数
+    """
+    clauses, params = _time_filter(since, until)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = f"""
+        SELECT s.id, st.name, s.kind, s.test, d.serial, d.firmware, s.variant,
+               datetime(s.started_at, 'unixepoch', 'localtime'),
+               datetime(s.ended_at, 'unixepoch', 'localtime'),
+               s.verdict, s.summary
+        FROM sessions s
+        JOIN stations st ON st.id = s.station_id
+        LEFT JOIN devices d ON d.id = s.device_id
+        {where}
+        ORDER BY s.started_at
+    """
+    count = 0
+    with open(csv_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["测试编号", "工位", "设备类型", "测试项目", "序列号", "固件版本", "产品型号",
+                         "开始时间", "结束时间", "判定", "说明"])
+        for row in conn.execute(sql, params):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def format_time(timestamp):
+    return "-" if timestamp is None else datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="质检结果数据库查询和导出")
+    parser.add_argument('--db', default=default_db_path(), help="数据库文件")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    yield_parser = subparsers.add_parser("yield", help="统计良率")
+    yield_parser.add_argument('--by', choices=sorted(GROUP_COLUMNS), default="day", help="分组方式")
+    yield_parser.add_argument('--kind', help="只统计指定设备类型，如 sense")
+    yield_parser.add_argument('--test', help="只统计指定测试项目，如 angle / sn_write")
+    device_parser = subparsers.add_parser("device", help="查询一台设备的测试记录")
+    device_parser.add_argument('serial', help="SN码或RealSense序列号")
+    export_parser = subparsers.add_parser("export", help="导出测试记录为CSV")
+    export_parser.add_argument('csv', help="输出文件")
+    for sub in (yield_parser, export_parser):
+        sub.add_argument('--since', help="开始日期 YYYY-MM-DD")
+        sub.add_argument('--until', help="结束日期 YYYY-MM-DD（不含）")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"数据库不存在: {args.db}")
+        return 1
+    conn = connect(args.db, readonly=True)
+    since = parse_date(args.since) if getattr(args, "since", None) else None
+    until = parse_date(args.until) if getattr(args, "until", None) else None
+
+    if args.command == "yield":
+        rows = query_yield(conn, since, until, args.by, args.kind, args.test)
+        print(f"{'分组':<20}{'测试数':>8}{'通过':>8}{'不通过':>8}{'未判定':>8}{'设备数':>8}{'良率':>9}")
+        for group, total, passed, failed, pending, devices in rows:
+            judged = passed + failed
+            rate = f"{passed / judged * 100:.2f}%" if judged else "-"
+            print(f"{str(group):<20}{total:>8}{passed:>8}{failed:>8}{pending:>8}{devices:>8}{rate:>9}")
+    elif args.command == "device":
+        rows = query_device(conn, args.serial)
+        if not rows:
+            print(f"没有找到设备: {args.serial}")
+            return 1
+        for session_id, kind, test, serial, firmware, station, started, ended, verdict, summary in rows:
+            print(f"[{format_time(started)}] {station} {kind} {test} {serial} 固件: {firmware or '-'} "
+                  f"判定: {verdict or '-'} {summary or ''}")
+            for name, value, text in query_metrics(conn, session_id):
+                print(f"    {name}: {text if value is None else value}")
+    else:
+        count = export_csv(conn, args.csv, since, until)
+        print(f"已导出 {count} 条测试记录: {args.csv}")
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+夹爪数据判定规则引擎
+规则从配置文件(rules.json)加载，每收到一个数据样本就增量更新一次，
+每条规则使用滑动计数/单调队列等累计量，单个样本的处理为O(1)（均摊）
+判定结果分两种: verdict 是当前样本的判定（用于实时显示）；session_verdict 是整次测试的判定，
+任一规则不通过后保持不通过直到 reset()，写入结果数据库的是 session_verdict
+
+支持的规则类型:
+    in_range      连续N个样本都在[low, high]范围内
+    max_jitter    最近window个样本的最大值与最小值之差不超过max_jitter
+    reach_within  从开始测试起within秒内到达target（误差tolerance以内）
+"""
+
+import os
+import abc
+import json
+import threading
+from collections import deque
+
+# 判定结果
+VERDICT_PENDING = "pending"  # 判定中
+VERDICT_PASS = "pass"        # 通过
+VERDICT_FAIL = "fail"        # 不通过
+
+VERDICT_TEXT = {
+    VERDICT_PENDING: "判定中",
+    VERDICT_PASS: "通过",
+    VERDICT_FAIL: "不通过",
+}
+
+# 默认配置文件
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+
+
+class Rule(abc.ABC):
+    """规则基类，子类实现 update()"""
+
+    # 配置文件中的旧字段名 -> 参数名（兼容已有的配置文件）
+    config_aliases = {}
+
+    def __init__(self, name):
+        self.name = name
+        self.verdict = VERDICT_PENDING
+
+    def reset(self):
+        """开始新的测试"""
+        self.verdict = VERDICT_PENDING
+
+    @abc.abstractmethod
+    def update(self, value, timestamp):
+        """输入一个样本，更新并返回当前判定结果 self.verdict"""
+
+    def describe(self):
+        """规则说明"""
+        return self.name
+
+
+class InRangeRule(Rule):
+    """连续N个样本都在范围内时通过，当前样本超出范围时不通过"""
+
+    config_aliases = {"min": "low", "max": "high"}
+
+    def __init__(self, name, low, high, consecutive=1):
+        super().__init__(name)
+        self.low = float(low)
+        self.high = float(high)
+        self.consecutive = int(consecutive)
+        self.count = 0
+
+    def reset(self):
+        super().reset()
+        self.count = 0
+
+    def update(self, value, timestamp):
+        if self.low <= value <= self.high:
+            self.count += 1
+            self.verdict = VERDICT_PASS if self.count >= self.consecutive else VERDICT_PENDING
+        else:
+            self.count = 0
+            self.verdict = VERDICT_FAIL
+        return self.verdict
+
+    def describe(self):
+        return f"{self.name}: [{self.low}, {self.high}] 连续{self.consecutive}个样本"
+
+
+class MaxJitterRule(Rule):
+    """最近window个样本的抖动（最大值-最小值）不超过max_jitter时通过
+
+    用两个单调队列维护滑动窗口的最大值和最小值
+    """
+
+    def __init__(self, name, window, max_jitter):
+        super().__init__(name)
+        self.window = int(window)
+        self.max_jitter = float(max_jitter)
+        self.index = 0
+        self.max_queue = deque()  # (index, value)，value单调递减
+        self.min_queue = deque()  # (index, value)，value单调递增
+
+    def reset(self):
+        super().reset()
+        self.index = 0
+        self.max_queue.clear()
+        self.min_queue.clear()
+
+    def update(self, value, timestamp):
+        index = self.index
+        self.index += 1
+        while self.max_queue and self.max_queue[-1][1] <= value:
+            self.max_queue.pop()
+        self.max_queue.append((index, value))
+        while self.min_queue and self.min_queue[-1][1] >= value:
+            self.min_queue.pop()
+        self.min_queue.append((index, value))
+
+        # 移除滑出窗口的样本
+        oldest = index - self.window + 1
+        if self.max_queue[0][0] < oldest:
+            self.max_queue.popleft()
+        if self.min_queue[0][0] < oldest:
+            self.min_queue.popleft()
+
+        if self.index < self.window:
+            self.verdict = VERDICT_PENDING
+        elif self.max_queue[0][1] - self.min_queue[0][1] <= self.max_jitter:
+            self.verdict = VERDICT_PASS
+        else:
+            self.verdict = VERDICT_FAIL
+        return self.verdict
+
+    def jitter(self):
+        """当前窗口内的抖动"""
+        if not self.max_queue:
+            return 0.0
+        return self.max_queue[0][1] - self.min_queue[0][1]
+
+    def describe(self):
+        return f"{self.name}: 最近{self.window}个样本抖动 <= {self.max_jitter}"
+
+
+class ReachWithinRule(Rule):
+    """从第一个样本起within秒内到达target（误差tolerance以内）则通过，超时则不通过，结果锁定"""
+
+    def __init__(self, name, target, within, tolerance=0.01):
+        super().__init__(name)
+        self.target = float(target)
+        self.within = float(within)
+        self.tolerance = float(tolerance)
+        self.start_time = None
+
+    def reset(self):
+        super().reset()
+        self.start_time = None
+
+    def update(self, value, timestamp):
+        if self.verdict != VERDICT_PENDING:
+            return self.verdict
+        if self.start_time is None:
+            self.start_time = timestamp
+        if abs(value - self.target) <= self.tolerance:
+            self.verdict = VERDICT_PASS
+        elif timestamp - self.start_time > self.within:
+            self.verdict = VERDICT_FAIL
+        return self.verdict
+
+    def describe(self):
+        return f"{self.name}: {self.within}秒内到达 {self.target}±{self.tolerance}"
+
+
+RULE_TYPES = {
+    "in_range": InRangeRule,
+    "max_jitter": MaxJitterRule,
+    "reach_within": ReachWithinRule,
+}
+
+
+def create_rule(config):
+    """根据配置创建规则
+
+    参数:
+        config (dict): 规则配置，type为规则类型，其余字段为规则参数
+    """
+    config = dict(config)
+    rule_type = config.pop("type")
+    if rule_type not in RULE_TYPES:
+        raise ValueError(f"未知的规则类型: {rule_type}")
+    config.setdefault("name", rule_type)
+    rule_class = RULE_TYPES[rule_type]
+    for old_key, key in rule_class.config_aliases.items():
+        if old_key in config:
+            config.setdefault(key, config.pop(old_key))
+    return rule_class(**config)
+
+
+class RulesEngine:
+    """规则引擎：所有规则都通过时判定为通过，任一规则不通过时判定为不通过（整次测试的判定保持不通过）
+
+    参数:
+        rules (list): 规则列表
+        variant (str): 产品型号
+    """
+
+    def __init__(self, rules, variant=""):
+        self.rules = rules
+        self.variant = variant
+        self.verdict = VERDICT_PENDING
+        self.session_verdict = VERDICT_PENDING
+        # 本次测试中出现过不通过的规则名称（按首次不通过的顺序）
+        self.failed_rules = []
+        self.sample_count = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, path=DEFAULT_RULES_PATH, variant=None):
+        """从配置文件加载规则
+
+        参数:
+            path (str): 配置文件路径
+            variant (str): 产品型号，为None时使用配置文件中的default_variant
+        """
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        variant = variant or config["default_variant"]
+        if variant not in config["variants"]:
+            raise ValueError(f"配置文件中没有产品型号: {variant}")
+        rules = [create_rule(rule) for rule in config["variants"][variant]["rules"]]
+        return cls(rules, variant)
+
+    def reset(self):
+        """开始新的测试"""
+        with self.lock:
+            for rule in self.rules:
+                rule.reset()
+            self.verdict = VERDICT_PENDING
+            self.session_verdict = VERDICT_PENDING
+            self.failed_rules = []
+            self.sample_count = 0
+
+    def update(self, value, timestamp):
+        """输入一个样本，返回总判定结果"""
+        with self.lock:
+            self.sample_count += 1
+            verdicts = [rule.update(value, timestamp) for rule in self.rules]
+            if VERDICT_FAIL in verdicts:
+                self.verdict = VERDICT_FAIL
+                for rule, verdict in zip(self.rules, verdicts):
+                    if verdict == VERDICT_FAIL and rule.name not in self.failed_rules:
+                        self.failed_rules.append(rule.name)
+            elif all(verdict == VERDICT_PASS for verdict in verdicts):
+                self.verdict = VERDICT_PASS
+            else:
+                self.verdict = VERDICT_PENDING
+            # 整次测试的判定：不通过后保持
+            if self.session_verdict != VERDICT_FAIL:
+                self.session_verdict = self.verdict
+            return self.verdict
+
+    def summary(self):
+        """当前判定摘要，如: 判定: 通过 (张开角度范围: 通过, 抖动: 通过)，本次测试不通过: 抖动"""
+        details = ", ".join(f"{rule.name}: {VERDICT_TEXT[rule.verdict]}" for rule in self.rules)
+        text = f"判定: {VERDICT_TEXT[self.verdict]} ({details})"
+        if self.failed_rules and self.verdict != VERDICT_FAIL:
+            text += f"，本次测试不通过: {', '.join(self.failed_rules)}"
+        return text
+
+    def session_summary(self):
+        """整次测试的判定摘要（写入结果数据库），如: 测试结果: 不通过 (不通过的规则: 张开角度范围)"""
+        if self.session_verdict == VERDICT_FAIL:
+            return f"测试结果: 不通过 (不通过的规则: {', '.join(self.failed_rules)})"
+        details = ", ".join(f"{rule.name}: {VERDICT_TEXT[rule.verdict]}" for rule in self.rules)
+        return f"测试结果: {VERDICT_TEXT[self.session_verdict]} ({details})"
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Sense夹爪数据面板视图模型
+面板的样式表只在创建时设置一次，之后通过动态属性切换状态；
+只有状态真正切换时才重新应用样式，只有显示文本变化时才更新文本
+"""
+
+# 角度显示框状态
+ANGLE_IDLE = "idle"        # 未连接，白底黑字
+ANGLE_PENDING = "pending"  # 判定中，黄色
+ANGLE_PASS = "pass"        # 判定通过，绿色
+ANGLE_FAIL = "fail"        # 判定不通过，红色
+
+# 数据状态
+STATUS_DISCONNECTED = "disconnected"
+STATUS_CONNECTED = "connected"
+STATUS_RECEIVING = "receiving"
+STATUS_STALE = "stale"
+
+STATUS_TEXT = {
+    STATUS_DISCONNECTED: "数据状态: 未连接",
+    STATUS_CONNECTED: "数据状态: 已连接",
+    STATUS_RECEIVING: "数据状态: 接收中",
+    STATUS_STALE: "数据状态: 无数据",
+}
+
+# 预编译的样式表：通过 state 动态属性选择，切换状态时无需重新解析整段样式
+ANGLE_STYLE_SHEET = """
+    QLineEdit {
+        background-color: white;
+        color: black;
+        border: 1px solid #A0A0A0;
+        border-radius: 5px;
+        padding: 5px;
+        min-height: 30px;
+    }
+    QLineEdit[state="pending"] {
+        background-color: #FFF6D0;
+        color: #A07000;
+        border: 1px solid #D0A000;
+    }
+    QLineEdit[state="pass"] {
+        background-color: #DDFFDD;
+        color: green;
+        border: 1px solid green;
+        font-weight: bold;
+    }
+    QLineEdit[state="fail"] {
+        background-color: #FFDDDD;
+        color: red;
+        border: 1px solid red;
+        font-weight: bold;
+    }
+"""
+
+STATUS_STYLE_SHEET = """
+    QLabel[state="disconnected"] { color: red; }
+    QLabel[state="connected"] { color: green; }
+    QLabel[state="receiving"] { color: green; }
+    QLabel[state="stale"] { color: orange; }
+"""
+
+
+class SensePanelViewModel:
+    """Sense夹爪数据面板的状态机视图模型
+
+    参数:
+        angle_display (QLineEdit): 角度显示框
+        status_label (QLabel): 数据状态标签
+        verdict_label (QLabel): 规则判定结果标签
+    """
+
+    def __init__(self, angle_display, status_label, verdict_label):
+        self.angle_display = angle_display
+        self.status_label = status_label
+        self.verdict_label = verdict_label
+        self.angle_state = None
+        self.status = None
+        self.angle_text = None
+        self.verdict_text = None
+
+        # GUI线程刷新统计，用于衡量跳过的重复刷新
+        self.stats = {
+            'text_updates': 0,
+            'text_skipped': 0,
+            'style_updates': 0,
+            'style_skipped': 0,
+        }
+
+        self.angle_display.setStyleSheet(ANGLE_STYLE_SHEET)
+        self.status_label.setStyleSheet(STATUS_STYLE_SHEET)
+        self.reset()
+
+    def reset(self):
+        """恢复为未连接状态"""
+        self.set_status(STATUS_DISCONNECTED)
+        self.set_angle_state(ANGLE_IDLE)
+        self.set_angle_text("0.0000")
+        self.set_verdict_text("")
+
+    def set_status(self, status):
+        """切换数据状态，状态未变化时不做任何操作"""
+        if status == self.status:
+            self.stats['style_skipped'] += 1
+            return
+        self.status = status
+        self.status_label.setText(STATUS_TEXT[status])
+        self._apply_state(self.status_label, status)
+
+    def set_angle_state(self, state):
+        """切换角度显示框状态，状态未变化时不做任何操作"""
+        if state == self.angle_state:
+            self.stats['style_skipped'] += 1
+            return
+        self.angle_state = state
+        self._apply_state(self.angle_display, state)
+
+    def set_angle_text(self, text):
+        """更新角度文本，文本未变化时不做任何操作"""
+        if text == self.angle_text:
+            self.stats['text_skipped'] += 1
+            return
+        self.angle_text = text
+        self.angle_display.setText(text)
+        self.stats['text_updates'] += 1
+
+    def set_verdict_text(self, text):
+        """更新判定结果文本，文本未变化时不做任何操作"""
+        if text == self.verdict_text:
+            self.stats['text_skipped'] += 1
+            return
+        self.verdict_text = text
+        self.verdict_label.setText(text)
+        self.stats['text_updates'] += 1
+
+    def show_angle(self, angle, verdict, verdict_text=""):
+        """显示一帧角度数据
+
+        参数:
+            angle (float): 角度（弧度）
+            verdict (str): 规则引擎判定结果 pending/pass/fail
+            verdict_text (str): 判定结果说明
+        """
+        self.set_status(STATUS_RECEIVING)
+        self.set_angle_text(f"{angle:.4f}")
+        self.set_angle_state(verdict)
+        self.set_verdict_text(verdict_text)
+
+    def _apply_state(self, widget, state):
+        """设置动态属性并只重新应用该控件的样式"""
+        widget.setProperty("state", state)
+        style = widget.style()
+        style.unpolish(widget)
+        style.polish(widget)
+        self.stats['style_updates'] += 1
+
+    def format_stats(self):
+        """格式化刷新统计信息"""
+        return ("文本更新 {text_updates} 次/跳过 {text_skipped} 次，"
+                "样式更新 {style_updates} 次/跳过 {style_skipped} 次").format(**self.stats)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+串口I/O事件循环
+用一个线程和一个selector同时监听任意数量的串口（非阻塞文件描述符），
+有数据时直接读取并交给对应的处理函数，代替每个串口一个轮询线程
+"""
+
+import os
+import selectors
+import threading
+
+from station_log import get_logger
+
+log = get_logger("serial_io")
+
+# 单次读取的最大字节数
+READ_CHUNK_SIZE = 4096
+
+
+class SerialIoLoop:
+    """多串口共享的I/O事件循环
+
+    处理函数 handler(data) 在事件循环线程中调用：
+    data 为读到的字节串；串口出错或被拔出时以 None 调用一次，随后自动注销
+    """
+
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.thread = None
+        self.running = False
+        # 注册/注销请求由其他线程提交，在事件循环线程中执行（selector不是线程安全的）
+        self.pending = []
+        self.pending_lock = threading.Lock()
+        self.wake_r, self.wake_w = os.pipe()
+        os.set_blocking(self.wake_r, False)
+        self.selector.register(self.wake_r, selectors.EVENT_READ, None)
+
+    def start(self):
+        """启动事件循环线程"""
+        if self.thread is None or not self.thread.is_alive():
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="serial-io", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """停止事件循环线程"""
+        self.running = False
+        self._wake()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1.0)
+        self.thread = None
+
+    def register(self, fd, handler):
+        """注册串口文件描述符
+
+        参数:
+            fd (int): 串口文件描述符（会被设置为非阻塞）
+            handler: 数据处理函数
+        """
+        os.set_blocking(fd, False)
+        self.start()
+        self._submit(('register', fd, handler))
+
+    def unregister(self, fd):
+        """注销串口文件描述符，返回时事件循环已不再读取该串口"""
+        self._submit(('unregister', fd, None))
+
+    def _submit(self, request):
+        if threading.current_thread() is self.thread:
+            self._apply(request)
+            return
+        done = threading.Event()
+        with self.pending_lock:
+            self.pending.append((request, done))
+        self._wake()
+        done.wait(timeout=1.0)
+
+    def _wake(self):
+        try:
+            os.write(self.wake_w, b'\0')
+        except OSError:
+            pass
+
+    def _apply(self, request):
+        op, fd, handler = request
+        if op == 'register':
+            try:
+                self.selector.register(fd, selectors.EVENT_READ, handler)
+            except KeyError:
+                self.selector.modify(fd, selectors.EVENT_READ, handler)
+        else:
+            try:
+                self.selector.unregister(fd)
+            except (KeyError, ValueError):
+                pass
+
+    def _drain_pending(self):
+        try:
+            while os.read(self.wake_r, 512):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        with self.pending_lock:
+            pending, self.pending = self.pending, []
+        for request, done in pending:
+            self._apply(request)
+            done.set()
+
+    def _run(self):
+        """事件循环线程"""
+        while self.running:
+            events = self.selector.select(timeout=1.0)
+            for key, _ in events:
+                if key.fd == self.wake_r:
+                    self._drain_pending()
+                    continue
+                handler = key.data
+                try:
+                    data = os.read(key.fd, READ_CHUNK_SIZE)
+                except BlockingIOError:
+                    continue
+                except OSError as e:
+                    log.error("串口读取错误: %s", e)
+                    data = b''
+                if not data:
+                    # 串口被拔出或关闭
+                    self._apply(('unregister', key.fd, None))
+                    handler(None)
+                    continue
+                try:
+                    handler(data)
+                except Exception as e:
+                    log.warning("串口数据处理错误: %s", e)
+            # 没有事件时也检查一次，避免唤醒字节丢失导致请求堆积
+            if not events and self.pending:
+                self._drain_pending()
+
+
+# 进程内共享的默认事件循环
+_default_loop = None
+_default_loop_lock = threading.Lock()
+
+
+def get_default_loop():
+    """获取进程内共享的串口事件循环"""
+    global _default_loop
+    with _default_loop_lock:
+        if _default_loop is None:
+            _default_loop = SerialIoLoop()
+        return _default_loop
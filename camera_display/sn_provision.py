@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SN码批量写入工具
+对多个串口设备并发写入SN码，每台设备写入后通过GET_INFO回读校验，失败自动重试，
+最后输出每台设备的结果报告
+
+用法:
+    # 对所有已连接的ttyUSB设备按顺序分配 PIKA0001 起的SN码
+    python3 sn_provision.py --start PIKA0001
+    # 指定SN码范围
+    python3 sn_provision.py --range PIKA0001 PIKA0016
+    # 从CSV文件读取（每行: 串口,SN码）
+    python3 sn_provision.py --csv assignments.csv --report report.csv
+
+注意: 写入前请先在质检软件中断开这些串口，同一串口不能被两个程序同时打开
+"""
+
+import re
+import csv
+import sys
+import time
+import argparse
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from gripper_control import GripperController, list_serial_ports
+from serial_io import get_default_loop
+from station_log import setup_logging, shutdown_logging
+
+# 单台设备的写入结果
+ProvisionResult = namedtuple('ProvisionResult',
+                             ['port', 'sn', 'ok', 'read_back', 'firmware', 'attempts', 'elapsed', 'error'])
+
+
+def expand_sn_range(first_sn, count=None, last_sn=None):
+    """展开SN码范围，末尾数字递增并保持位数
+
+    参数:
+        first_sn (str): 起始SN码，如 PIKA0001
+        count (int): 数量
+        last_sn (str): 结束SN码（包含），与count二选一
+
+    返回:
+        list: SN码列表
+    """
+    match = re.match(r'^(.*?)(\d+)$', first_sn)
+    if not match:
+        raise ValueError(f"SN码末尾必须是数字: {first_sn}")
+    prefix, digits = match.groups()
+    start = int(digits)
+    if last_sn is not None:
+        last_match = re.match(r'^(.*?)(\d+)$', last_sn)
+        if not last_match or last_match.group(1) != prefix:
+            raise ValueError(f"SN码范围前缀不一致: {first_sn} - {last_sn}")
+        count = int(last_match.group(2)) - start + 1
+    if count is None or count <= 0:
+        raise ValueError("SN码数量必须大于0")
+    return [f"{prefix}{number:0{len(digits)}d}" for number in range(start, start + count)]
+
+
+def assign_sns(ports, sns):
+    """按顺序把SN码分配给串口
+
+    返回:
+        list: [(port, sn), ...]
+    """
+    if len(sns) < len(ports):
+        raise ValueError(f"SN码数量({len(sns)})少于设备数量({len(ports)})")
+    return list(zip(ports, sns))
+
+
+def write_and_verify_sn(controller, sn, retries=3, verify_timeout=1.0, settle_time=0.1):
+    """通过已连接并在接收数据的控制器写入SN码，并用GET_INFO回读校验
+
+    参数:
+        controller (GripperController): 已连接的夹爪控制器
+        sn (str): SN码
+        retries (int): 最大尝试次数
+        verify_timeout (float): 每次回读的超时时间（秒）
+        settle_time (float): 写入后等待设备保存的时间（秒）
+
+    返回:
+        tuple: (是否成功, 尝试次数, 错误信息)
+    """
+    attempts = 0
+    error = ""
+    while attempts < retries:
+        attempts += 1
+        if not controller.set_sn_code_command(sn):
+            error = "发送SN码失败"
+            continue
+        time.sleep(settle_time)
+        seq = controller.request_device_info()
+        if seq is None:
+            error = "发送GET_INFO命令失败"
+            continue
+        if controller.wait_for_sn(sn, seq, verify_timeout):
+            return True, attempts, ""
+        error = f"回读SN码不一致: {controller.sn_code}"
+    return False, attempts, error
+
+
+def provision_device(port, sn, retries=3, verify_timeout=1.0, settle_time=0.1, io_loop=None):
+    """向单台设备写入SN码并回读校验
+
+    参数:
+        port (str): 串口
+        sn (str): SN码
+        retries (int): 最大尝试次数
+        verify_timeout (float): 每次回读的超时时间（秒）
+        settle_time (float): 写入后等待设备保存的时间（秒）
+        io_loop (SerialIoLoop): 共享的串口事件循环，为None时使用独立的读取线程
+
+    返回:
+        ProvisionResult: 写入结果
+    """
+    start = time.time()
+    controller = GripperController(io_loop=io_loop, name="provision")
+    attempts = 0
+    try:
+        if not controller.connect(port):
+            return ProvisionResult(port, sn, False, "", "", 0, time.time() - start, "无法打开串口")
+        if not controller.start_data_reception():
+            return ProvisionResult(port, sn, False, "", "", 0, time.time() - start, "无法启动数据接收")
+
+        ok, attempts, error = write_and_verify_sn(controller, sn, retries, verify_timeout, settle_time)
+        return ProvisionResult(port, sn, ok, controller.sn_code, controller.firmware_version,
+                               attempts, time.time() - start, error)
+    except Exception as e:
+        return ProvisionResult(port, sn, False, controller.sn_code, controller.firmware_version,
+                               attempts, time.time() - start, str(e))
+    finally:
+        controller.disconnect()
+
+
+def provision_batch(assignments, max_workers=16, **kwargs):
+    """并发向多台设备写入SN码
+
+    参数:
+        assignments (list): [(port, sn), ...]
+        max_workers (int): 最大并发数
+        **kwargs: 传给 provision_device() 的参数
+
+    返回:
+        list: ProvisionResult列表，顺序与assignments一致
+    """
+    if not assignments:
+        return []
+    # 所有设备的回读数据由同一个事件循环线程接收
+    kwargs.setdefault('io_loop', get_default_loop())
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(assignments)),
+                            thread_name_prefix="sn-provision") as pool:
+        futures = [pool.submit(provision_device, port, sn, **kwargs) for port, sn in assignments]
+        return [future.result() for future in futures]
+
+
+def print_report(results):
+    """打印结果报告"""
+    print(f"{'串口':<16}{'SN码':<20}{'结果':<6}{'回读':<20}{'次数':<6}{'耗时':<8}错误")
+    for r in results:
+        print(f"{r.port:<16}{r.sn:<20}{'成功' if r.ok else '失败':<6}{r.read_back:<20}"
+              f"{r.attempts:<6}{r.elapsed:<8.2f}{r.error}")
+    passed = sum(1 for r in results if r.ok)
+    print(f"共 {len(results)} 台，成功 {passed} 台，失败 {len(results) - passed} 台")
+
+
+def write_report(results, path):
+    """把结果报告写入CSV文件"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(ProvisionResult._fields)
+        for r in results:
+            writer.writerow(r)
+
+
+def read_assignments(path):
+    """从CSV文件读取(串口, SN码)列表，忽略空行和#开头的行
+
+    异常:
+        ValueError: 某行缺少串口或SN码，或串口/SN码重复（错误信息包含行号）
+    """
+    assignments = []
+    ports, sns = set(), set()
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        for row in reader:
+            if not row or row[0].strip().startswith('#') or not any(cell.strip() for cell in row):
+                continue
+            if len(row) < 2 or not row[0].strip() or not row[1].strip():
+                raise ValueError(f"{path} 第 {reader.line_num} 行格式错误，应为: 串口,SN码")
+            port, sn = row[0].strip(), row[1].strip()
+            if port in ports:
+                raise ValueError(f"{path} 第 {reader.line_num} 行串口重复: {port}")
+            if sn in sns:
+                raise ValueError(f"{path} 第 {reader.line_num} 行SN码重复: {sn}")
+            ports.add(port)
+            sns.add(sn)
+            assignments.append((port, sn))
+    return assignments
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量写入并校验夹爪SN码")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', help="CSV文件，每行: 串口,SN码")
+    source.add_argument('--range', nargs=2, metavar=('FIRST', 'LAST'),
+                        help="SN码范围（包含首尾），如 PIKA0001 PIKA0016，按串口顺序分配")
+    source.add_argument('--start', help="起始SN码，按串口顺序递增分配")
+    parser.add_argument('--ports', nargs='*', help="指定串口，默认使用所有ttyUSB设备")
+    parser.add_argument('--retries', type=int, default=3, help="每台设备最大尝试次数")
+    parser.add_argument('--timeout', type=float, default=1.0, help="每次回读超时时间（秒）")
+    parser.add_argument('--report', help="把结果报告写入CSV文件")
+    args = parser.parse_args()
+    setup_logging(console=False)
+    try:
+        try:
+            if args.csv:
+                assignments = read_assignments(args.csv)
+            else:
+                ports = args.ports or list_serial_ports()
+                if not ports:
+                    print("未检测到串口设备")
+                    return 1
+                if args.range:
+                    sns = expand_sn_range(args.range[0], last_sn=args.range[1])
+                else:
+                    sns = expand_sn_range(args.start, count=len(ports))
+                assignments = assign_sns(ports, sns)
+        except (ValueError, OSError) as e:
+            print(f"无法分配SN码: {e}")
+            return 1
+
+        print(f"开始写入 {len(assignments)} 台设备...")
+        start = time.time()
+        results = provision_batch(assignments, retries=args.retries, verify_timeout=args.timeout)
+        print_report(results)
+        print(f"总耗时: {time.time() - start:.2f} 秒")
+        if args.report:
+            write_report(results, args.report)
+        return 0 if all(r.ok for r in results) else 2
+    finally:
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+快照和连拍
+保存所有图像流的画面作为质检证据:
+    快照    每个图像流的最新一帧
+    连拍    每个图像流连续N帧，或持续T秒内的所有帧
+
+每次拍摄保存在单独的目录中:
+    <图像流>_<帧序号>.jpg      彩色画面（深度图像流为着色后的画面），可选PNG
+    <图像流>_<帧序号>_z16.png  原始z16深度，16位PNG无损保存（可选 .npy）
+    <图像流>_<帧序号>.json     元数据: SN码、到达时间、采集时刻、内参、深度单位
+    capture.json               本次拍摄的汇总
+
+- 采集线程（连拍）和GUI线程（快照）只复制画面放入有界队列，编码和写盘由写入线程完成，
+  复制后不再占用驱动的帧缓冲区
+- 队列满时跳过该帧并计数，不阻塞采集线程；按帧数连拍时跳过的帧由后续的帧补上
+  （连拍时间相应延长），不会影响实时画面
+
+用法（无界面运行，打开已连接的摄像头）:
+    python3 snapshot.py                    # 快照
+    python3 snapshot.py --count 100        # 每个图像流连拍100帧
+    python3 snapshot.py --duration 5       # 连拍5秒
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from station_log import get_logger, get_station_name
+
+log = get_logger("snapshot")
+
+# 拍摄类型
+KIND_SNAPSHOT = "snapshot"
+KIND_BURST = "burst"
+
+# 写入队列容量（帧），640x480 三个图像流约占 300 MB
+QUEUE_SIZE = 128
+# 编码和写盘线程数（cv2.imwrite 执行时释放GIL）
+WRITE_WORKERS = 2
+
+COLOR_FORMATS = ("jpg", "png")
+DEPTH_FORMATS = ("png", "npy")
+JPEG_QUALITY = 95
+
+# 按帧数连拍时的最长时间（秒），图像流中断时按已拍到的帧结束
+BURST_TIMEOUT = 60.0
+
+SUMMARY_FILE = "capture.json"
+
+
+def default_snapshot_dir():
+    """默认保存根目录，可通过环境变量 PIKA_SNAPSHOT_DIR 修改"""
+    return os.environ.get("PIKA_SNAPSHOT_DIR") or os.path.expanduser("~/pika_snapshots")
+
+
+class CaptureJob:
+    """一次快照或连拍
+
+    属性:
+        path (str): 保存目录
+        streams (tuple): 拍摄的图像流
+        queued (dict): 各图像流放入队列的帧数
+        saved (int): 已保存的帧数
+        skipped (int): 队列满而跳过的帧数
+        errors (int): 保存失败的帧数
+        done (threading.Event): 拍摄结束且所有帧都已写完
+    """
+
+    def __init__(self, kind, path, streams, stream_meta, extra, count=None, duration=None):
+        self.kind = kind
+        self.path = path
+        self.streams = tuple(streams)
+        self.stream_meta = stream_meta
+        self.extra = extra
+        self.count = count
+        self.duration = duration
+        self.started_at = time.time()
+        self.finished_at = None
+        self.queued = {stream: 0 for stream in self.streams}
+        self.saved = 0
+        self.skipped = 0
+        self.errors = 0
+        self.pending = 0
+        self.capturing = True
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def summary(self):
+        """拍摄汇总（写入 capture.json）"""
+        return {
+            "kind": self.kind,
+            "streams": list(self.streams),
+            "count": self.count,
+            "duration": self.duration,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "frames": dict(self.queued),
+            "saved": self.saved,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "devices": self.stream_meta,
+            **self.extra,
+        }
+
+    def format_summary(self):
+        text = f"已保存 {self.saved} 帧"
+        if self.skipped:
+            text += f"，跳过 {self.skipped} 帧"
+        if self.errors:
+            text += f"，失败 {self.errors} 帧"
+        return f"{text}: {self.path}"
+
+
+class SnapshotWriter:
+    """快照和连拍的保存器
+
+    参数:
+        cameras (CameraManager): 摄像头管理器
+        root (str): 保存根目录，为None时使用默认目录
+        metadata: 返回附加元数据（如夹爪SN码）的函数，每次拍摄开始时在调用线程中调用
+        done_callback: 拍摄完成回调，参数为CaptureJob，在写入线程中调用
+        color_format (str): 彩色画面格式 jpg/png
+        depth_format (str): 原始深度格式 png（16位）/npy
+    """
+
+    def __init__(self, cameras, root=None, metadata=None, done_callback=None,
+                 color_format="jpg", depth_format="png"):
+        if color_format not in COLOR_FORMATS or depth_format not in DEPTH_FORMATS:
+            raise ValueError(f"不支持的保存格式: {color_format}/{depth_format}")
+        self.cameras = cameras
+        self.root = root or default_snapshot_dir()
+        self.metadata = metadata
+        self.done_callback = done_callback
+        self.color_format = color_format
+        self.depth_format = depth_format
+        self.color_params = [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY] if color_format == "jpg" else []
+
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.max_queue_depth = 0
+        self.lock = threading.Lock()
+        self.burst_job = None
+        self.workers = [threading.Thread(target=self._writer_loop, name=f"snapshot-writer-{i}", daemon=True)
+                        for i in range(WRITE_WORKERS)]
+        for worker in self.workers:
+            worker.start()
+
+    @property
+    def busy(self):
+        """是否正在连拍"""
+        return self.burst_job is not None
+
+    def _stream_meta(self, stream):
+        """图像流所属设备的元数据"""
+        import camera_manager
+        if stream in camera_manager.DEVICE_STREAMS[camera_manager.DEVICE_REALSENSE]:
+            meta = {"device": camera_manager.DEVICE_REALSENSE, "sn": self.cameras.rs_serial,
+                    "intrinsics": self.cameras.rs_intrinsics.get(stream)}
+            if stream == camera_manager.STREAM_RS_DEPTH:
+                meta["depth_scale"] = self.cameras.rs_depth_scale
+            return meta
+        return {"device": camera_manager.DEVICE_USB, "index": self.cameras.usb_index}
+
+    def _new_job(self, kind, streams, count=None, duration=None):
+        if streams is None:
+            streams = [stream for stream in self.cameras.frames if self.cameras.get_frame(stream) is not None]
+        if not streams:
+            raise RuntimeError("没有可拍摄的画面")
+        name = datetime.now().strftime("%Y%m%d-%H%M%S-%f") + "-" + kind
+        path = os.path.join(self.root, name)
+        os.makedirs(path, exist_ok=True)
+        extra = {"station": get_station_name()}
+        if self.metadata is not None:
+            extra.update(self.metadata())
+        stream_meta = {stream: self._stream_meta(stream) for stream in streams}
+        return CaptureJob(kind, path, streams, stream_meta, extra, count, duration)
+
+    def snapshot(self, streams=None):
+        """保存每个图像流的最新一帧，立即返回
+
+        参数:
+            streams (list): 图像流，为None时为所有有画面的图像流
+
+        返回:
+            CaptureJob: 本次拍摄
+        """
+        job = self._new_job(KIND_SNAPSHOT, streams)
+        for stream in job.streams:
+            frame = self.cameras.get_frame(stream)
+            if frame is not None:
+                self._enqueue(job, stream, frame)
+        self._finish_capture(job)
+        return job
+
+    def burst(self, count=None, duration=None, streams=None):
+        """开始连拍，立即返回
+
+        参数:
+            count (int): 每个图像流拍摄的帧数
+            duration (float): 连拍时长（秒），与count二选一
+            streams (list): 图像流，为None时为所有有画面的图像流
+
+        返回:
+            CaptureJob: 本次拍摄
+        """
+        if (count is None) == (duration is None):
+            raise ValueError("count 和 duration 需指定其中一个")
+        with self.lock:
+            if self.burst_job is not None:
+                raise RuntimeError("正在连拍")
+            job = self._new_job(KIND_BURST, streams, count, duration)
+            self.burst_job = job
+        job.timer = threading.Timer(duration if duration is not None else BURST_TIMEOUT,
+                                    self._finish_capture, args=(job,))
+        job.timer.daemon = True
+        job.timer.start()
+        self.cameras.add_frame_listener(self._on_frame)
+        log.info("开始连拍: %s", job.path)
+        return job
+
+    def stop_burst(self):
+        """提前结束连拍（已拍到的帧仍会保存）"""
+        job = self.burst_job
+        if job is not None:
+            self._finish_capture(job)
+
+    def _on_frame(self, stream, frame):
+        """帧订阅函数（采集线程调用），只复制画面放入队列"""
+        job = self.burst_job
+        if job is None or stream not in job.queued:
+            return
+        if job.count is not None:
+            if job.queued[stream] >= job.count:
+                return
+            if self._enqueue(job, stream, frame) and all(n >= job.count for n in job.queued.values()):
+                self._finish_capture(job)
+        else:
+            self._enqueue(job, stream, frame)
+
+    def _enqueue(self, job, stream, frame):
+        """复制一帧放入写入队列，队列满时跳过
+
+        返回:
+            bool: 是否放入队列
+        """
+        with job.lock:
+            if not job.capturing:
+                return False
+            job.pending += 1
+        raw = frame.raw.copy() if frame.raw is not None else None
+        item = (job, stream, frame._replace(image=frame.image.copy(), raw=raw))
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            with job.lock:
+                job.pending -= 1
+                job.skipped += 1
+                finished = not job.capturing and job.pending == 0
+            if finished:
+                self._finish_job(job)
+            return False
+        with job.lock:
+            job.queued[stream] += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return True
+
+    def _finish_capture(self, job):
+        """停止拍摄新的帧，已在队列中的帧写完后结束"""
+        with self.lock:
+            if self.burst_job is job:
+                self.burst_job = None
+                self.cameras.remove_frame_listener(self._on_frame)
+        if job.timer is not None:
+            job.timer.cancel()
+        with job.lock:
+            if not job.capturing:
+                return
+            job.capturing = False
+            finished = job.pending == 0
+        if finished:
+            self._finish_job(job)
+
+    def _finish_job(self, job):
+        job.finished_at = time.time()
+        try:
+            with open(os.path.join(job.path, SUMMARY_FILE), "w", encoding="utf-8") as f:
+                json.dump(job.summary(), f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            log.error("写入拍摄汇总失败: %s", e)
+        log.info("拍摄完成，%s", job.format_summary())
+        job.done.set()
+        if self.done_callback is not None:
+            self.done_callback(job)
+
+    def _writer_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            job, stream, frame = item
+            ok = self._write(job, stream, frame)
+            with job.lock:
+                job.pending -= 1
+                if ok:
+                    job.saved += 1
+                else:
+                    job.errors += 1
+                finished = not job.capturing and job.pending == 0
+            if finished:
+                self._finish_job(job)
+
+    def _write(self, job, stream, frame):
+        """编码并写入一帧及其元数据（写入线程）"""
+        base = os.path.join(job.path, f"{stream}_{frame.seq:06d}")
+        files = []
+        try:
+            color_path = f"{base}.{self.color_format}"
+            if not cv2.imwrite(color_path, frame.image, self.color_params):
+                raise OSError(f"无法写入 {color_path}")
+            files.append(os.path.basename(color_path))
+            if frame.raw is not None:
+                if self.depth_format == "npy":
+                    depth_path = f"{base}_z16.npy"
+                    np.save(depth_path, frame.raw)
+                else:
+                    depth_path = f"{base}_z16.png"
+                    if not cv2.imwrite(depth_path, frame.raw):
+                        raise OSError(f"无法写入 {depth_path}")
+                files.append(os.path.basename(depth_path))
+            meta = {
+                "stream": stream,
+                "seq": frame.seq,
+                "timestamp": frame.timestamp,
+                "capture_time": frame.capture_time,
+                "width": frame.image.shape[1],
+                "height": frame.image.shape[0],
+                "files": files,
+                **job.stream_meta.get(stream, {}),
+                **job.extra,
+            }
+            with open(f"{base}.json", "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            return True
+        except Exception as e:
+            log.error("保存 %s 第 %d 帧失败: %s", stream, frame.seq, e)
+            return False
+
+    def close(self, timeout=10.0):
+        """结束连拍，等待队列中的帧写完后停止写入线程"""
+        self.stop_burst()
+        deadline = time.monotonic() + timeout
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+
+
+def main():
+    import camera_manager
+
+    parser = argparse.ArgumentParser(description="无界面拍摄快照/连拍（打开已连接的摄像头）")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--count', type=int, help="每个图像流连拍的帧数")
+    group.add_argument('--duration', type=float, help="连拍时长（秒）")
+    parser.add_argument('--out', help="保存根目录（默认 ~/pika_snapshots）")
+    parser.add_argument('--color-format', choices=COLOR_FORMATS, default="jpg", help="彩色画面格式")
+    parser.add_argument('--depth-format', choices=DEPTH_FORMATS, default="png", help="原始深度格式")
+    parser.add_argument('--warmup', type=float, default=3.0, help="打开摄像头后等待的时间（秒）")
+    args = parser.parse_args()
+
+    manager = camera_manager.CameraManager(lambda device, state, message: print(f"[{device}] {message}"))
+    manager.open_all()
+    writer = None
+    try:
+        time.sleep(args.warmup)
+        writer = SnapshotWriter(manager, args.out, color_format=args.color_format, depth_format=args.depth_format)
+        start_seq = dict(manager.frame_seq)
+        start = time.monotonic()
+        try:
+            if args.count is None and args.duration is None:
+                job = writer.snapshot()
+            else:
+                job = writer.burst(count=args.count, duration=args.duration)
+        except RuntimeError as e:
+            print(f"无法拍摄: {e}")
+            return 1
+        job.done.wait()
+        elapsed = time.monotonic() - start
+        print(job.format_summary())
+        if job.kind == KIND_BURST:
+            # 连拍期间的采集帧率，用于确认连拍不影响实时画面
+            for stream in job.streams:
+                fps = (manager.frame_seq[stream] - start_seq[stream]) / elapsed
+                print(f"  {stream}: 拍摄 {job.queued[stream]} 帧，期间采集帧率 {fps:.1f}")
+            print(f"  写入队列最大深度 {writer.max_queue_depth}/{QUEUE_SIZE}")
+        return 0 if job.errors == 0 else 2
+    finally:
+        if writer is not None:
+            writer.close()
+        manager.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
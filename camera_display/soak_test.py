@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+长时间稳定性（浸泡）测试
+连续运行采集、显示和串口三条管线数小时，按固定间隔记录时间序列:
+    rss_mb              进程常驻内存
+    threads             线程数
+    gc_objects          Python对象数（gc跟踪的对象）
+    traced_mb           tracemalloc跟踪的Python内存（开启 --tracemalloc 时）
+    fps_<图像流>         采集帧率
+    lat_p50/p99_<图像流>  帧从采集到发布给订阅者的延迟（毫秒）
+    gripper_hz          夹爪数据频率（所有夹爪合计）
+    gripper_gap_p99     夹爪相邻样本的最大间隔（P99，毫秒）
+    rx_buffer           夹爪接收缓冲区长度（字符）
+    render_p50/p99      一次画面刷新的耗时（毫秒）
+结束后对每个指标做漂移检测（去掉预热阶段后分成若干窗口，窗口中位数持续增长/下降且变化量超过阈值即报警），
+时间序列保存为CSV，可以用 analyze 子命令重新分析或对比修复前后的两次结果。
+开启 --tracemalloc 时每隔一段时间保存一次内存快照，与预热结束时的快照比较，输出增长最多的代码位置
+
+数据来源:
+    实机    --cameras real，--gripper /dev/ttyUSB0（可多次指定）
+    回放    --cameras synthetic（模拟三路图像流），--gripper sim（模拟夹爪，--replay 回放录制的夹爪数据）
+
+用法:
+    python3 soak_test.py run --duration 4h --cameras real --gripper /dev/ttyUSB0 --gripper /dev/ttyUSB1
+    python3 soak_test.py run --duration 30m --cameras synthetic --gripper sim --tracemalloc
+    python3 soak_test.py analyze soak/20260101-080000/series.csv
+    python3 soak_test.py analyze before/series.csv after/series.csv     # 对比修复前后
+
+显示管线使用界面的 CompositorWidget（Qt离屏渲染，不需要显示器），--no-display 时不运行显示管线
+"""
+
+import os
+import gc
+import sys
+import csv
+import json
+import time
+import argparse
+import threading
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+# 漂移检测: 去掉预热阶段后把时间序列分成的窗口数
+DRIFT_WINDOWS = 8
+# 相邻窗口中位数同方向变化的比例不低于该值视为单调变化
+MONOTONIC_FRACTION = 0.85
+# 默认预热时长占总时长的比例
+WARMUP_FRACTION = 0.1
+
+# 需要检测的指标: 前缀 -> (方向, 最小相对变化, 最小绝对变化)
+# 方向 up 表示增长为异常（内存、线程、延迟），down 表示下降为异常（帧率）
+DRIFT_RULES = {
+    "rss_mb": ("up", 0.05, 5.0),
+    "threads": ("up", 0.0, 1.0),
+    "gc_objects": ("up", 0.05, 1000.0),
+    "traced_mb": ("up", 0.05, 1.0),
+    "rx_buffer": ("up", 0.5, 200.0),
+    "fps_": ("down", 0.05, 0.5),
+    "gripper_hz": ("down", 0.05, 2.0),
+    "lat_p99_": ("up", 0.2, 2.0),
+    "gripper_gap_p99": ("up", 0.2, 2.0),
+    "render_p99": ("up", 0.2, 1.0),
+}
+
+# tracemalloc快照比较时输出的条目数
+TRACEMALLOC_TOP = 15
+
+
+def parse_duration(text):
+    """解析时长，如 "90"（秒）、"30m"、"4h"、"1h30m"
+
+    返回:
+        float: 秒
+    """
+    units = {"h": 3600, "m": 60, "s": 1}
+    total = 0.0
+    number = ""
+    for char in text.strip().lower():
+        if char.isdigit() or char == ".":
+            number += char
+        elif char in units and number:
+            total += float(number) * units[char]
+            number = ""
+        else:
+            raise argparse.ArgumentTypeError(f"无效的时长: {text}")
+    if number:
+        total += float(number)
+    return total
+
+
+def read_rss_mb():
+    """进程常驻内存（MB）"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+class SoakMonitor:
+    """收集各管线的指标并按间隔生成一行时间序列
+
+    参数:
+        cameras: CameraManager 或 bench_recorder.SyntheticCameras
+        grippers (list): GripperController
+        use_tracemalloc (bool): 是否记录tracemalloc
+        display (bool): 是否运行显示管线（记录画面刷新耗时）
+    """
+
+    def __init__(self, cameras, grippers, use_tracemalloc=False, display=False):
+        self.cameras = cameras
+        self.grippers = grippers
+        self.use_tracemalloc = use_tracemalloc
+        self.display = display
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.gaps = []
+        self.render_times = []
+        self.last_sample_time = {}
+        self.gripper_seq = [gripper.get_latest_sample().seq for gripper in grippers]
+        self.start = time.monotonic()
+        self.last_time = self.start
+        self.rows = []
+        if cameras is not None:
+            cameras.add_frame_listener(self.on_frame)
+        for gripper in grippers:
+            gripper.add_sample_listener(lambda sample, gripper=gripper: self.on_sample(gripper, sample))
+
+    def on_frame(self, stream, frame):
+        """帧订阅（采集线程）"""
+        latency = (time.monotonic() - frame.capture_time) * 1000
+        with self.lock:
+            self.latencies.setdefault(stream, []).append(latency)
+
+    def on_sample(self, gripper, sample):
+        """夹爪样本订阅（串口事件循环线程）"""
+        last = self.last_sample_time.get(gripper)
+        self.last_sample_time[gripper] = sample.capture_time
+        if last is not None:
+            with self.lock:
+                self.gaps.append((sample.capture_time - last) * 1000)
+
+    def on_render(self, seconds):
+        """一次画面刷新的耗时（GUI线程）"""
+        with self.lock:
+            self.render_times.append(seconds * 1000)
+
+    def sample(self):
+        """生成一行时间序列并清空区间统计"""
+        now = time.monotonic()
+        interval = now - self.last_time
+        self.last_time = now
+        with self.lock:
+            latencies, self.latencies = self.latencies, {}
+            gaps, self.gaps = self.gaps, []
+            render_times, self.render_times = self.render_times, []
+
+        row = {
+            "elapsed_s": round(now - self.start, 1),
+            "rss_mb": round(read_rss_mb(), 2),
+            "threads": threading.active_count(),
+            "gc_objects": len(gc.get_objects()),
+        }
+        if self.use_tracemalloc:
+            row["traced_mb"] = round(tracemalloc.get_traced_memory()[0] / 1e6, 3)
+        if self.cameras is not None:
+            for stream in sorted(self.cameras.fps):
+                values = latencies.get(stream, [])
+                row[f"fps_{stream}"] = round(len(values) / interval, 2) if interval > 0 else 0.0
+                row[f"lat_p50_{stream}"] = round(percentile(values, 50), 3)
+                row[f"lat_p99_{stream}"] = round(percentile(values, 99), 3)
+        if self.grippers:
+            seq = [gripper.get_latest_sample().seq for gripper in self.grippers]
+            row["gripper_hz"] = round(sum(b - a for a, b in zip(self.gripper_seq, seq)) / interval, 2)
+            self.gripper_seq = seq
+            row["gripper_gap_p99"] = round(percentile(gaps, 99), 3)
+            row["rx_buffer"] = max(len(gripper._rx_buffer) for gripper in self.grippers)
+        if self.display:
+            row["render_p50"] = round(percentile(render_times, 50), 3)
+            row["render_p99"] = round(percentile(render_times, 99), 3)
+        self.rows.append(row)
+        return row
+
+
+class TracemallocTracker:
+    """定期保存tracemalloc快照，与基准快照（预热结束时）比较
+
+    参数:
+        path (str): 报告文件
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.baseline = None
+
+    def snapshot(self, elapsed):
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        if self.baseline is None:
+            self.baseline = snapshot
+            return
+        stats = snapshot.compare_to(self.baseline, "lineno")[:TRACEMALLOC_TOP]
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(f"=== {elapsed:.0f} 秒（与预热结束时比较）===\n")
+            for stat in stats:
+                f.write(f"{stat}\n")
+            f.write("\n")
+
+
+def series_columns(rows):
+    """所有行的列名（按出现顺序）"""
+    columns = {}
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+    return list(columns)
+
+
+def save_series(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=series_columns(rows))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def load_series(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [{key: float(value) if value not in ("", "nan") else float("nan") for key, value in row.items()}
+                for row in csv.DictReader(f)]
+
+
+def drift_rule(column):
+    for prefix, rule in DRIFT_RULES.items():
+        if column == prefix or (prefix.endswith("_") and column.startswith(prefix)):
+            return rule
+    return None
+
+
+def detect_drift(times, values, direction, min_relative, min_absolute, warmup):
+    """检测一个指标的单调增长或下降
+
+    参数:
+        times, values (sequence): 时间（秒）和指标值
+        direction (str): "up" 或 "down"，异常的变化方向
+        min_relative, min_absolute (float): 首尾窗口中位数的最小相对/绝对变化
+        warmup (float): 预热时长（秒），之前的数据不参与检测
+
+    返回:
+        dict: first/last（首尾窗口中位数）、change、slope_per_hour（窗口中位数的Theil-Sen斜率）、
+              monotonic（同方向变化的比例）、flagged；数据不足时返回None
+    """
+    times = np.asarray(times, dtype=float)
+    values = np.asarray(values, dtype=float)
+    keep = (times >= warmup) & np.isfinite(values)
+    times, values = times[keep], values[keep]
+    if len(values) < DRIFT_WINDOWS * 2:
+        return None
+    windows = np.array_split(np.arange(len(values)), DRIFT_WINDOWS)
+    medians = np.array([np.median(values[index]) for index in windows])
+    centers = np.array([np.median(times[index]) for index in windows])
+    steps = np.diff(medians)
+    sign = 1.0 if direction == "up" else -1.0
+    monotonic = float(np.mean(sign * steps >= 0))
+    pairs = [(medians[j] - medians[i]) / (centers[j] - centers[i])
+             for i in range(len(medians)) for j in range(i + 1, len(medians)) if centers[j] > centers[i]]
+    slope = float(np.median(pairs)) * 3600 if pairs else 0.0
+    change = float(medians[-1] - medians[0])
+    relative = abs(change) / abs(medians[0]) if medians[0] else float("inf")
+    flagged = (monotonic >= MONOTONIC_FRACTION and sign * change > 0
+               and abs(change) >= min_absolute and relative >= min_relative)
+    return {"first": float(medians[0]), "last": float(medians[-1]), "change": change,
+            "slope_per_hour": slope, "monotonic": monotonic, "flagged": bool(flagged)}
+
+
+def analyze(rows, warmup=None):
+    """对时间序列的每个指标做漂移检测
+
+    返回:
+        dict: {指标: detect_drift的结果}
+    """
+    if not rows:
+        return {}
+    times = [row["elapsed_s"] for row in rows]
+    if warmup is None:
+        warmup = times[-1] * WARMUP_FRACTION
+    results = {}
+    for column in series_columns(rows):
+        rule = drift_rule(column)
+        if rule is None:
+            continue
+        result = detect_drift(times, [row.get(column, float("nan")) for row in rows], *rule, warmup)
+        if result is not None:
+            results[column] = result
+    return results
+
+
+def format_report(results):
+    lines = []
+    for column, result in results.items():
+        mark = "漂移" if result["flagged"] else "正常"
+        lines.append(f"  [{mark}] {column:<24} {result['first']:>10.2f} -> {result['last']:>10.2f}  "
+                     f"斜率 {result['slope_per_hour']:+.2f}/小时  单调 {result['monotonic'] * 100:.0f}%")
+    return "\n".join(lines)
+
+
+# ---------------- 运行 ----------------
+
+def open_cameras(mode, fps):
+    if mode == "none":
+        return None
+    if mode == "synthetic":
+        from bench_recorder import SyntheticCameras
+        return SyntheticCameras(fps, {"usb_color": (1280, 720), "rs_color": (640, 480), "rs_depth": (640, 480)},
+                                borrowed=("rs_color", "rs_depth"), track_lateness=False)
+    import camera_manager
+    cameras = camera_manager.CameraManager(lambda device, state, message: print(f"[{device}] {message}"))
+    cameras.open_all()
+    return cameras
+
+
+def open_grippers(specs, rate, replay_path):
+    """打开夹爪（串口路径或 sim），返回 (控制器列表, 模拟夹爪列表)"""
+    from gripper_control import GripperController
+    from serial_io import get_default_loop
+    replay = None
+    if replay_path:
+        from telemetry_recorder import load_recording
+        samples, _ = load_recording(replay_path)
+        replay = np.array(samples['angle'])
+    controllers = []
+    simulators = []
+    for index, spec in enumerate(specs):
+        if spec == "sim":
+            from gripper_sim import VirtualGripper
+            simulator = VirtualGripper(rate, sn=f"SOAK{index:04d}", trailing_comma=0.05, replay=replay).start()
+            simulators.append(simulator)
+            spec = simulator.path
+        controller = GripperController(io_loop=get_default_loop(), name=f"gripper{index}")
+        if not controller.connect(spec):
+            raise RuntimeError(f"无法打开串口 {spec}")
+        controller.start_data_reception()
+        controllers.append(controller)
+    return controllers, simulators
+
+
+def placeholder_image(width, height, text):
+    import cv2
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    cv2.putText(image, text, (10, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+    return image
+
+
+def run_display(cameras, monitor, duration, max_fps):
+    """在Qt离屏窗口中按界面的方式合成和绘制画面，直到时长结束（阻塞，在主线程运行）"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+    from compositor_widget import CompositorWidget
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    view = CompositorWidget()
+    view.start(max_fps, placeholder_image)
+    for stream in sorted(cameras.frames):
+        view.add_view(stream, stream, stream)
+    cameras.add_frame_listener(view.on_frame)
+    view.resize(1280, 400)
+    view.show()
+
+    def overlay(stream, frame, text):
+        text(1, f"FPS: {cameras.fps[stream]:.1f}")
+
+    def tick():
+        start = time.perf_counter()
+        view.refresh(cameras.get_frame, overlay, lambda stream: None)
+        monitor.on_render(time.perf_counter() - start)
+
+    timer = QTimer()
+    timer.timeout.connect(tick)
+    timer.start(view.interval_ms)
+    QTimer.singleShot(int(duration * 1000), app.quit)
+    app.exec_()
+    timer.stop()
+    print(f"画面刷新统计: {view.format_stats()}")
+
+
+def run(args):
+    out_dir = os.path.join(args.out, datetime.now().strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(out_dir, exist_ok=True)
+    if args.tracemalloc:
+        tracemalloc.start(args.tracemalloc_frames)
+    cameras = open_cameras(args.cameras, args.fps)
+    grippers, simulators = open_grippers(args.gripper, args.gripper_rate, args.replay)
+    display = cameras is not None and not args.no_display
+    monitor = SoakMonitor(cameras, grippers, args.tracemalloc, display)
+    tracker = TracemallocTracker(os.path.join(out_dir, "tracemalloc.txt")) if args.tracemalloc else None
+    warmup = args.warmup if args.warmup is not None else args.duration * WARMUP_FRACTION
+    print(f"浸泡测试 {args.duration / 3600:.2f} 小时，每 {args.interval:.0f} 秒记录一次，结果保存在 {out_dir}")
+
+    stop = threading.Event()
+
+    def sampler():
+        next_snapshot = warmup
+        while not stop.wait(args.interval):
+            row = monitor.sample()
+            if tracker is not None and row["elapsed_s"] >= next_snapshot:
+                tracker.snapshot(row["elapsed_s"])
+                next_snapshot = row["elapsed_s"] + args.tracemalloc_interval
+            if args.verbose:
+                print(json.dumps(row, ensure_ascii=False))
+            # 每次记录后覆盖保存，测试中途退出也能分析
+            save_series(os.path.join(out_dir, "series.csv"), monitor.rows)
+
+    sampler_thread = threading.Thread(target=sampler, name="soak-sampler", daemon=True)
+    sampler_thread.start()
+    try:
+        if display:
+            run_display(cameras, monitor, args.duration, args.display_fps)
+        else:
+            time.sleep(args.duration)
+    except KeyboardInterrupt:
+        print("测试被中断，分析已记录的数据")
+    finally:
+        stop.set()
+        sampler_thread.join()
+        for gripper in grippers:
+            gripper.stop_data_reception()
+            gripper.disconnect()
+        for simulator in simulators:
+            simulator.stop()
+        if cameras is not None:
+            cameras.shutdown()
+
+    save_series(os.path.join(out_dir, "series.csv"), monitor.rows)
+    results = analyze(monitor.rows, warmup)
+    with open(os.path.join(out_dir, "drift.json"), "w", encoding="utf-8") as f:
+        json.dump({"args": vars(args), "warmup": warmup, "results": results}, f, ensure_ascii=False, indent=2)
+    print(format_report(results))
+    flagged = [column for column, result in results.items() if result["flagged"]]
+    if flagged:
+        print(f"检测到漂移: {', '.join(flagged)}")
+    return 1 if flagged else 0
+
+
+def compare(before, after):
+    """对比两次测试的漂移检测结果（修复前/修复后）"""
+    columns = [column for column in before if column in after]
+    print(f"  {'指标':<24}{'修复前 斜率/小时':>18}{'修复后 斜率/小时':>18}")
+    for column in columns:
+        marks = ["*" if result["flagged"] else " " for result in (before[column], after[column])]
+        print(f"  {column:<24}{before[column]['slope_per_hour']:>+17.2f}{marks[0]}"
+              f"{after[column]['slope_per_hour']:>+17.2f}{marks[1]}")
+    print("  （* 表示检测到漂移）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="长时间稳定性（浸泡）测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="运行浸泡测试")
+    run_parser.add_argument('--duration', type=parse_duration, default=parse_duration("1h"),
+                            help="测试时长，如 30m、4h")
+    run_parser.add_argument('--interval', type=float, default=10.0, help="记录间隔（秒）")
+    run_parser.add_argument('--warmup', type=parse_duration, help="预热时长，默认为总时长的10%%")
+    run_parser.add_argument('--cameras', choices=("real", "synthetic", "none"), default="real", help="摄像头来源")
+    run_parser.add_argument('--fps', type=float, default=30.0, help="模拟摄像头的帧率")
+    run_parser.add_argument('--gripper', action='append', default=[],
+                            help="夹爪串口，sim 表示模拟夹爪（可多次指定）")
+    run_parser.add_argument('--gripper-rate', type=float, default=100.0, help="模拟夹爪的数据频率（Hz）")
+    run_parser.add_argument('--replay', help="模拟夹爪回放的录制目录（telemetry_recorder录制）")
+    run_parser.add_argument('--no-display', action='store_true', help="不运行显示管线")
+    run_parser.add_argument('--display-fps', type=float, default=30.0, help="显示帧率上限")
+    run_parser.add_argument('--tracemalloc', action='store_true', help="记录Python内存分配（有额外开销）")
+    run_parser.add_argument('--tracemalloc-frames', type=int, default=1, help="tracemalloc记录的调用栈深度")
+    run_parser.add_argument('--tracemalloc-interval', type=parse_duration, default=parse_duration("10m"),
+                            help="tracemalloc快照间隔")
+    run_parser.add_argument('--out', default="soak", help="结果目录")
+    run_parser.add_argument('--verbose', action='store_true', help="输出每一行记录")
+
+    analyze_parser = subparsers.add_parser("analyze", help="分析已保存的时间序列，给出两个文件时对比")
+    analyze_parser.add_argument('series', nargs='+', help="series.csv（最多两个: 修复前 修复后）")
+    analyze_parser.add_argument('--warmup', type=parse_duration, help="预热时长，默认为总时长的10%%")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        return run(args)
+
+    results = []
+    for path in args.series[:2]:
+        result = analyze(load_series(path), args.warmup)
+        print(f"{path}:")
+        print(format_report(result))
+        results.append(result)
+    if len(results) == 2:
+        compare(*results)
+    return 1 if any(result["flagged"] for result in results[-1].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
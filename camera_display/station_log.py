@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+工位日志模块
+日志记录只放入内存队列，由后台线程写入终端和日志文件，采集/串口等热路径不会因终端或磁盘I/O阻塞
+- 相同的消息在短时间内重复出现时会被限流，并在下一条放行的消息中注明省略的条数；
+  退出时仍未注明的省略条数在 shutdown_logging() 中输出
+- 日志文件按工位和会话分目录存放，按大小轮转，每行一条JSON，包含设备、SN码、串口等字段
+
+用法:
+    log = get_logger("gripper")
+    log.warning("JSON解析错误: %s", e, extra=log_fields(device="sense", port="/dev/ttyUSB0"))
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import queue
+import socket
+import logging
+import threading
+import logging.handlers
+
+# 结构化字段
+STRUCTURED_FIELDS = ("device", "sn", "port")
+
+# 日志队列容量，队列满时丢弃新日志（只计数），绝不阻塞调用线程
+QUEUE_SIZE = 10000
+
+# 限流：同一消息在 RATE_LIMIT_INTERVAL 秒内最多输出 RATE_LIMIT_BURST 条
+RATE_LIMIT_INTERVAL = 5.0
+RATE_LIMIT_BURST = 3
+
+# 日志文件轮转
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 5
+
+ROOT_LOGGER_NAME = "pika"
+
+# 日志消息模板中的 % 占位符（如 %s、%d、%.1f、%(name)s）
+PLACEHOLDER_PATTERN = re.compile(r"%(?:\([^)]*\))?[#0\- +]*(?:\*|\d+)?(?:\.(?:\*|\d+))?[diouxXeEfFgGcrsa]")
+
+_listener = None
+_queue_handler = None
+_setup_lock = threading.Lock()
+
+
+def get_logger(name):
+    """获取模块日志记录器（pika.<name>）"""
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def get_station_name():
+    """工位名称：环境变量 PIKA_STATION，未设置时使用主机名"""
+    return os.environ.get("PIKA_STATION") or socket.gethostname()
+
+
+def log_fields(device=None, sn=None, port=None):
+    """生成结构化字段，用作日志调用的extra参数"""
+    return {"device": device, "sn": sn, "port": port}
+
+
+class RateLimitFilter(logging.Filter):
+    """按消息模板和设备限流重复日志（在调用线程中执行，只做字典操作）"""
+
+    def __init__(self, interval=RATE_LIMIT_INTERVAL, burst=RATE_LIMIT_BURST):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.lock = threading.Lock()
+        # key -> [窗口开始时间, 窗口内已输出条数, 被省略条数]
+        self.counters = {}
+
+    def filter(self, record):
+        key = (record.name, record.levelno, record.msg,
+               getattr(record, "device", None), getattr(record, "port", None))
+        now = time.monotonic()
+        with self.lock:
+            counter = self.counters.get(key)
+            if counter is None or now - counter[0] >= self.interval:
+                suppressed = counter[2] if counter is not None else 0
+                self.counters[key] = [now, 1, 0]
+                if len(self.counters) > 1000:
+                    # 清理过期的计数，防止字典无限增长
+                    self.counters = {k: v for k, v in self.counters.items()
+                                     if now - v[0] < self.interval}
+            elif counter[1] < self.burst:
+                counter[1] += 1
+                suppressed = 0
+            else:
+                counter[2] += 1
+                return False
+        record.suppressed = suppressed
+        return True
+
+    def take_suppressed(self):
+        """取出尚未注明的省略条数并清零
+
+        返回:
+            list: [(key, 省略条数)]，key 为 (logger名称, 级别, 消息模板, 设备, 串口)
+        """
+        with self.lock:
+            pending = [(key, counter[2]) for key, counter in self.counters.items() if counter[2]]
+            for counter in self.counters.values():
+                counter[2] = 0
+        return pending
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """队列满时丢弃日志并计数，不阻塞也不抛出异常"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # 在调用线程中只做最少的工作：格式化消息参数，去掉不可序列化的异常对象
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _suppressed_suffix(record):
+    suppressed = getattr(record, "suppressed", 0)
+    return f"（已省略 {suppressed} 条重复消息）" if suppressed else ""
+
+
+class ConsoleFormatter(logging.Formatter):
+    """终端输出格式：时间 级别 [设备 串口 SN] 消息"""
+
+    def format(self, record):
+        fields = " ".join(str(getattr(record, name)) for name in STRUCTURED_FIELDS
+                          if getattr(record, name, None))
+        prefix = f"[{fields}] " if fields else ""
+        text = (f"{self.formatTime(record, '%H:%M:%S')} {record.levelname} "
+                f"{prefix}{record.getMessage()}{_suppressed_suffix(record)}")
+        if record.exc_text:
+            text += "\n" + record.exc_text
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """日志文件格式：每行一条JSON"""
+
+    def __init__(self, station, session):
+        super().__init__()
+        self.station = station
+        self.session = session
+
+    def format(self, record):
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "station": self.station,
+            "session": self.session,
+            "message": record.getMessage() + _suppressed_suffix(record),
+        }
+        for name in STRUCTURED_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging(station=None, log_dir=None, level=logging.INFO, console=True):
+    """初始化日志系统（重复调用无效）
+
+    参数:
+        station (str): 工位名称，默认使用环境变量 PIKA_STATION 或主机名
+        log_dir (str): 日志根目录，默认使用环境变量 PIKA_LOG_DIR 或 ~/pika_logs
+        level (int): 日志级别
+        console (bool): 是否同时输出到终端
+
+    返回:
+        str: 本次会话的日志文件路径
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is not None:
+            return _listener.log_path
+
+        station = station or get_station_name()
+        log_dir = log_dir or os.environ.get("PIKA_LOG_DIR") or os.path.expanduser("~/pika_logs")
+        session = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+        station_dir = os.path.join(log_dir, station)
+
+        handlers = []
+        log_path = None
+        try:
+            os.makedirs(station_dir, exist_ok=True)
+            log_path = os.path.join(station_dir, f"{session}.log")
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUP_COUNT, encoding="utf-8")
+            file_handler.setFormatter(JsonFormatter(station, session))
+            handlers.append(file_handler)
+        except OSError as e:
+            print(f"无法创建日志文件: {e}", file=sys.stderr)
+        if console:
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(ConsoleFormatter())
+            handlers.append(console_handler)
+
+        log_queue = queue.Queue(QUEUE_SIZE)
+        _queue_handler = NonBlockingQueueHandler(log_queue)
+        _queue_handler.addFilter(RateLimitFilter())
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        root.setLevel(level)
+        root.addHandler(_queue_handler)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.log_path = log_path
+        _listener.start()
+        return log_path
+
+
+def _flush_suppressed(handler):
+    """输出限流器中尚未注明的省略条数（每个被限流的消息一条，不再经过限流）"""
+    for log_filter in handler.filters:
+        if not isinstance(log_filter, RateLimitFilter):
+            continue
+        for (name, level, msg, device, port), suppressed in log_filter.take_suppressed():
+            # 只有消息模板没有参数，把占位符替换为省略号，避免输出原样的 %s
+            template = PLACEHOLDER_PATTERN.sub("…", msg).replace("%%", "%")
+            record = logging.LogRecord(name, level, __file__, 0, "（退出前）%s", (template,), None)
+            record.device = device
+            record.port = port
+            record.suppressed = suppressed
+            handler.emit(record)
+
+
+def shutdown_logging():
+    """写完队列中剩余的日志并停止后台线程（程序退出时调用）"""
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is None:
+            return
+        _flush_suppressed(_queue_handler)
+        if _queue_handler.dropped:
+            get_logger("log").warning("日志队列已满，丢弃了 %d 条日志", _queue_handler.dropped)
+        _listener.stop()
+        logging.getLogger(ROOT_LOGGER_NAME).removeHandler(_queue_handler)
+        _listener = None
+        _queue_handler = None
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+工位配置
+记住本工位上次使用的设备，启动时和设备插入时直接连接，不需要手动选择串口、不需要探测摄像头:
+- 夹爪: 角色（gripper/sense）对应的串口，按USB物理端口路径（/dev/serial/by-path，更换被测设备后仍是同一个接口）
+  和设备ID路径（/dev/serial/by-id，同一台设备换了接口也能找到）保存
+- 外接USB摄像头: 视频设备节点的物理端口路径和设备ID路径（/dev/v4l/by-path、/dev/v4l/by-id）
+- RealSense: 序列号、图像流配置名称和每个配置的深度滤波开关
+查找设备时只解析 /dev 下的符号链接，不打开任何设备。物理端口路径优先，找不到时再按设备ID路径查找；
+没有符号链接的设备（如模拟夹爪的伪终端）按设备节点本身保存
+配置保存在环境变量 PIKA_STATION_PROFILE 指定的JSON文件，默认 ~/pika_station/profile.json
+
+文件格式:
+    {
+        "auto_connect": true,
+        "grippers": {
+            "sense": {"device": "/dev/ttyUSB0", "path": "/dev/serial/by-path/pci-0000:00:14.0-usb-0:2:1.0-port0",
+                      "id": "/dev/serial/by-id/usb-1a86_USB_Serial-if00-port0"}
+        },
+        "usb_camera": {"device": "/dev/video2", "path": "/dev/v4l/by-path/pci-0000:00:14.0-usb-0:3:1.0-video-index0"},
+        "realsense": {"serial": "230322270000", "profile": "filtered", "filters": {"filtered": {"spatial": false}}}
+    }
+"""
+
+import os
+import re
+import json
+import copy
+
+from station_log import get_logger
+
+log = get_logger("station_profile")
+
+# 夹爪角色
+ROLE_GRIPPER = "gripper"
+ROLE_SENSE = "sense"
+ROLES = (ROLE_GRIPPER, ROLE_SENSE)
+
+# 稳定路径所在目录，按顺序查找（物理端口优先）
+SERIAL_LINK_DIRS = (("path", "/dev/serial/by-path"), ("id", "/dev/serial/by-id"))
+VIDEO_LINK_DIRS = (("path", "/dev/v4l/by-path"), ("id", "/dev/v4l/by-id"))
+
+VIDEO_NODE_PATTERN = re.compile(r"^/dev/video(\d+)$")
+
+
+def default_profile_path():
+    """工位配置文件路径：环境变量 PIKA_STATION_PROFILE 或 ~/pika_station/profile.json"""
+    return os.environ.get("PIKA_STATION_PROFILE") or os.path.expanduser("~/pika_station/profile.json")
+
+
+def device_links(device, link_dirs):
+    """设备节点及其稳定路径
+
+    参数:
+        device (str): 设备节点，如 /dev/ttyUSB0
+        link_dirs: (类型, 目录) 列表，如 SERIAL_LINK_DIRS
+
+    返回:
+        dict: {"device": 设备节点, 类型: 指向该节点的符号链接, ...}，没有对应符号链接的类型省略
+    """
+    entry = {"device": device}
+    real = os.path.realpath(device)
+    for kind, directory in link_dirs:
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            continue
+        for name in names:
+            link = os.path.join(directory, name)
+            if os.path.realpath(link) == real:
+                entry[kind] = link
+                break
+    return entry
+
+
+def resolve_device(entry, link_dirs):
+    """按保存的稳定路径找到设备当前的节点（只解析符号链接，不打开设备）
+
+    返回:
+        str: 设备节点；设备不在线时返回None。保存了稳定路径时只按稳定路径查找，
+             节点号可能已分配给其他设备
+    """
+    if not entry:
+        return None
+    kinds = [kind for kind, _ in link_dirs if entry.get(kind)]
+    for kind in kinds:
+        if os.path.exists(entry[kind]):
+            return os.path.realpath(entry[kind])
+    if not kinds and entry.get("device") and os.path.exists(entry["device"]):
+        return entry["device"]
+    return None
+
+
+class StationProfile:
+    """工位配置（在GUI线程修改，修改后立即保存）
+
+    参数:
+        path (str): 配置文件路径，为None时使用 default_profile_path()
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_profile_path()
+        self.data = {"auto_connect": True, "grippers": {}, "usb_camera": {}, "realsense": {}}
+
+    @classmethod
+    def load(cls, path=None):
+        """读取工位配置，文件不存在或格式有误时返回空配置（格式有误时记录警告，下次保存时覆盖）"""
+        profile = cls(path)
+        try:
+            with open(profile.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return profile
+        except (OSError, ValueError) as e:
+            log.warning("读取工位配置 %s 失败，使用空配置: %s", profile.path, e)
+            return profile
+        if isinstance(data, dict):
+            for key, value in data.items():
+                if key in profile.data and isinstance(value, type(profile.data[key])):
+                    profile.data[key] = value
+        return profile
+
+    def save(self):
+        """写入配置文件（先写临时文件再替换，中途退出不会损坏原文件）
+
+        返回:
+            bool: 是否成功
+        """
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            return True
+        except OSError as e:
+            log.warning("保存工位配置 %s 失败: %s", self.path, e)
+            return False
+
+    def _update(self, key, value):
+        """修改一项配置，有变化时保存"""
+        if self.data.get(key) == value:
+            return
+        self.data[key] = value
+        self.save()
+
+    @property
+    def auto_connect(self):
+        """是否在启动和设备插入时自动连接已知设备"""
+        return bool(self.data["auto_connect"])
+
+    def set_auto_connect(self, enabled):
+        self._update("auto_connect", bool(enabled))
+
+    # ---------------- 夹爪 ----------------
+
+    def remember_port(self, role, port):
+        """记住角色对应的串口（连接成功后调用）"""
+        grippers = dict(self.data["grippers"])
+        grippers[role] = device_links(port, SERIAL_LINK_DIRS)
+        self._update("grippers", grippers)
+
+    def known_port(self, role):
+        """角色对应的已知设备当前的串口，没有记录或设备不在线时返回None"""
+        return resolve_device(self.data["grippers"].get(role), SERIAL_LINK_DIRS)
+
+    # ---------------- 摄像头 ----------------
+
+    def remember_usb_camera(self, index):
+        """记住打开成功的USB摄像头索引对应的设备节点"""
+        self._update("usb_camera", device_links(f"/dev/video{index}", VIDEO_LINK_DIRS))
+
+    def usb_camera_index(self):
+        """已知USB摄像头当前的索引，没有记录或设备不在线时返回None（可在工作线程调用）"""
+        device = resolve_device(self.data["usb_camera"], VIDEO_LINK_DIRS)
+        match = VIDEO_NODE_PATTERN.match(device or "")
+        return int(match.group(1)) if match else None
+
+    @property
+    def rs_serial(self):
+        """上次使用的RealSense序列号"""
+        return self.data["realsense"].get("serial")
+
+    @property
+    def rs_profile(self):
+        """上次使用的RealSense配置名称"""
+        return self.data["realsense"].get("profile")
+
+    def rs_filters(self, profile):
+        """RealSense配置对应的深度滤波开关 {滤波名称: 是否开启}，没有修改过时为空"""
+        return dict(self.data["realsense"].get("filters", {}).get(profile, {}))
+
+    def remember_realsense(self, serial=None, profile=None):
+        """记住RealSense序列号和/或配置名称"""
+        realsense = copy.deepcopy(self.data["realsense"])
+        if serial:
+            realsense["serial"] = serial
+        if profile:
+            realsense["profile"] = profile
+        self._update("realsense", realsense)
+
+    def remember_filter(self, profile, name, enabled):
+        """记住某个RealSense配置下一个深度滤波的开关"""
+        realsense = copy.deepcopy(self.data["realsense"])
+        realsense.setdefault("filters", {}).setdefault(profile, {})[name] = bool(enabled)
+        self._update("realsense", realsense)
+
+    @property
+    def has_cameras(self):
+        """是否记录了摄像头"""
+        return bool(self.data["usb_camera"] or self.rs_serial)
+
+    def describe(self):
+        """配置摘要，用于状态栏和日志"""
+        parts = []
+        for role in ROLES:
+            entry = self.data["grippers"].get(role)
+            if entry:
+                parts.append(f"{role}: {entry.get('path') or entry.get('id') or entry.get('device')}")
+        usb = self.data["usb_camera"]
+        if usb:
+            parts.append(f"USB摄像头: {usb.get('path') or usb.get('id') or usb.get('device')}")
+        if self.rs_serial:
+            parts.append(f"RealSense: {self.rs_serial}（{self.rs_profile or '默认配置'}）")
+        return "，".join(parts) if parts else "没有已知设备"
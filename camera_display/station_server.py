@@ -0,0 +1,669 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+工位远程查看和控制服务
+在独立线程中运行 asyncio 事件循环，只使用标准库实现 HTTP 和 WebSocket:
+    GET  /                              预览页面（所有图像流 + 实时数据）
+    GET  /stream/<图像流>.mjpg?fps=10    MJPEG 预览，帧率按客户端指定（不超过 MAX_MJPEG_FPS）
+    GET  /snapshot/<图像流>.jpg          当前画面
+    GET  /api/status                    摄像头、画面健康、夹爪和判定状态
+    GET  /ws/telemetry?hz=30            WebSocket，推送夹爪角度和判定结果（只在数据变化时发送）
+    POST /api/gripper/<名称>/<命令>      夹爪命令: enable / disable / position {"angle"} /
+                                        light {"light"} / vibrate {"mode"}
+    GET  /api/test                      当前Sense测试的判定结果
+    POST /api/test/restart              结束当前测试并开始新的测试
+
+预览不单独采集画面: 所有客户端共享 CameraManager 的最新帧，每个图像流的每一帧最多编码一次
+（在编码线程池中进行，同一帧的并发请求等待同一个编码结果），客户端越多，编码次数不变。
+发送慢的客户端只会收到更少的帧，不影响其他客户端和采集线程。
+
+安全:
+- 默认只监听本机；监听其他地址时必须设置口令（环境变量 PIKA_SERVER_TOKEN），否则拒绝启动
+- 设置口令后，POST 请求需要带上 X-Token 头或 ?token= 参数
+- POST 请求必须是 Content-Type: application/json；POST 和 WebSocket 握手带有 Origin 头时，
+  Origin 必须是本服务自身的地址（未设置口令时还必须是本机地址），防止浏览器中的其他网页跨站控制夹爪
+
+用法（无界面运行，打开已连接的摄像头）:
+    PIKA_SERVER_TOKEN=<口令> python3 station_server.py --host 0.0.0.0 --port 8765
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hmac
+import base64
+import struct
+import asyncio
+import hashlib
+import argparse
+import ipaddress
+import threading
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+from station_log import get_logger, get_station_name
+
+log = get_logger("station_server")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# MJPEG 预览的默认/最大帧率，JPEG 质量
+DEFAULT_MJPEG_FPS = 10.0
+MAX_MJPEG_FPS = 30.0
+JPEG_QUALITY = 80
+# JPEG 编码线程数（cv2.imencode 执行时释放GIL）
+ENCODE_WORKERS = 2
+
+# WebSocket 数据推送的默认/最大频率
+DEFAULT_TELEMETRY_HZ = 30.0
+MAX_TELEMETRY_HZ = 200.0
+
+# 请求头读取超时（秒）和请求体大小上限
+REQUEST_TIMEOUT = 10.0
+MAX_BODY_SIZE = 64 * 1024
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+WS_OP_TEXT = 0x1
+WS_OP_CLOSE = 0x8
+WS_OP_PING = 0x9
+WS_OP_PONG = 0xA
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+                405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+                415: "Unsupported Media Type",
+                500: "Internal Server Error", 503: "Service Unavailable"}
+
+MJPEG_BOUNDARY = b"frame"
+
+INDEX_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>pika 工位 {station}</title>
+<style>body{{font-family:sans-serif;background:#222;color:#eee}} img{{width:480px;margin:4px;background:#000}}
+pre{{font-size:16px}}</style></head>
+<body><h3>pika 工位 {station}</h3>
+<div>{images}</div>
+<pre id="telemetry">连接中...</pre>
+<script>
+const ws = new WebSocket((location.protocol === "https:" ? "wss://" : "ws://") + location.host + "/ws/telemetry?hz=10");
+ws.onmessage = (event) => {{ document.getElementById("telemetry").textContent = JSON.stringify(JSON.parse(event.data), null, 2); }};
+ws.onclose = () => {{ document.getElementById("telemetry").textContent = "连接已断开"; }};
+</script></body></html>
+"""
+
+
+def is_loopback(host):
+    """是否为本机地址（localhost 或回环IP）"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+class HttpError(Exception):
+    """请求处理失败，返回对应的HTTP状态码"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def ws_frame(payload, opcode=WS_OP_TEXT):
+    """构造一个服务端WebSocket帧（服务端发送的帧不加掩码）"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def ws_read_frame(reader):
+    """读取一个客户端WebSocket帧
+
+    返回:
+        tuple: (opcode, payload)
+    """
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if length > MAX_BODY_SIZE:
+        raise ConnectionError("WebSocket 帧过大")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+class SharedJpegEncoder:
+    """各图像流最新帧的JPEG编码缓存（只在事件循环线程中使用，无需加锁）
+
+    参数:
+        cameras (CameraManager): 摄像头管理器
+        executor (ThreadPoolExecutor): 编码线程池
+        quality (int): JPEG质量
+    """
+
+    def __init__(self, cameras, executor, quality=JPEG_QUALITY):
+        import cv2
+        self.cv2 = cv2
+        self.cameras = cameras
+        self.executor = executor
+        self.params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        # {stream: (seq, jpeg)}，以及正在编码的帧 {stream: (seq, future)}
+        self.cache = {}
+        self.pending = {}
+        self.encodes = 0
+
+    def _encode(self, image):
+        ok, buffer = self.cv2.imencode(".jpg", image, self.params)
+        if not ok:
+            raise RuntimeError("JPEG 编码失败")
+        return buffer.tobytes()
+
+    async def get(self, stream):
+        """获取图像流最新一帧的JPEG
+
+        返回:
+            tuple: (帧序号, JPEG数据)，没有画面时返回(None, None)
+        """
+        frame = self.cameras.get_frame(stream)
+        if frame is None:
+            return None, None
+        cached = self.cache.get(stream)
+        if cached is not None and cached[0] == frame.seq:
+            return cached
+        pending = self.pending.get(stream)
+        if pending is not None and pending[0] == frame.seq:
+            # 其他客户端已经在编码这一帧，等待同一个结果
+            return frame.seq, await asyncio.shield(pending[1])
+
+        future = asyncio.get_running_loop().run_in_executor(self.executor, self._encode, frame.image)
+        self.pending[stream] = (frame.seq, future)
+        self.encodes += 1
+        try:
+            data = await asyncio.shield(future)
+        finally:
+            if self.pending.get(stream, (None, None))[1] is future:
+                del self.pending[stream]
+        cached = self.cache.get(stream)
+        if cached is None or cached[0] < frame.seq:
+            self.cache[stream] = (frame.seq, data)
+        return frame.seq, data
+
+
+class StationServer:
+    """工位远程查看和控制服务
+
+    参数:
+        cameras (CameraManager): 摄像头管理器，为None时不提供画面
+        grippers (dict): 可控制的夹爪 {名称: GripperController}
+        rules (RulesEngine): Sense夹爪判定规则
+        stream_health (StreamHealthMonitor): 画面健康检测
+        test_restart: 重新开始测试的回调函数（在服务线程中调用，需自行切换到GUI线程）；
+                      为None时只重置判定规则
+        host (str): 监听地址，"0.0.0.0" 表示局域网可访问
+        port (int): 监听端口
+        token (str): POST 请求需要的口令，为None时使用环境变量 PIKA_SERVER_TOKEN
+    """
+
+    def __init__(self, cameras=None, grippers=None, rules=None, stream_health=None, test_restart=None,
+                 host=DEFAULT_HOST, port=DEFAULT_PORT, token=None):
+        self.cameras = cameras
+        self.grippers = dict(grippers or {})
+        self.rules = rules
+        self.stream_health = stream_health
+        self.test_restart = test_restart
+        self.host = host
+        self.port = port
+        self.token = token if token is not None else os.environ.get("PIKA_SERVER_TOKEN") or None
+        self.station = get_station_name()
+
+        self.executor = ThreadPoolExecutor(max_workers=ENCODE_WORKERS, thread_name_prefix="jpeg-encode")
+        # 夹爪命令（串口写入）在单独的线程中执行，不阻塞事件循环
+        self.command_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="server-command")
+        self.encoder = None
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.running = False
+        self.ready = threading.Event()
+        self.start_error = None
+
+        # 统计
+        self.clients = {"mjpeg": 0, "ws": 0}
+        self.mjpeg_frames_sent = 0
+        self.ws_messages_sent = 0
+        self.requests = 0
+
+        self.routes = [
+            ("GET", re.compile(r"^/$"), self._handle_index),
+            ("GET", re.compile(r"^/stream/(\w+)\.mjpg$"), self._handle_mjpeg),
+            ("GET", re.compile(r"^/snapshot/(\w+)\.jpg$"), self._handle_snapshot),
+            ("GET", re.compile(r"^/api/status$"), self._handle_status),
+            ("GET", re.compile(r"^/ws/telemetry$"), self._handle_telemetry),
+            ("POST", re.compile(r"^/api/gripper/(\w+)/(\w+)$"), self._handle_gripper_command),
+            ("GET", re.compile(r"^/api/test$"), self._handle_test),
+            ("POST", re.compile(r"^/api/test/restart$"), self._handle_test_restart),
+        ]
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self):
+        """在后台线程中启动服务，等待端口监听成功
+
+        返回:
+            bool: 是否启动成功（失败原因见 start_error）
+        """
+        self.ready.clear()
+        self.start_error = None
+        if self.token is None and not is_loopback(self.host):
+            self.start_error = f"监听 {self.host} 时必须设置口令（PIKA_SERVER_TOKEN）"
+            log.error("远程服务启动失败: %s", self.start_error)
+            return False
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="station-server", daemon=True)
+        self.thread.start()
+        self.ready.wait(timeout=5.0)
+        if self.start_error is not None or not self.ready.is_set():
+            self.running = False
+            log.error("远程服务启动失败: %s", self.start_error)
+            return False
+        log.info("远程服务已启动: %s", self.url)
+        return True
+
+    def stop(self):
+        """停止服务，断开所有客户端"""
+        if self.thread is None or not self.ready.is_set():
+            return
+        self.loop.call_soon_threadsafe(self._shutdown)
+        self.thread.join(timeout=3.0)
+        self.thread = None
+        self.executor.shutdown(wait=False)
+        self.command_executor.shutdown(wait=False)
+        log.info("远程服务已停止（请求 %d 次，MJPEG 帧 %d，编码 %d 次）", self.requests, self.mjpeg_frames_sent,
+                 self.encoder.encodes if self.encoder else 0)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            if self.cameras is not None:
+                self.encoder = SharedJpegEncoder(self.cameras, self.executor)
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle_connection, self.host, self.port))
+            # 端口为0时使用系统分配的端口
+            self.port = self.server.sockets[0].getsockname()[1]
+        except Exception as e:
+            self.start_error = e
+            self.loop.close()
+            return
+        self.ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+
+    def _shutdown(self):
+        self.running = False
+        self.server.close()
+        for task in asyncio.all_tasks(self.loop):
+            task.cancel()
+        # 等待被取消的连接处理完毕后再停止事件循环
+        self.loop.call_later(0.1, self.loop.stop)
+
+    # ---- HTTP ----
+
+    async def _handle_connection(self, reader, writer):
+        self.requests += 1
+        try:
+            method, path, query, headers, body = await asyncio.wait_for(self._read_request(reader), REQUEST_TIMEOUT)
+            for route_method, pattern, handler in self.routes:
+                match = pattern.match(path)
+                if match is None:
+                    continue
+                if route_method != method:
+                    raise HttpError(405, f"{path} 不支持 {method}")
+                if method == "POST":
+                    self._check_origin(headers)
+                    self._check_json(headers)
+                    self._check_token(headers, query)
+                await handler(reader, writer, query, headers, body, *match.groups())
+                break
+            else:
+                raise HttpError(404, f"未知路径: {path}")
+        except HttpError as e:
+            self._send_json(writer, {"ok": False, "error": e.message}, e.status)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            log.exception("处理请求失败: %s", e)
+            self._send_json(writer, {"ok": False, "error": str(e)}, 500)
+        finally:
+            try:
+                await writer.drain()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        if not request_line:
+            raise ConnectionError("连接已关闭")
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "无效的请求行")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_SIZE:
+            raise HttpError(413, "请求体过大")
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return method.upper(), url.path, query, headers, body
+
+    def _check_token(self, headers, query):
+        if self.token is None:
+            return
+        expected = self.token.encode("utf-8")
+        given = [value.encode("utf-8") for value in (headers.get("x-token"), query.get("token")) if value]
+        # 逐一用恒定时间比较，避免通过响应时间猜测口令
+        if not any([hmac.compare_digest(value, expected) for value in given]):
+            raise HttpError(403, "口令错误")
+
+    def _check_origin(self, headers):
+        """浏览器请求（带Origin头）必须来自本服务自身的页面；未设置口令时Host还必须是本机地址（防止DNS重绑定）"""
+        origin = headers.get("origin")
+        if origin is None:
+            # 非浏览器客户端（如curl）不发送Origin
+            return
+        host = headers.get("host", "")
+        if origin != f"http://{host}":
+            raise HttpError(403, f"不允许跨站请求: {origin}")
+        if self.token is None and not is_loopback(urlsplit(f"//{host}").hostname or ""):
+            raise HttpError(403, f"未设置口令时只允许本机访问: {host}")
+
+    @staticmethod
+    def _check_json(headers):
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type != "application/json":
+            raise HttpError(415, "请求体必须是JSON（Content-Type: application/json）")
+
+    @staticmethod
+    def _send_response(writer, status, content_type, data):
+        header = (f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                  f"Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\n"
+                  "Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        writer.write(header.encode("latin-1") + data)
+
+    def _send_json(self, writer, obj, status=200):
+        self._send_response(writer, status, "application/json; charset=utf-8",
+                            json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+    @staticmethod
+    def _parse_json(body):
+        if not body:
+            return {}
+        try:
+            params = json.loads(body.decode("utf-8"))
+        except ValueError:
+            raise HttpError(400, "请求体不是有效的JSON")
+        if not isinstance(params, dict):
+            raise HttpError(400, "请求体必须是JSON对象")
+        return params
+
+    def _streams(self):
+        return list(self.cameras.frames) if self.cameras is not None else []
+
+    def _check_stream(self, stream):
+        if self.encoder is None or stream not in self._streams():
+            raise HttpError(404, f"未知图像流: {stream}")
+
+    @staticmethod
+    def _rate(query, name, default, maximum):
+        try:
+            value = float(query.get(name, default))
+        except ValueError:
+            raise HttpError(400, f"参数 {name} 无效")
+        return min(max(value, 0.1), maximum)
+
+    # ---- 处理函数 ----
+
+    async def _handle_index(self, reader, writer, query, headers, body):
+        images = "".join(f'<img src="/stream/{stream}.mjpg" alt="{stream}">' for stream in self._streams())
+        page = INDEX_PAGE.format(station=self.station, images=images or "没有摄像头")
+        self._send_response(writer, 200, "text/html; charset=utf-8", page.encode("utf-8"))
+
+    async def _handle_snapshot(self, reader, writer, query, headers, body, stream):
+        self._check_stream(stream)
+        seq, data = await self.encoder.get(stream)
+        if data is None:
+            raise HttpError(503, f"{stream} 没有画面")
+        self._send_response(writer, 200, "image/jpeg", data)
+
+    async def _handle_mjpeg(self, reader, writer, query, headers, body, stream):
+        self._check_stream(stream)
+        interval = 1.0 / self._rate(query, "fps", DEFAULT_MJPEG_FPS, MAX_MJPEG_FPS)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary=" + MJPEG_BOUNDARY +
+                     b"\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        loop = asyncio.get_running_loop()
+        last_seq = None
+        self.clients["mjpeg"] += 1
+        try:
+            while self.running:
+                started = loop.time()
+                seq, data = await self.encoder.get(stream)
+                if data is not None and seq != last_seq:
+                    writer.write(b"--" + MJPEG_BOUNDARY + b"\r\nContent-Type: image/jpeg\r\nContent-Length: " +
+                                 str(len(data)).encode() + b"\r\n\r\n" + data + b"\r\n")
+                    # 发送慢的客户端在这里等待，之后直接取最新帧，不会积压
+                    await writer.drain()
+                    last_seq = seq
+                    self.mjpeg_frames_sent += 1
+                await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+        finally:
+            self.clients["mjpeg"] -= 1
+
+    def _gripper_status(self, controller):
+        sample = controller.get_latest_sample()
+        return {
+            "connected": controller.is_connected(),
+            "port": controller.port,
+            "enabled": controller.enabled,
+            "sn": controller.sn_code if controller.info_seq > 0 else None,
+            "firmware": controller.firmware_version if controller.info_seq > 0 else None,
+            "angle": sample.angle,
+            "distance": sample.distance,
+            "timestamp": sample.timestamp,
+            "seq": sample.seq,
+        }
+
+    def _test_status(self):
+        if self.rules is None:
+            return None
+        return {"variant": self.rules.variant, "verdict": self.rules.verdict,
+                "session_verdict": self.rules.session_verdict,
+                "samples": self.rules.sample_count, "summary": self.rules.summary()}
+
+    async def _handle_status(self, reader, writer, query, headers, body):
+        status = {"station": self.station, "time": time.time()}
+        if self.cameras is not None:
+            status["cameras"] = dict(self.cameras.states)
+            status["streams"] = {stream: {"fps": round(self.cameras.fps[stream], 2),
+                                          "seq": self.cameras.frame_seq[stream]}
+                                 for stream in self._streams()}
+            if self.stream_health is not None:
+                for stream, health in self.stream_health.states().items():
+                    status["streams"].setdefault(stream, {})["health"] = health
+        status["grippers"] = {name: self._gripper_status(controller) for name, controller in self.grippers.items()}
+        status["test"] = self._test_status()
+        status["server"] = {"clients": dict(self.clients), "requests": self.requests,
+                            "mjpeg_frames_sent": self.mjpeg_frames_sent,
+                            "jpeg_encodes": self.encoder.encodes if self.encoder else 0,
+                            "ws_messages_sent": self.ws_messages_sent}
+        self._send_json(writer, status)
+
+    async def _handle_telemetry(self, reader, writer, query, headers, body):
+        key = headers.get("sec-websocket-key")
+        if headers.get("upgrade", "").lower() != "websocket" or not key:
+            raise HttpError(400, "需要WebSocket连接")
+        self._check_origin(headers)
+        interval = 1.0 / self._rate(query, "hz", DEFAULT_TELEMETRY_HZ, MAX_TELEMETRY_HZ)
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode("latin-1")).digest()).decode("latin-1")
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode("latin-1"))
+
+        closed = asyncio.Event()
+        reader_task = asyncio.ensure_future(self._ws_reader(reader, writer, closed))
+        last_seqs = {}
+        last_verdict = None
+        self.clients["ws"] += 1
+        try:
+            while self.running and not closed.is_set():
+                message = {}
+                for name, controller in self.grippers.items():
+                    sample = controller.get_latest_sample()
+                    if sample.seq != last_seqs.get(name):
+                        last_seqs[name] = sample.seq
+                        message.setdefault("grippers", {})[name] = {
+                            "connected": controller.is_connected(), "angle": sample.angle,
+                            "distance": sample.distance, "timestamp": sample.timestamp, "seq": sample.seq}
+                test = self._test_status()
+                if test is not None and (message or test["verdict"] != last_verdict):
+                    last_verdict = test["verdict"]
+                    message["test"] = test
+                if message:
+                    message["time"] = time.time()
+                    writer.write(ws_frame(json.dumps(message, ensure_ascii=False).encode("utf-8")))
+                    await writer.drain()
+                    self.ws_messages_sent += 1
+                try:
+                    await asyncio.wait_for(closed.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.clients["ws"] -= 1
+            reader_task.cancel()
+
+    async def _ws_reader(self, reader, writer, closed):
+        """读取客户端的WebSocket帧，处理ping和close"""
+        try:
+            while True:
+                opcode, payload = await ws_read_frame(reader)
+                if opcode == WS_OP_CLOSE:
+                    writer.write(ws_frame(payload[:2], WS_OP_CLOSE))
+                    break
+                if opcode == WS_OP_PING:
+                    writer.write(ws_frame(payload, WS_OP_PONG))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            closed.set()
+
+    async def _handle_gripper_command(self, reader, writer, query, headers, body, name, command):
+        controller = self.grippers.get(name)
+        if controller is None:
+            raise HttpError(404, f"未知夹爪: {name}")
+        if not controller.is_connected():
+            raise HttpError(409, f"{name} 未连接")
+        params = self._parse_json(body)
+        try:
+            if command == "enable":
+                call = (controller.enable,)
+            elif command == "disable":
+                call = (controller.disable,)
+            elif command == "position":
+                call = (controller.set_position, float(params["angle"]))
+            elif command == "light":
+                call = (controller.set_light, int(params["light"]))
+            elif command == "vibrate":
+                call = (controller.vibrate_control, int(params["mode"]))
+            else:
+                raise HttpError(404, f"未知命令: {command}")
+        except (KeyError, TypeError, ValueError) as e:
+            raise HttpError(400, f"参数无效: {e}")
+        ok = await asyncio.get_running_loop().run_in_executor(self.command_executor, *call)
+        log.info("远程命令 %s/%s %s: %s", name, command, params, "成功" if ok else "失败")
+        self._send_json(writer, {"ok": bool(ok)}, 200 if ok else 500)
+
+    async def _handle_test(self, reader, writer, query, headers, body):
+        test = self._test_status()
+        if test is None:
+            raise HttpError(404, "没有判定规则")
+        self._send_json(writer, test)
+
+    async def _handle_test_restart(self, reader, writer, query, headers, body):
+        if self.test_restart is not None:
+            self.test_restart()
+        elif self.rules is not None:
+            self.rules.reset()
+        else:
+            raise HttpError(404, "没有判定规则")
+        log.info("远程请求重新开始测试")
+        self._send_json(writer, {"ok": True})
+
+
+def parse_address(value):
+    """解析 "host:port" 或 "port"，用于环境变量 PIKA_SERVER
+
+    返回:
+        tuple: (host, port)
+    """
+    host, _, port = value.rpartition(":")
+    return host or DEFAULT_HOST, int(port)
+
+
+def main():
+    import camera_manager
+    from stream_health import StreamHealthMonitor
+
+    parser = argparse.ArgumentParser(description="无界面运行远程查看服务（打开已连接的摄像头）")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="监听地址，0.0.0.0 表示局域网可访问")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="监听端口")
+    args = parser.parse_args()
+
+    monitor = StreamHealthMonitor(no_black_check=(camera_manager.STREAM_RS_DEPTH,),
+                                  no_frozen_check=(camera_manager.STREAM_RS_DEPTH,))
+    manager = camera_manager.CameraManager(lambda device, state, message: print(f"[{device}] {message}"))
+    manager.add_frame_listener(monitor.on_frame)
+    manager.open_all()
+    server = StationServer(manager, stream_health=monitor, host=args.host, port=args.port)
+    if not server.start():
+        manager.shutdown()
+        return 1
+    print(f"远程服务: {server.url}（Ctrl+C 退出）")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        manager.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+图像流健康检测
+摄像头卡死时驱动可能一直返回同一帧画面，帧率统计仍然正常。这里为每一帧计算一个廉价的指纹
+（在画面上等间隔取 FINGERPRINT_GRID x FINGERPRINT_GRID 个像素，计算哈希和最大亮度），用来检测:
+    冻结    画面指纹连续 FROZEN_SECONDS 秒没有变化（真实摄像头的画面即使场景静止也有噪声）
+    全黑    画面连续 BLACK_SECONDS 秒所有采样点都很暗
+    停滞    超过 STALL_SECONDS 秒没有新的帧
+每帧的开销在微秒级（只复制几百字节），在采集线程的帧订阅函数中完成
+深度图在视野中没有物体时全为0，着色后每帧完全相同，不检测全黑和冻结（只检测停滞）
+
+用法（无界面运行，检测已连接的摄像头）:
+    python3 stream_health.py --duration 60
+"""
+
+import sys
+import time
+import logging
+import argparse
+import threading
+
+from station_log import get_logger, log_fields
+
+log = get_logger("stream_health")
+
+# 健康状态
+HEALTH_UNKNOWN = "unknown"  # 尚无画面
+HEALTH_OK = "ok"
+HEALTH_FROZEN = "frozen"
+HEALTH_BLACK = "black"
+HEALTH_STALLED = "stalled"
+
+HEALTH_TEXT = {
+    HEALTH_UNKNOWN: "无画面",
+    HEALTH_OK: "正常",
+    HEALTH_FROZEN: "画面冻结",
+    HEALTH_BLACK: "画面全黑",
+    HEALTH_STALLED: "画面停滞",
+}
+
+# 每个方向的采样点数
+FINGERPRINT_GRID = 16
+
+# 判定时间（秒）
+FROZEN_SECONDS = 1.0
+BLACK_SECONDS = 1.0
+STALL_SECONDS = 1.0
+
+# 所有采样点的最大亮度低于该值视为全黑
+BLACK_LEVEL = 16
+
+
+def frame_fingerprint(image):
+    """计算画面指纹
+
+    参数:
+        image (numpy.ndarray): 画面
+
+    返回:
+        tuple: (指纹, 采样点最大亮度)
+    """
+    height, width = image.shape[:2]
+    sample = image[::max(1, height // FINGERPRINT_GRID), ::max(1, width // FINGERPRINT_GRID)]
+    return hash(sample.tobytes()), int(sample.max())
+
+
+class StreamHealth:
+    """单个图像流的健康状态
+
+    参数:
+        check_black (bool): 是否检测全黑画面（深度图在没有物体时可能全黑，不检测）
+        check_frozen (bool): 是否检测画面冻结（没有物体时的深度图每帧相同，不检测）
+    """
+
+    def __init__(self, check_black=True, check_frozen=True):
+        self.check_black = check_black
+        self.check_frozen = check_frozen
+        self.state = HEALTH_UNKNOWN
+        self.last_fingerprint = None
+        self.last_image = None
+        self.last_frame_time = None
+        self.changed_time = None
+        self.bright_time = None
+        self.frames = 0
+        self.duplicates = 0
+        self.black_frames = 0
+
+    def update(self, image, now):
+        """输入一帧画面，返回新的健康状态"""
+        self.frames += 1
+        self.last_frame_time = now
+        if image is self.last_image:
+            # 驱动返回了同一个缓冲区，不需要计算指纹
+            fingerprint, brightness = self.last_fingerprint
+        else:
+            fingerprint, brightness = frame_fingerprint(image)
+            self.last_image = image
+
+        if self.last_fingerprint is not None and fingerprint == self.last_fingerprint[0]:
+            self.duplicates += 1
+        else:
+            self.changed_time = now
+        self.last_fingerprint = (fingerprint, brightness)
+
+        if brightness >= BLACK_LEVEL or not self.check_black:
+            self.bright_time = now
+        else:
+            self.black_frames += 1
+        if self.bright_time is None:
+            self.bright_time = now
+
+        if self.check_frozen and now - self.changed_time >= FROZEN_SECONDS:
+            self.state = HEALTH_FROZEN
+        elif now - self.bright_time >= BLACK_SECONDS:
+            self.state = HEALTH_BLACK
+        else:
+            self.state = HEALTH_OK
+        return self.state
+
+    def current_state(self, now):
+        """当前健康状态（考虑帧是否停滞）"""
+        if self.last_frame_time is not None and now - self.last_frame_time >= STALL_SECONDS:
+            return HEALTH_STALLED
+        return self.state
+
+
+class StreamHealthMonitor:
+    """所有图像流的健康检测，作为 CameraManager 的帧订阅函数使用
+
+    参数:
+        no_black_check (tuple): 不检测全黑画面的图像流
+        no_frozen_check (tuple): 不检测画面冻结的图像流
+        change_callback: 状态变化回调，参数为(stream, 旧状态, 新状态)，在采集线程中调用
+    """
+
+    def __init__(self, no_black_check=(), no_frozen_check=(), change_callback=None):
+        self.no_black_check = set(no_black_check)
+        self.no_frozen_check = set(no_frozen_check)
+        self.change_callback = change_callback
+        self.streams = {}
+        self.lock = threading.Lock()
+
+    def _get(self, stream):
+        health = self.streams.get(stream)
+        if health is None:
+            with self.lock:
+                health = self.streams.setdefault(stream, StreamHealth(stream not in self.no_black_check,
+                                                                      stream not in self.no_frozen_check))
+        return health
+
+    def on_frame(self, stream, frame):
+        """帧订阅函数（采集线程调用）"""
+        health = self._get(stream)
+        old_state = health.state
+        new_state = health.update(frame.image, time.monotonic())
+        if new_state != old_state and old_state != HEALTH_UNKNOWN:
+            level = logging.INFO if new_state == HEALTH_OK else logging.WARNING
+            log.log(level, "图像流 %s 状态: %s -> %s", stream, HEALTH_TEXT[old_state], HEALTH_TEXT[new_state],
+                    extra=log_fields(device=stream))
+            if self.change_callback:
+                self.change_callback(stream, old_state, new_state)
+
+    def state(self, stream):
+        """图像流的当前健康状态"""
+        health = self.streams.get(stream)
+        if health is None:
+            return HEALTH_UNKNOWN
+        return health.current_state(time.monotonic())
+
+    def states(self):
+        """所有图像流的当前健康状态 {stream: state}"""
+        now = time.monotonic()
+        return {stream: health.current_state(now) for stream, health in list(self.streams.items())}
+
+    def stats(self, stream):
+        """图像流的统计: (总帧数, 重复帧数, 全黑帧数)"""
+        health = self.streams.get(stream)
+        if health is None:
+            return (0, 0, 0)
+        return (health.frames, health.duplicates, health.black_frames)
+
+
+def main():
+    import camera_manager
+
+    parser = argparse.ArgumentParser(description="无界面检测摄像头图像流是否冻结/全黑/停滞")
+    parser.add_argument('--duration', type=float, default=30.0, help="检测时长（秒）")
+    parser.add_argument('--interval', type=float, default=1.0, help="输出状态的间隔（秒）")
+    args = parser.parse_args()
+
+    monitor = StreamHealthMonitor(no_black_check=(camera_manager.STREAM_RS_DEPTH,),
+                                  no_frozen_check=(camera_manager.STREAM_RS_DEPTH,))
+    manager = camera_manager.CameraManager(lambda device, state, message: print(f"[{device}] {message}"))
+    manager.add_frame_listener(monitor.on_frame)
+    manager.open_all()
+
+    unhealthy = set()
+    deadline = time.monotonic() + args.duration
+    try:
+        while time.monotonic() < deadline:
+            time.sleep(args.interval)
+            states = monitor.states()
+            line = []
+            for stream, state in sorted(states.items()):
+                frames, duplicates, black = monitor.stats(stream)
+                line.append(f"{stream}: {HEALTH_TEXT[state]}（{frames} 帧，重复 {duplicates}，全黑 {black}）")
+                if state in (HEALTH_FROZEN, HEALTH_BLACK, HEALTH_STALLED):
+                    unhealthy.add(stream)
+            print("  ".join(line) if line else "尚无画面")
+    finally:
+        manager.shutdown()
+
+    if not monitor.streams:
+        print("没有收到任何画面")
+        return 1
+    if unhealthy:
+        print(f"异常的图像流: {', '.join(sorted(unhealthy))}")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
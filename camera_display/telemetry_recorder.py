@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+夹爪数据录制模块
+订阅 GripperController 的数据样本，按块批量写入只追加的二进制文件，可导出为CSV
+
+录制目录结构:
+    meta.json    录制信息（设备、SN码、开始时间、数据格式）
+    samples.bin  定长记录（SAMPLE_DTYPE），可直接内存映射
+
+- 每条记录保存收到数据时的单调时钟 capture_time（time.monotonic()，不受NTP校时和手动改时间影响）
+  和系统时间 timestamp（time.time()，只用于显示）；capture_time 单调递增，作为文件的索引
+- 数据接收线程只把样本写入预分配的内存块，写满或超过 FLUSH_INTERVAL 秒后交给写盘线程，不做任何磁盘I/O；
+  数据中断时由写盘线程定时交出未写满的内存块
+- 内存块数量固定（CHUNK_COUNT 个），写盘跟不上时丢弃样本并计数，内存占用有上限
+- 加载时使用 np.memmap，数小时的录制也只在访问时才读入对应的页；
+  按时间查询用二分查找 capture_time
+
+用法:
+    python telemetry_recorder.py info <录制目录>
+    python telemetry_recorder.py export <录制目录> [输出.csv] [--start 秒] [--end 秒]
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+
+import numpy as np
+
+from station_log import get_logger, log_fields
+
+log = get_logger("recorder")
+
+# 每条记录40字节
+SAMPLE_DTYPE = np.dtype([
+    ('capture_time', '<f8'),
+    ('timestamp', '<f8'),
+    ('angle', '<f8'),
+    ('distance', '<f8'),
+    ('seq', '<u8'),
+])
+
+# 每个内存块的样本数，以及内存块的数量（内存占用 = CHUNK_SIZE * CHUNK_COUNT * SAMPLE_DTYPE.itemsize 字节，约2.5MB）
+CHUNK_SIZE = 4096
+CHUNK_COUNT = 16
+
+# 未写满的内存块最多缓存多久就交给写盘线程（秒）
+FLUSH_INTERVAL = 1.0
+
+# 导出CSV时每次读取的样本数
+EXPORT_BATCH = 65536
+
+META_FILE = "meta.json"
+DATA_FILE = "samples.bin"
+
+
+def default_record_dir():
+    """默认录制根目录，可通过环境变量 PIKA_RECORD_DIR 修改"""
+    return os.environ.get("PIKA_RECORD_DIR") or os.path.expanduser("~/pika_recordings")
+
+
+class TelemetryRecorder:
+    """夹爪数据录制器
+
+    参数:
+        controller (GripperController): 数据来源
+        path (str): 录制目录，为None时在默认录制根目录下按时间新建
+    """
+
+    def __init__(self, controller, path=None):
+        self.controller = controller
+        if path is None:
+            name = time.strftime("%Y%m%d-%H%M%S") + f"-{controller.name}"
+            path = os.path.join(default_record_dir(), name)
+        self.path = path
+        self.recording = False
+        self.meta = None
+        self.data_file = None
+        self.writer_thread = None
+        self.lock = threading.Lock()
+
+        # 空闲内存块和待写盘内存块
+        self.free_chunks = queue.Queue()
+        self.full_chunks = queue.Queue()
+        for _ in range(CHUNK_COUNT):
+            self.free_chunks.put(np.empty(CHUNK_SIZE, dtype=SAMPLE_DTYPE))
+
+        # 正在填充的内存块（数据接收线程填充，超时由写盘线程、停止录制时由调用线程交出，都在锁内）
+        self.chunk = None
+        self.chunk_rows = 0
+        self.chunk_start = 0.0
+
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+
+    def start(self):
+        """开始录制"""
+        if self.recording:
+            return self.path
+        os.makedirs(self.path, exist_ok=True)
+        self.data_file = open(os.path.join(self.path, DATA_FILE), "ab")
+        self.meta = {
+            "device": self.controller.name,
+            "port": self.controller.port,
+            "sn": self.controller.sn_code,
+            "firmware": self.controller.firmware_version,
+            "start_time": time.time(),
+            "start_monotonic": time.monotonic(),
+            "dtype": [list(field) for field in SAMPLE_DTYPE.descr],
+            "samples": 0,
+            "dropped": 0,
+        }
+        self._write_meta()
+
+        self.recording = True
+        self.writer_thread = threading.Thread(target=self._writer_loop, name="telemetry-writer", daemon=True)
+        self.writer_thread.start()
+        self.controller.add_sample_listener(self.on_sample)
+        log.info("开始录制夹爪数据: %s", self.path, extra=self._log_extra())
+        return self.path
+
+    def stop(self):
+        """停止录制，写完缓存的样本
+
+        返回:
+            dict: 录制信息
+        """
+        if not self.recording:
+            return self.meta
+        self.controller.remove_sample_listener(self.on_sample)
+        with self.lock:
+            self.recording = False
+            self._hand_over_chunk()
+        self.full_chunks.put(None)
+        self.writer_thread.join()
+        self.writer_thread = None
+        self.data_file.close()
+
+        self.meta["end_time"] = time.time()
+        self.meta["samples"] = self.written
+        self.meta["dropped"] = self.dropped
+        self._write_meta()
+        log.info("停止录制夹爪数据: %d 个样本，丢弃 %d 个", self.written, self.dropped,
+                 extra=self._log_extra())
+        return self.meta
+
+    def on_sample(self, sample):
+        """样本处理函数（数据接收线程调用），只写内存不阻塞"""
+        with self.lock:
+            if not self.recording:
+                return
+            if self.chunk is None:
+                try:
+                    self.chunk = self.free_chunks.get_nowait()
+                except queue.Empty:
+                    # 写盘跟不上，所有内存块都在等待写盘
+                    self.dropped += 1
+                    return
+                self.chunk_rows = 0
+                self.chunk_start = sample.capture_time
+            self.chunk[self.chunk_rows] = (sample.capture_time, sample.timestamp, sample.angle, sample.distance,
+                                           sample.seq)
+            self.chunk_rows += 1
+            self.recorded += 1
+            if self.chunk_rows >= CHUNK_SIZE or sample.capture_time - self.chunk_start >= FLUSH_INTERVAL:
+                self._hand_over_chunk()
+
+    def _hand_over_chunk(self):
+        """把正在填充的内存块交给写盘线程（调用方持有锁）"""
+        if self.chunk is not None:
+            self.full_chunks.put((self.chunk, self.chunk_rows))
+            self.chunk = None
+            self.chunk_rows = 0
+
+    def _writer_loop(self):
+        """写盘线程（数据中断超过 FLUSH_INTERVAL 秒时交出未写满的内存块）"""
+        while True:
+            try:
+                item = self.full_chunks.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                with self.lock:
+                    if self.chunk is not None and time.monotonic() - self.chunk_start >= FLUSH_INTERVAL:
+                        self._hand_over_chunk()
+                continue
+            if item is None:
+                break
+            chunk, rows = item
+            try:
+                self.data_file.write(chunk[:rows].tobytes())
+                self.data_file.flush()
+                self.written += rows
+            except OSError as e:
+                self.dropped += rows
+                log.error("写入录制文件失败: %s", e, extra=self._log_extra())
+            self.free_chunks.put(chunk)
+
+    def _write_meta(self):
+        tmp_path = os.path.join(self.path, META_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, META_FILE))
+
+    def _log_extra(self):
+        return log_fields(device=self.controller.name, port=self.controller.port)
+
+
+def load_recording(path):
+    """以内存映射方式加载录制数据
+
+    参数:
+        path (str): 录制目录
+
+    返回:
+        tuple: (samples, meta)，samples 为只读的结构化数组（np.memmap），meta 为录制信息；
+               按 meta 中保存的数据格式读取，没有 capture_time 的旧录制以 timestamp 作为索引
+    """
+    meta_path = os.path.join(path, META_FILE)
+    meta = {}
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    dtype = np.dtype([tuple(field) for field in meta["dtype"]]) if meta.get("dtype") else SAMPLE_DTYPE
+    data_path = os.path.join(path, DATA_FILE)
+    # 以文件实际大小为准（录制中途退出时meta中的样本数可能未更新），忽略末尾不完整的记录
+    rows = os.path.getsize(data_path) // dtype.itemsize
+    if rows == 0:
+        return np.zeros(0, dtype=dtype), meta
+    samples = np.memmap(data_path, dtype=dtype, mode="r", shape=(rows,))
+    return samples, meta
+
+
+def index_times(samples):
+    """样本的索引时间列（单调时钟，旧录制为系统时间）"""
+    return samples['capture_time'] if 'capture_time' in samples.dtype.names else samples['timestamp']
+
+
+def time_slice(samples, start=None, end=None):
+    """按索引时间（capture_time）截取样本（二分查找，不读取范围之外的数据）
+
+    参数:
+        samples: load_recording() 返回的样本数组
+        start (float): 开始时间，为None时从头开始
+        end (float): 结束时间（不含），为None时到末尾
+    """
+    timestamps = index_times(samples)
+    first = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+    last = len(samples) if end is None else int(np.searchsorted(timestamps, end, side="left"))
+    return samples[first:last]
+
+
+def export_csv(path, csv_path=None, start=None, end=None):
+    """导出录制数据为CSV（分批读取，内存占用与录制时长无关）
+
+    参数:
+        path (str): 录制目录
+        csv_path (str): 输出文件，为None时写入录制目录下的 samples.csv
+        start (float): 开始时间（相对录制开始，秒）
+        end (float): 结束时间（相对录制开始，秒）
+
+    返回:
+        tuple: (输出文件路径, 导出的样本数)
+    """
+    samples, _ = load_recording(path)
+    if csv_path is None:
+        csv_path = os.path.join(path, "samples.csv")
+    if len(samples) and (start is not None or end is not None):
+        t0 = float(index_times(samples)[0])
+        samples = time_slice(samples,
+                             None if start is None else t0 + start,
+                             None if end is None else t0 + end)
+    with open(csv_path, "w", encoding="utf-8") as f:
+        f.write("capture_time,timestamp,angle,distance,seq\n")
+        for first in range(0, len(samples), EXPORT_BATCH):
+            batch = samples[first:first + EXPORT_BATCH]
+            columns = np.column_stack([index_times(batch), batch['timestamp'], batch['angle'], batch['distance']])
+            rows = [f"{c:.6f},{t:.6f},{a:.6f},{d:.6f},{s}"
+                    for (c, t, a, d), s in zip(columns.tolist(), batch['seq'].tolist())]
+            f.write("\n".join(rows))
+            f.write("\n")
+    return csv_path, len(samples)
+
+
+def print_info(path):
+    """输出录制信息"""
+    samples, meta = load_recording(path)
+    print(f"录制目录: {path}")
+    for key in ("device", "port", "sn", "firmware"):
+        if key in meta:
+            print(f"  {key}: {meta[key]}")
+    print(f"  样本数: {len(samples)}，丢弃: {meta.get('dropped', 0)}")
+    if len(samples) >= 2:
+        timestamps = index_times(samples)
+        duration = float(timestamps[-1] - timestamps[0])
+        intervals = np.diff(timestamps)
+        print(f"  时长: {duration:.3f} 秒，平均采样率: {(len(samples) - 1) / duration:.1f} Hz"
+              if duration > 0 else "  时长: 0 秒")
+        print(f"  采样间隔: 中位数 {np.median(intervals) * 1000:.3f} ms，"
+              f"最大 {intervals.max() * 1000:.3f} ms")
+        angles = samples['angle']
+        print(f"  角度: 最小 {angles.min():.4f}，最大 {angles.max():.4f}，平均 {angles.mean():.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="夹爪数据录制文件工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    info_parser = subparsers.add_parser("info", help="显示录制信息")
+    info_parser.add_argument("path", help="录制目录")
+    export_parser = subparsers.add_parser("export", help="导出为CSV")
+    export_parser.add_argument("path", help="录制目录")
+    export_parser.add_argument("csv", nargs="?", help="输出文件，默认为录制目录下的 samples.csv")
+    export_parser.add_argument("--start", type=float, help="开始时间（相对录制开始，秒）")
+    export_parser.add_argument("--end", type=float, help="结束时间（相对录制开始，秒）")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        print_info(args.path)
+    else:
+        csv_path, count = export_csv(args.path, args.csv, args.start, args.end)
+        print(f"已导出 {count} 个样本: {csv_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+时间同步模块
+把摄像头帧和夹爪数据的时间戳统一到主机单调时钟（time.monotonic）上，用于按时间对齐画面和夹爪角度
+
+- ClockSync: 设备时钟（RealSense硬件时间戳、USB摄像头驱动时间戳）到主机单调时钟的映射，
+  根据(设备时间, 到达时间)估计时钟偏移和漂移。到达时间 = 采集时间 + 传输延迟，延迟只会为正，
+  所以取每段时间内延迟最小的点做直线拟合（下包络线），不受偶发的传输抖动影响
+- TimestampRing: 定长环形缓冲区，按递增的键写入，二分查找最近/指定的记录
+- TimeSync: 订阅夹爪样本和摄像头帧，提供"第k帧对应的最近夹爪样本"查询
+
+夹爪串口数据没有设备时间戳，采集时刻取事件循环读到数据的时刻（GripperSample.capture_time）
+"""
+
+import threading
+from array import array
+from collections import deque
+
+# 偏移/漂移估计使用的最近样本数，以及拟合时分段的数量
+CLOCK_WINDOW = 600
+CLOCK_SEGMENTS = 8
+# 每收到多少个样本重新估计一次
+CLOCK_UPDATE_EVERY = 30
+# 漂移超过该值（百万分之一）视为估计不可靠，按无漂移处理
+MAX_DRIFT_PPM = 1000.0
+# 映射误差超过该值（秒）视为设备时钟被重置（如设备重启后从0开始计时），重新估计
+CLOCK_RESET_THRESHOLD = 1.0
+
+# 环形缓冲区容量
+SAMPLE_RING_CAPACITY = 16384
+FRAME_RING_CAPACITY = 1024
+
+
+class ClockSync:
+    """设备时钟到主机单调时钟的映射: host = offset + (device - device_ref) * rate
+
+    参数:
+        fixed_latency (float): 最小传输延迟（秒），从映射结果中扣除；为0时映射结果是"最快到达"的时刻
+    """
+
+    def __init__(self, fixed_latency=0.0):
+        self.fixed_latency = fixed_latency
+        self.lock = threading.Lock()
+        self.resets = 0
+        self._reset()
+
+    def reset(self):
+        """清除估计结果（设备重新打开或时钟被重置时调用，可在任意线程调用）"""
+        with self.lock:
+            self._reset()
+
+    def _reset(self):
+        """清除估计结果（调用方持有锁）"""
+        self.pairs = deque(maxlen=CLOCK_WINDOW)
+        self.device_ref = None
+        self.offset = None
+        self.rate = 1.0
+        self.count = 0
+
+    def add(self, device_time, host_time):
+        """记录一帧的设备时间和到达时间
+
+        参数:
+            device_time (float): 设备时间戳（秒），为None时直接使用到达时间
+            host_time (float): 到达时间（time.monotonic）
+
+        返回:
+            float: 该帧在主机单调时钟上的采集时刻
+        """
+        if device_time is None:
+            return host_time
+        with self.lock:
+            if self.device_ref is not None and abs(host_time - self._map(device_time)) > CLOCK_RESET_THRESHOLD:
+                self._reset()
+                self.resets += 1
+            if self.device_ref is None:
+                self.device_ref = device_time
+            self.pairs.append((device_time - self.device_ref, host_time))
+            self.count += 1
+            if self.offset is None or self.count % CLOCK_UPDATE_EVERY == 0:
+                self._estimate()
+            # 采集时刻不会晚于到达时刻
+            return min(self._map(device_time), host_time) - self.fixed_latency
+
+    def _map(self, device_time):
+        return self.offset + (device_time - self.device_ref) * self.rate
+
+    def _estimate(self):
+        """用每段中延迟最小的点拟合直线，再平移到下包络"""
+        pairs = list(self.pairs)
+        count = len(pairs)
+        if count < CLOCK_SEGMENTS * 2:
+            self.rate = 1.0
+            self.offset = min(host - device for device, host in pairs)
+            return
+
+        size = count // CLOCK_SEGMENTS
+        points = [min(pairs[i * size:(i + 1) * size], key=lambda p: p[1] - p[0])
+                  for i in range(CLOCK_SEGMENTS)]
+        mean_d = sum(p[0] for p in points) / len(points)
+        mean_h = sum(p[1] for p in points) / len(points)
+        var_d = sum((p[0] - mean_d) ** 2 for p in points)
+        rate = 1.0
+        if var_d > 0:
+            rate = sum((p[0] - mean_d) * (p[1] - mean_h) for p in points) / var_d
+            if abs(rate - 1.0) * 1e6 > MAX_DRIFT_PPM:
+                rate = 1.0
+        offset = mean_h - rate * mean_d
+        # 平移到所有样本的下包络，保证映射结果不晚于任何一帧的到达时刻
+        offset += min(host - (offset + device * rate) for device, host in pairs)
+        self.rate = rate
+        self.offset = offset
+
+    def status(self):
+        """时钟同步状态
+
+        返回:
+            dict: offset 偏移（秒），drift_ppm 漂移，latency_ms 超出最小延迟的传输延迟中位数（毫秒），
+                  samples 参与估计的样本数，resets 时钟重置次数；尚无样本时返回None
+        """
+        with self.lock:
+            if self.offset is None:
+                return None
+            excess = sorted(host - (self.offset + device * self.rate) for device, host in self.pairs)
+            return {
+                "offset": self.offset - self.device_ref,
+                "drift_ppm": (self.rate - 1.0) * 1e6,
+                "latency_ms": excess[len(excess) // 2] * 1000.0,
+                "samples": len(self.pairs),
+                "resets": self.resets,
+            }
+
+    def format_status(self):
+        """格式化时钟同步状态"""
+        status = self.status()
+        if status is None:
+            return "无设备时间戳"
+        return ("偏移 {offset:.6f} s，漂移 {drift_ppm:+.1f} ppm，"
+                "延迟抖动中位数 {latency_ms:.2f} ms（{samples} 个样本，重置 {resets} 次）").format(**status)
+
+
+class TimestampRing:
+    """定长环形缓冲区：按递增的键（时间戳或帧序号）写入，二分查找
+
+    只有一个写入线程；读取线程不加锁，查找时先取写入计数，缓冲区足够大时不会读到被覆盖的记录
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.keys = array('d', bytes(8 * capacity))
+        self.values = [None] * capacity
+        self.count = 0
+
+    def clear(self):
+        self.count = 0
+
+    def append(self, key, value):
+        """写入一条记录，键小于上一条时按上一条的键记录，保持递增"""
+        count = self.count
+        index = count % self.capacity
+        if count > 0:
+            key = max(key, self.keys[(count - 1) % self.capacity])
+        self.keys[index] = key
+        self.values[index] = value
+        self.count = count + 1
+
+    def _bisect(self, key):
+        """返回(第一个键>=key的逻辑位置, 有效范围起点, 终点)"""
+        end = self.count
+        first = max(0, end - self.capacity)
+        capacity = self.capacity
+        keys = self.keys
+        lo, hi = first, end
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if keys[mid % capacity] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo, first, end
+
+    def nearest(self, key):
+        """查找键最接近的记录
+
+        返回:
+            tuple: (键, 值)，缓冲区为空时返回None
+        """
+        position, first, end = self._bisect(key)
+        best = None
+        for candidate in (position - 1, position):
+            if first <= candidate < end:
+                index = candidate % self.capacity
+                if best is None or abs(self.keys[index] - key) < abs(self.keys[best] - key):
+                    best = index
+        if best is None:
+            return None
+        return self.keys[best], self.values[best]
+
+    def find(self, key):
+        """查找键等于key的记录的值，不存在时返回None"""
+        position, first, end = self._bisect(key)
+        if first <= position < end and self.keys[position % self.capacity] == key:
+            return self.values[position % self.capacity]
+        return None
+
+
+class TimeSync:
+    """摄像头帧与夹爪样本的时间对齐
+
+    用法:
+        time_sync = TimeSync()
+        gripper.add_sample_listener(time_sync.on_gripper_sample)
+        cameras.add_frame_listener(time_sync.on_frame)
+        sample, dt = time_sync.nearest_sample_for_frame(stream, frame.seq)
+    """
+
+    def __init__(self):
+        self.samples = TimestampRing(SAMPLE_RING_CAPACITY)
+        self.frames = {}
+
+    def reset_samples(self):
+        """清空夹爪样本（重新连接夹爪时调用）"""
+        self.samples.clear()
+
+    def on_gripper_sample(self, sample):
+        """夹爪样本订阅函数（数据接收线程调用）"""
+        self.samples.append(sample.capture_time, sample)
+
+    def on_frame(self, stream, frame):
+        """摄像头帧订阅函数（采集线程调用），只记录帧序号和采集时刻，不保留图像"""
+        ring = self.frames.get(stream)
+        if ring is None:
+            ring = self.frames.setdefault(stream, TimestampRing(FRAME_RING_CAPACITY))
+        ring.append(frame.seq, frame.capture_time)
+
+    def frame_time(self, stream, seq):
+        """查询图像流第seq帧的采集时刻，帧已滑出缓冲区时返回None"""
+        ring = self.frames.get(stream)
+        return ring.find(seq) if ring is not None else None
+
+    def nearest_sample(self, capture_time):
+        """查询采集时刻最接近的夹爪样本
+
+        返回:
+            tuple: (GripperSample, 时间差)，时间差 = 样本时刻 - 查询时刻（秒）；没有样本时返回(None, None)
+        """
+        found = self.samples.nearest(capture_time)
+        if found is None:
+            return None, None
+        sample_time, sample = found
+        return sample, sample_time - capture_time
+
+    def nearest_sample_for_frame(self, stream, seq):
+        """查询图像流第seq帧对应的最近夹爪样本，返回值同 nearest_sample()"""
+        capture_time = self.frame_time(stream, seq)
+        if capture_time is None:
+            return None, None
+        return self.nearest_sample(capture_time)
+
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多路视频录制
+同时录制USB彩色、RealSense彩色和着色后的深度图像流，用于排查偶发故障
+
+录制目录结构:
+    meta.json                 录制信息（设备、SN码、编码格式、各图像流的统计）
+    <图像流>_<分段号>.avi      视频分段，按时长或文件大小切分
+    <图像流>_<分段号>.csv      分段中每一帧的帧序号、到达时间和采集时刻（用于和夹爪数据对齐）
+
+- 采集线程只把帧放入该图像流的有界队列：OpenCV返回的画面直接传递不复制；
+  引用驱动帧缓冲区的画面（RealSense）复制一份，避免长时间占用驱动的帧池导致采集丢帧
+- 每个图像流由独立的编码线程用 cv2.VideoWriter 编码（执行时释放GIL）
+- 队列满时按丢帧策略丢弃并计数: newest 丢弃新到的帧（默认），oldest 丢弃队列中最旧的帧；
+  丢帧只影响录像，不影响采集和界面显示
+
+用法（无界面运行，打开已连接的摄像头）:
+    python3 video_recorder.py --duration 600 --segment-seconds 60
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import threading
+from collections import deque
+from datetime import datetime
+
+import cv2
+
+from station_log import get_logger, log_fields, get_station_name
+
+log = get_logger("video")
+
+# 丢帧策略
+DROP_NEWEST = "newest"
+DROP_OLDEST = "oldest"
+
+# 每个图像流的队列容量（帧），640x480 约1秒
+QUEUE_FRAMES = 32
+
+# 分段条件：时长（秒）和文件大小（字节），先满足者切分
+SEGMENT_SECONDS = 300.0
+SEGMENT_BYTES = 1 << 30
+# 每写入多少帧检查一次文件大小
+SIZE_CHECK_EVERY = 30
+
+# 编码格式及对应的文件扩展名；MJPG每帧独立编码，可逐帧定位，CPU占用低
+FOURCC_EXTENSIONS = {"MJPG": ".avi", "XVID": ".avi", "mp4v": ".mp4"}
+DEFAULT_FOURCC = "MJPG"
+
+# 无法获得采集帧率时写入视频的帧率
+DEFAULT_VIDEO_FPS = 30.0
+
+META_FILE = "meta.json"
+
+
+def default_video_dir():
+    """默认录制根目录，可通过环境变量 PIKA_VIDEO_DIR 修改"""
+    return os.environ.get("PIKA_VIDEO_DIR") or os.path.expanduser("~/pika_videos")
+
+
+class StreamEncoder:
+    """一个图像流的编码线程
+
+    参数:
+        stream (str): 图像流
+        directory (str): 录制目录
+        fourcc (str): 编码格式
+        fps_source: 返回该图像流当前采集帧率的函数，用于设置视频帧率
+        queue_frames (int): 队列容量
+        drop_policy (str): 丢帧策略 newest/oldest
+        segment_seconds (float): 分段时长
+        segment_bytes (int): 分段文件大小
+    """
+
+    def __init__(self, stream, directory, fourcc, fps_source, queue_frames=QUEUE_FRAMES,
+                 drop_policy=DROP_NEWEST, segment_seconds=SEGMENT_SECONDS, segment_bytes=SEGMENT_BYTES):
+        if drop_policy not in (DROP_NEWEST, DROP_OLDEST):
+            raise ValueError(f"未知的丢帧策略: {drop_policy}")
+        self.stream = stream
+        self.directory = directory
+        self.fourcc = fourcc
+        self.extension = FOURCC_EXTENSIONS.get(fourcc, ".avi")
+        self.fps_source = fps_source
+        self.queue_frames = queue_frames
+        self.drop_policy = drop_policy
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.stopping = False
+
+        self.writer = None
+        self.index_file = None
+        self.index_writer = None
+        self.segment_path = None
+        self.segment_size = None
+        self.segment_started = 0.0
+        self.segment_frames = 0
+
+        # 统计
+        self.received = 0
+        self.copied = 0
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+        self.segments = []
+        self.max_queue_depth = 0
+
+        self.thread = threading.Thread(target=self._run, name=f"video-{stream}", daemon=True)
+        self.thread.start()
+
+    def push(self, frame):
+        """放入一帧（采集线程调用），不阻塞"""
+        image = frame.image
+        if not image.flags.owndata:
+            # 画面引用驱动的帧缓冲区，复制后释放
+            frame = frame._replace(image=image.copy(), raw=None)
+            copied = True
+        else:
+            copied = False
+        with self.condition:
+            self.received += 1
+            self.copied += copied
+            if len(self.queue) >= self.queue_frames:
+                self.dropped += 1
+                if self.drop_policy == DROP_NEWEST:
+                    return
+                self.queue.popleft()
+            self.queue.append(frame)
+            self.max_queue_depth = max(self.max_queue_depth, len(self.queue))
+            self.condition.notify()
+
+    def stop(self):
+        """写完队列中的帧后停止"""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.stopping:
+                    self.condition.wait()
+                if not self.queue:
+                    break
+                frame = self.queue.popleft()
+            try:
+                self._write(frame)
+            except Exception as e:
+                self.errors += 1
+                log.error("%s 写入视频失败: %s", self.stream, e, extra=log_fields(device=self.stream))
+        self._close_segment()
+
+    def _write(self, frame):
+        image = frame.image
+        size = (image.shape[1], image.shape[0])
+        now = time.monotonic()
+        if (self.writer is None or size != self.segment_size
+                or now - self.segment_started >= self.segment_seconds
+                or (self.segment_frames % SIZE_CHECK_EVERY == 0
+                    and os.path.getsize(self.segment_path) >= self.segment_bytes)):
+            self._open_segment(size, image.ndim == 3, now)
+        self.writer.write(image)
+        self.index_writer.writerow((self.segment_frames, frame.seq, f"{frame.timestamp:.6f}",
+                                    f"{frame.capture_time:.6f}"))
+        self.segment_frames += 1
+        self.written += 1
+
+    def _open_segment(self, size, is_color, now):
+        self._close_segment()
+        name = f"{self.stream}_{len(self.segments):03d}"
+        self.segment_path = os.path.join(self.directory, name + self.extension)
+        fps = self.fps_source()
+        if not fps or fps < 1.0:
+            fps = DEFAULT_VIDEO_FPS
+        self.writer = cv2.VideoWriter(self.segment_path, cv2.VideoWriter_fourcc(*self.fourcc), round(fps, 2),
+                                      size, is_color)
+        if not self.writer.isOpened():
+            self.writer = None
+            raise OSError(f"无法创建视频文件 {self.segment_path}（编码格式 {self.fourcc}）")
+        self.index_file = open(os.path.join(self.directory, name + ".csv"), "w", newline="")
+        self.index_writer = csv.writer(self.index_file)
+        self.index_writer.writerow(("frame", "seq", "timestamp", "capture_time"))
+        self.segment_size = size
+        self.segment_started = now
+        self.segment_frames = 0
+        self.segments.append({"file": os.path.basename(self.segment_path), "width": size[0], "height": size[1],
+                              "fps": round(fps, 2), "frames": 0})
+
+    def _close_segment(self):
+        if self.writer is None:
+            return
+        self.writer.release()
+        self.writer = None
+        self.index_file.close()
+        self.index_file = None
+        self.segments[-1]["frames"] = self.segment_frames
+        self.segments[-1]["bytes"] = os.path.getsize(self.segment_path)
+
+    def stats(self):
+        """统计信息"""
+        with self.condition:
+            queued = len(self.queue)
+        return {
+            "received": self.received,
+            "written": self.written,
+            "dropped": self.dropped,
+            "copied": self.copied,
+            "errors": self.errors,
+            "queued": queued,
+            "max_queue_depth": self.max_queue_depth,
+            "segments": list(self.segments),
+        }
+
+
+class VideoRecorder:
+    """多路视频录制器，作为 CameraManager 的帧订阅函数使用
+
+    参数:
+        cameras (CameraManager): 摄像头管理器
+        streams (list): 录制的图像流，为None时录制所有图像流
+        root (str): 录制根目录，为None时使用默认目录
+        fourcc (str): 编码格式
+        drop_policy (str): 丢帧策略 newest/oldest
+        segment_seconds (float): 分段时长（秒）
+        segment_bytes (int): 分段文件大小（字节）
+        metadata (dict): 写入 meta.json 的附加信息（如SN码）
+    """
+
+    def __init__(self, cameras, streams=None, root=None, fourcc=DEFAULT_FOURCC, drop_policy=DROP_NEWEST,
+                 segment_seconds=SEGMENT_SECONDS, segment_bytes=SEGMENT_BYTES, metadata=None):
+        self.cameras = cameras
+        self.streams = tuple(streams) if streams is not None else tuple(cameras.frames)
+        self.root = root or default_video_dir()
+        self.fourcc = fourcc
+        self.drop_policy = drop_policy
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.metadata = dict(metadata or {})
+        self.path = None
+        self.encoders = {}
+        self.started_at = None
+
+    @property
+    def recording(self):
+        return bool(self.encoders)
+
+    def start(self):
+        """开始录制
+
+        返回:
+            str: 录制目录
+        """
+        self.path = os.path.join(self.root, datetime.now().strftime("%Y%m%d-%H%M%S") + "-video")
+        os.makedirs(self.path, exist_ok=True)
+        self.started_at = time.time()
+        self.encoders = {
+            stream: StreamEncoder(stream, self.path, self.fourcc, lambda stream=stream: self.cameras.fps[stream],
+                                  drop_policy=self.drop_policy, segment_seconds=self.segment_seconds,
+                                  segment_bytes=self.segment_bytes)
+            for stream in self.streams
+        }
+        self.cameras.add_frame_listener(self.on_frame)
+        log.info("开始录像: %s", self.path)
+        return self.path
+
+    def on_frame(self, stream, frame):
+        """帧订阅函数（采集线程调用）"""
+        encoder = self.encoders.get(stream)
+        if encoder is not None:
+            encoder.push(frame)
+
+    def stop(self):
+        """停止录制，写完队列中的帧
+
+        返回:
+            dict: 录制信息（同 meta.json）
+        """
+        self.cameras.remove_frame_listener(self.on_frame)
+        encoders = self.encoders
+        for encoder in encoders.values():
+            encoder.stop()
+        meta = self._meta(encoders)
+        self.encoders = {}
+        try:
+            with open(os.path.join(self.path, META_FILE), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            log.error("写入录像信息失败: %s", e)
+        log.info("录像结束: %s，%s", self.path, format_stats(meta["streams"]))
+        return meta
+
+    def stats(self):
+        """各图像流的统计 {stream: dict}"""
+        return {stream: encoder.stats() for stream, encoder in self.encoders.items()}
+
+    def _meta(self, encoders):
+        return {
+            "station": get_station_name(),
+            "started_at": self.started_at,
+            "stopped_at": time.time(),
+            "fourcc": self.fourcc,
+            "drop_policy": self.drop_policy,
+            "segment_seconds": self.segment_seconds,
+            "segment_bytes": self.segment_bytes,
+            "realsense_sn": self.cameras.rs_serial,
+            "streams": {stream: encoder.stats() for stream, encoder in encoders.items()},
+            **self.metadata,
+        }
+
+
+def format_stats(stats):
+    """格式化各图像流的统计，如: usb_color 写入 1800/丢弃 0"""
+    return "，".join(f"{stream} 写入 {s['written']}/丢弃 {s['dropped']}" for stream, s in stats.items())
+
+
+def main():
+    import camera_manager
+
+    parser = argparse.ArgumentParser(description="无界面录制所有图像流（打开已连接的摄像头）")
+    parser.add_argument('--duration', type=float, default=60.0, help="录制时长（秒）")
+    parser.add_argument('--out', help="录制根目录（默认 ~/pika_videos）")
+    parser.add_argument('--fourcc', default=DEFAULT_FOURCC, help="编码格式，如 MJPG / mp4v / XVID")
+    parser.add_argument('--drop-policy', choices=(DROP_NEWEST, DROP_OLDEST), default=DROP_NEWEST,
+                        help="队列满时丢弃新帧还是旧帧")
+    parser.add_argument('--segment-seconds', type=float, default=SEGMENT_SECONDS, help="分段时长（秒）")
+    parser.add_argument('--segment-mb', type=float, default=SEGMENT_BYTES / (1 << 20), help="分段大小（MB）")
+    parser.add_argument('--warmup', type=float, default=3.0, help="打开摄像头后等待的时间（秒）")
+    args = parser.parse_args()
+
+    manager = camera_manager.CameraManager(lambda device, state, message: print(f"[{device}] {message}"))
+    manager.open_all()
+    recorder = None
+    try:
+        time.sleep(args.warmup)
+        streams = [stream for stream in manager.frames if manager.get_frame(stream) is not None]
+        if not streams:
+            print("没有可录制的画面")
+            return 1
+        recorder = VideoRecorder(manager, streams, args.out, args.fourcc, args.drop_policy,
+                                 args.segment_seconds, int(args.segment_mb * (1 << 20)))
+        print(f"录像: {recorder.start()}")
+        deadline = time.monotonic() + args.duration
+        while time.monotonic() < deadline:
+            time.sleep(min(5.0, max(0.0, deadline - time.monotonic())))
+            print(format_stats(recorder.stats()), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if recorder is not None and recorder.recording:
+            meta = recorder.stop()
+            print(f"录像结束: {format_stats(meta['streams'])}")
+        manager.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())